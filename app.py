@@ -1,19 +1,21 @@
 # app.py
 import streamlit as st
-import pandas as pd
 import time
 import random
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import sys
 import os
 import queue
+import re
 from concurrent.futures import ThreadPoolExecutor
 import asyncio
-from message_deleter import DiscordMessageDeleter
-import base64
-import requests
-from io import BytesIO
-from PIL import Image
+from message_deleter import (DiscordMessageDeleter, format_duration, MAX_PARALLEL_CHANNELS,
+                             load_env_token, TOKEN_ENV_VAR, APP_DATA_DIR, PERSISTENT_PROFILE)
+from message_filters import FilterSpec
+from snowflakes import datetime_to_snowflake
+from session_cache import SessionCache
+from browser_profile import PROFILE_MAX_MB
+from listing_cache import ListingCache
 import traceback
 
 # Configuração da página
@@ -149,25 +151,34 @@ st.markdown("""
 
 
 # --- INÍCIO DAS FUNÇÕES DE CACHE ---
-# Cache de 5 minutos (300 segundos)
-
-@st.cache_data(ttl=300)
-def get_cached_dms(_deleter_instance):
-    """Busca e armazena em cache a lista de DMs"""
-    print("CACHE MISS: Buscando DMs da API")
-    return _deleter_instance.get_dms()
-
-@st.cache_data(ttl=300)
-def get_cached_servers(_deleter_instance):
-    """Busca e armazena em cache a lista de Servidores"""
-    print("CACHE MISS: Buscando Servidores da API")
-    return _deleter_instance.get_servers()
-
-@st.cache_data(ttl=300)
-def get_cached_server_channels(_deleter_instance, server_id):
-    """Busca e armazena em cache os canais de um servidor específico"""
-    print(f"CACHE MISS: Buscando Canais do Servidor {server_id} da API")
-    return _deleter_instance.get_server_channels(server_id)
+# Snapshot em disco por conta (user_id): a tela abre na hora com a última lista conhecida e,
+# passados 5 minutos, a lista é atualizada em segundo plano
+
+def get_listing_cache(deleter):
+    """Cache de listas da conta logada (um por sessão; recriado se a conta mudar)"""
+    cache = st.session_state.get('listing_cache')
+    if cache is None or cache.user_id != str(deleter.user_id):
+        cache = ListingCache(APP_DATA_DIR, deleter.user_id)
+        st.session_state.listing_cache = cache
+    return cache
+
+def invalidate_listings():
+    """Marca as listas como velhas (atualização em segundo plano na próxima leitura)"""
+    cache = st.session_state.get('listing_cache')
+    if cache is not None:
+        cache.invalidate()
+
+def get_cached_dms(deleter):
+    """Lista de DMs (snapshot da conta; busca na API só se ainda não houver)"""
+    return get_listing_cache(deleter).get('dms', deleter.get_dms)
+
+def get_cached_servers(deleter):
+    """Lista de Servidores (snapshot da conta; busca na API só se ainda não houver)"""
+    return get_listing_cache(deleter).get('servers', deleter.get_servers)
+
+def get_cached_server_channels(deleter, server_id):
+    """Canais de um servidor específico (snapshot da conta; busca na API só se ainda não houver)"""
+    return get_listing_cache(deleter).get(f'channels:{server_id}', lambda: deleter.get_server_channels(server_id))
 
 # --- FIM DAS FUNÇÕES DE CACHE ---
 
@@ -223,52 +234,103 @@ class DiscordMessageDeleterApp:
             </div>
             """, unsafe_allow_html=True)
             
-            with st.form("login_form"):
-                email = st.text_input("📧 Email", placeholder="seu.email@exemplo.com")
-                password = st.text_input("🔒 Senha", type="password", placeholder="Sua senha do Discord")
+            env_token = load_env_token()
+            tab_password, tab_token = st.tabs(["📧 Email e senha", "🔑 Token"])
+
+            with tab_password:
+                with st.form("login_form"):
+                    email = st.text_input("📧 Email", placeholder="seu.email@exemplo.com")
+                    password = st.text_input("🔒 Senha", type="password", placeholder="Sua senha do Discord")
                 
-                # --- INÍCIO DA MODIFICAÇÃO (2FA) ---
-                has_2fa = st.checkbox("🔐 Tem 2FA (Segurança em Duas Etapas)?", help="Marque se sua conta tem 2FA. O navegador abrirá para você digitar o código.")
-                # --- FIM DA MODIFICAÇÃO (2FA) ---
+                    # --- INÍCIO DA MODIFICAÇÃO (2FA) ---
+                    has_2fa = st.checkbox("🔐 Tem 2FA (Segurança em Duas Etapas)?", help="Marque se sua conta tem 2FA. O navegador abrirá para você digitar o código.")
+                    # --- FIM DA MODIFICAÇÃO (2FA) ---
+
+                    remember = st.checkbox("💾 Lembrar sessão neste computador",
+                                           help="Guarda o token cifrado (keyring do sistema ou arquivo com frase-senha). "
+                                                "No próximo login o navegador só abre se a sessão tiver expirado; a senha pode ficar em branco.")
+                    passphrase = st.text_input("🔏 Frase-senha (opcional)", type="password",
+                                               help="Cifra a sessão num arquivo local. Sem ela, usa o keyring do sistema.")
+                    keep_profile = st.checkbox("🗂️ Manter perfil do navegador", value=PERSISTENT_PROFILE,
+                                               help="Reaproveita o perfil do Chrome desta conta entre logins (cache do Discord e sessão). "
+                                                    f"O cache é podado acima de {PROFILE_MAX_MB} MB.")
 
-                login_button = st.form_submit_button("🚀 Fazer Login", use_container_width=True)
+                    login_button = st.form_submit_button("🚀 Fazer Login", use_container_width=True)
                 
-                if login_button:
-                    if not email or not password:
-                        st.error("❌ Por favor, preencha email e senha")
-                        return
+                    if login_button:
+                        if not email or (not password and not remember):
+                            st.error("❌ Por favor, preencha email e senha")
+                            return
+
+                        session_cache = SessionCache(APP_DATA_DIR, passphrase)
+                        if remember and not session_cache.available:
+                            st.error(f"❌ Não é possível lembrar a sessão: {session_cache.unavailable_reason()}")
+                            return
                     
-                    # Mensagem personalizada baseada no 2FA
-                    spinner_msg = "🔄 Conectando... Aguarde o navegador abrir para você completar o 2FA!" if has_2fa else "🔄 Conectando ao Discord... Isso pode levar alguns segundos"
+                        # Mensagem personalizada baseada no 2FA
+                        spinner_msg = "🔄 Conectando... Aguarde o navegador abrir para você completar o 2FA!" if has_2fa else "🔄 Conectando ao Discord... Isso pode levar alguns segundos"
                     
-                    with st.spinner(spinner_msg):
-                        try:
-                            self.deleter = DiscordMessageDeleter()
+                        with st.spinner(spinner_msg):
                             # Passa o parametro has_2fa
-                            result = self.deleter.login(email, password, has_2fa=has_2fa)
-                            
-                            if result:
-                                self.authenticated = True
-                                self.user_info = self.deleter.get_user_info()
-                                st.session_state.authenticated = True
-                                st.session_state.user_info = self.user_info
-                                st.session_state.deleter = self.deleter
-                                st.success("✅ Login realizado com sucesso!")
-                                time.sleep(1)
-                                st.rerun()
-                            else:
-                                st.error("❌ Falha no login. Verifique suas credenciais e tente novamente.")
-                                # Limpa o deleter em caso de falha
-                                if self.deleter:
-                                    self.deleter.cleanup()
-                                    self.deleter = None
-                                
-                        except Exception as e:
-                            st.error(f"❌ Erro durante o login: {str(e)}")
-                            if self.deleter:
-                                self.deleter.cleanup()
-                                self.deleter = None
-    
+                            def login_fn(deleter):
+                                if remember:
+                                    deleter.enable_session_cache(passphrase)
+                                else:
+                                    # Desmarcado: esquece qualquer sessão salva desta conta
+                                    session_cache.clear(email)
+                                deleter.persistent_profile = keep_profile
+                                return deleter.login(email, password, has_2fa=has_2fa)
+
+                            self._attempt_login(login_fn, "❌ Falha no login. Verifique suas credenciais e tente novamente.")
+
+            with tab_token:
+                # Sem navegador: valida o token com uma chamada a /users/@me e já abre a sessão da API
+                with st.form("token_form"):
+                    if env_token:
+                        st.caption(f"🔑 Token encontrado em {TOKEN_ENV_VAR} (ambiente ou .env). Deixe o campo vazio para usá-lo.")
+                    token = st.text_input("🔑 Token", type="password", placeholder="Token da sua conta do Discord",
+                                          help=f"Também pode ser definido na variável {TOKEN_ENV_VAR} ou no arquivo .env.")
+                    token_button = st.form_submit_button("⚡ Entrar com token", use_container_width=True)
+
+                    if token_button:
+                        token = token.strip() or env_token
+                        if not token:
+                            st.error("❌ Informe o token")
+                            return
+                        with st.spinner("🔄 Validando token..."):
+                            self._attempt_login(
+                                lambda deleter: deleter.login_with_token(token),
+                                "❌ Token inválido ou expirado."
+                            )
+
+    def _attempt_login(self, login_fn, failure_message):
+        """Cria o deleter, executa login_fn(deleter) e guarda a sessão; em falha limpa tudo."""
+        try:
+            self.deleter = DiscordMessageDeleter()
+            result = login_fn(self.deleter)
+
+            if result:
+                self.authenticated = True
+                self.user_info = self.deleter.get_user_info()
+                st.session_state.authenticated = True
+                st.session_state.user_info = self.user_info
+                st.session_state.deleter = self.deleter
+                st.success("✅ Login realizado com sucesso!")
+                time.sleep(1)
+                st.rerun()
+            else:
+                st.error(failure_message)
+                # Limpa o deleter em caso de falha
+                if self.deleter:
+                    self.deleter.cleanup()
+                    self.deleter = None
+
+        except Exception as e:
+            st.error(f"❌ Erro durante o login: {str(e)}")
+            if self.deleter:
+                self.deleter.cleanup()
+                self.deleter = None
+
     def dashboard_section(self):
         """Dashboard principal após login"""
         st.sidebar.title("🎮 Navegação")
@@ -417,8 +479,7 @@ class DiscordMessageDeleterApp:
                 st.session_state.deleter.cleanup()
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
-            # Limpa o cache ao sair
-            st.cache_data.clear()
+            # O snapshot das listas fica no disco (por conta) para o próximo login
             st.rerun()
         
         if page == "📊 Dashboard":
@@ -430,9 +491,41 @@ class DiscordMessageDeleterApp:
         elif page == "⚙️ Configurar Limpeza":
             self.configure_cleanup()
     
+    def resume_section(self):
+        """Oferece retomar uma limpeza interrompida (journal pendente)"""
+        pending = self.deleter.get_pending_journal() if self.deleter else None
+        if not pending:
+            return
+
+        channels_left = pending['unfinished_channels']
+        queued = sum(len(cs['pending']) for cs in pending['channels_state'].values())
+        st.warning(
+            f"⏯️ Existe uma limpeza interrompida: **{len(channels_left)}** canais restantes"
+            f" e **{queued}** mensagens já encontradas aguardando exclusão."
+        )
+        if st.button("▶️ Retomar de onde parou", type="primary", use_container_width=True):
+            state = self.deleter.prepare_resume()
+            if not state:
+                st.info("ℹ️ Nada para retomar.")
+                return
+            options = state['options']
+            min_delay, max_delay = options.get('delay_range') or (2.5, 4.5)
+            invalidate_listings()
+            self.execute_cleanup(
+                state['unfinished_channels'],
+                options.get('cleanup_option', "🗑️ Todas as mensagens"),
+                min_delay,
+                max_delay,
+                show_progress=True,
+                resume_state=state,
+                parallel_channels=options.get('parallel_channels', 1)
+            )
+
     def show_dashboard(self):
         """Mostra dashboard com estatísticas"""
         st.header("📊 Dashboard")
+
+        self.resume_section()
         
         # Carregar dados (agora do cache)
         with st.spinner("🔄 Carregando dados..."):
@@ -440,6 +533,11 @@ class DiscordMessageDeleterApp:
             dms = get_cached_dms(self.deleter)
             servers = get_cached_servers(self.deleter)
             # --- FIM DA MODIFICAÇÃO ---
+
+            listing_cache = get_listing_cache(self.deleter)
+            if listing_cache.is_refreshing():
+                age = listing_cache.age('dms') or 0
+                st.caption(f"🔄 Mostrando a última lista salva (de {format_duration(age)} atrás); atualizando em segundo plano...")
             
             # Estatísticas
             col1, col2, col3, col4 = st.columns(4)
@@ -485,7 +583,7 @@ class DiscordMessageDeleterApp:
         with col1:
             # --- MODIFICAÇÃO (CACHE) ---
             if st.button("🔄 Atualizar Dados", use_container_width=True):
-                st.cache_data.clear() # Limpa todo o cache de dados
+                get_listing_cache(self.deleter).clear() # Descarta o snapshot: busca tudo de novo agora
                 st.rerun() # Re-executa a página para buscar novos dados
             # --- FIM DA MODIFICAÇÃO ---
         
@@ -823,9 +921,9 @@ class DiscordMessageDeleterApp:
         show_progress = True
 
         # --- MODIFICAÇÃO (CACHE) ---
-        # Limpa todo o cache de dados para garantir que a lista seja atualizada
+        # Marca as listas como velhas para que sejam atualizadas
         # após a deleção.
-        st.cache_data.clear() 
+        invalidate_listings()
         # --- FIM DA MODIFICAÇÃO ---
 
         self.execute_cleanup(channels, cleanup_option, min_delay, max_delay, None, None, show_progress)
@@ -839,34 +937,60 @@ class DiscordMessageDeleterApp:
         with col1:
             cleanup_option = st.radio(
                 "Escolha o tipo de limpeza:",
-                ["🗑️ Todas as mensagens", "📅 Mensagens dos últimos dias", "🔢 Últimas X mensagens"]
+                ["🗑️ Todas as mensagens", "📅 Mensagens dos últimos dias", "📆 Mensagens entre datas", "🔢 Últimas X mensagens"]
             )
         
+        days = None
+        message_limit = None
+        date_range = None
         with col2:
             if cleanup_option == "📅 Mensagens dos últimos dias":
                 days = st.number_input("Número de dias:", min_value=1, max_value=365, value=30)
+            elif cleanup_option == "📆 Mensagens entre datas":
+                today = datetime.now().date()
+                start_date = st.date_input("Data inicial:", value=today - timedelta(days=30), max_value=today)
+                end_date = st.date_input("Data final (inclusive):", value=today, max_value=today)
+                if start_date > end_date:
+                    st.warning("⚠️ A data inicial deve ser anterior à data final.")
+                date_range = (start_date, end_date)
             elif cleanup_option == "🔢 Últimas X mensagens":
                 message_limit = st.number_input("Número de mensagens:", min_value=1, max_value=1000, value=100)
-            else:
-                days = None
-                message_limit = None
         
+        if self.deleter and not self.deleter.message_filter_spec.is_default:
+            st.caption("🎯 Filtros personalizados ativos (definidos em Configurações de Limpeza).")
+
         st.subheader("🛡️ Configurações de Segurança")
         col1, col2 = st.columns(2)
         
         with col1:
             # CORREÇÃO: Valores mínimos aumentados para evitar rate limit
-            min_delay = st.slider("Delay mínimo entre exclusões (segundos):", 2.0, 6.0, 2.5, 0.5)
-            max_delay = st.slider("Delay máximo entre exclusões (segundos):", 3.0, 12.0, 4.5, 0.5)
+            min_delay = st.slider("Delay mínimo entre exclusões (segundos):", 2.0, 6.0, 2.5, 0.5,
+                                  help="Ritmo mais rápido que o ajuste automático pode alcançar.")
+            max_delay = st.slider("Delay máximo entre exclusões (segundos):", 3.0, 12.0, 4.5, 0.5,
+                                  help="Ritmo mais lento; é onde a limpeza começa e para onde volta após rate limits.")
         
         with col2:
             show_progress = st.checkbox("📊 Mostrar progresso detalhado", value=True)
-            st.info("💡 **Dica:** Delays maiores (4-6s) são mais seguros para evitar bloqueios.")
+            parallel_channels = st.slider("Canais em paralelo:", 1, 5, MAX_PARALLEL_CHANNELS, 1,
+                                          help="Cada canal tem seu próprio limite de exclusões; vale para os modos por período/todas.")
+            st.info("💡 **Dica:** O intervalo se ajusta sozinho entre o mínimo e o máximo: acelera enquanto não há bloqueios e desacelera a cada rate limit.")
         
+        if st.button("🧪 Simular (dry-run): contar e estimar o tempo", use_container_width=True):
+            self.dry_run_section(
+                channels,
+                cleanup_option,
+                min_delay,
+                max_delay,
+                days,
+                message_limit,
+                date_range=date_range,
+                parallel_channels=parallel_channels
+            )
+
         if st.button(f"🚀 Executar Limpeza nos {channel_type} Selecionados", type="primary", use_container_width=True):
             # --- MODIFICAÇÃO (CACHE) ---
-            # Limpa o cache relevante ANTES de executar a limpeza
-            st.cache_data.clear()
+            # Marca as listas como velhas ANTES de executar a limpeza
+            invalidate_listings()
             # --- FIM DA MODIFICAÇÃO ---
 
             self.execute_cleanup(
@@ -876,7 +1000,9 @@ class DiscordMessageDeleterApp:
                 max_delay,
                 days,
                 message_limit,
-                show_progress
+                show_progress,
+                date_range=date_range,
+                parallel_channels=parallel_channels
             )
     
     def configure_cleanup(self):
@@ -906,19 +1032,231 @@ class DiscordMessageDeleterApp:
         
         advanced_col1, advanced_col2 = st.columns(2)
         
+        saved = st.session_state.get('cleanup_filter', {})
+
         with advanced_col1:
             auto_retry = st.checkbox("Tentar novamente em caso de falha", value=True)
             max_retries = st.number_input("Máximo de tentativas:", 1, 10, 3) if auto_retry else 1
-            preserve_pinned = st.checkbox("Preservar mensagens fixadas", value=True)
+            preserve_pinned = st.checkbox("Preservar mensagens fixadas", value=saved.get('preserve_pinned', True))
         
         with advanced_col2:
-            skip_old_messages = st.checkbox("Pular mensagens muito antigas (>1 ano)", value=False)
+            skip_old_messages = st.checkbox("Pular mensagens muito antigas (>1 ano)", value=saved.get('skip_old_messages', False))
             log_operations = st.checkbox("Manter log das operações", value=True)
+
+        st.subheader("🎯 Filtros de Mensagens")
+        attachment_options = ["Todas", "Só com anexos", "Só sem anexos"]
+        reply_options = ["Todas", "Só respostas", "Sem respostas"]
+
+        filter_col1, filter_col2 = st.columns(2)
+        with filter_col1:
+            attachments_choice = st.selectbox("Anexos:", attachment_options,
+                                              index=attachment_options.index(saved.get('attachments', "Todas")))
+            content_regex = st.text_input("Texto contém (regex, opcional):", value=saved.get('content_regex', ""))
+        with filter_col2:
+            reply_choice = st.selectbox("Respostas:", reply_options,
+                                        index=reply_options.index(saved.get('replies', "Todas")))
+            reply_to_user_id = st.text_input("Só respostas ao usuário (ID, opcional):", value=saved.get('reply_to_user_id', ""))
         
         if st.button("💾 Salvar Configurações", use_container_width=True):
+            try:
+                spec = FilterSpec(
+                    include_pinned=not preserve_pinned,
+                    after_time=datetime.now(timezone.utc) - timedelta(days=365) if skip_old_messages else None,
+                    has_attachments={"Só com anexos": True, "Só sem anexos": False}.get(attachments_choice),
+                    content_regex=content_regex.strip() or None,
+                    is_reply={"Só respostas": True, "Sem respostas": False}.get(reply_choice),
+                    reply_to_user_id=reply_to_user_id.strip() or None,
+                )
+            except re.error as e:
+                st.error(f"❌ Regex inválida: {e}")
+                return
+            if self.deleter:
+                self.deleter.set_message_filter(spec)
+            st.session_state.cleanup_filter = {
+                'preserve_pinned': preserve_pinned,
+                'skip_old_messages': skip_old_messages,
+                'attachments': attachments_choice,
+                'content_regex': content_regex,
+                'replies': reply_choice,
+                'reply_to_user_id': reply_to_user_id,
+            }
             st.success("✅ Configurações salvas com sucesso!")
+
+        if self.deleter and self.deleter.message_index:
+            st.subheader("🗂️ Índice Local")
+            st.caption("Canais limpos por completo são pulados enquanto não recebem mensagens novas. "
+                       "Esqueça o índice para forçar uma varredura completa.")
+            if self.deleter.user_id:
+                st.metric("Mensagens deletadas registradas", f"{self.deleter.message_index.deleted_count(self.deleter.user_id):,}")
+            index_col1, index_col2 = st.columns(2)
+            with index_col1:
+                forget_id = st.text_input("ID do canal/DM:", key="forget_index_channel_id")
+                if st.button("🧹 Esquecer este canal", use_container_width=True, disabled=not forget_id.strip()):
+                    self.deleter.forget_channel_index(forget_id.strip())
+                    st.success("✅ O canal será varrido por completo na próxima limpeza.")
+            with index_col2:
+                if st.button("♻️ Zerar índice da conta", use_container_width=True):
+                    forgotten = self.deleter.reset_message_index()
+                    st.success(f"✅ Índice zerado ({forgotten} canais).")
     
-    def execute_cleanup(self, channels, cleanup_option, min_delay, max_delay, days=None, message_limit=None, show_progress=True):
+    @staticmethod
+    def _cleanup_window(cleanup_option, days=None, date_range=None):
+        """(after_id, before_id) em snowflakes para a opção de limpeza escolhida."""
+        after_id, before_id = None, None
+        if cleanup_option == "📅 Mensagens dos últimos dias":
+            since_date = datetime.now(timezone.utc) - timedelta(days=days)
+            after_id = datetime_to_snowflake(since_date) - 1
+        elif cleanup_option == "📆 Mensagens entre datas":
+            start_date, end_date = date_range
+            # Meia-noite local; a data final é inclusive, então o limite é o dia seguinte
+            start_dt = datetime(start_date.year, start_date.month, start_date.day).astimezone()
+            end_dt = datetime(end_date.year, end_date.month, end_date.day).astimezone() + timedelta(days=1)
+            after_id = datetime_to_snowflake(start_dt) - 1
+            before_id = datetime_to_snowflake(end_dt)
+        return after_id, before_id
+
+    def dry_run_section(self, channels, cleanup_option, min_delay, max_delay, days=None, message_limit=None,
+                        date_range=None, parallel_channels=1):
+        """Conta as mensagens e estima o tempo da limpeza, sem deletar nada."""
+        after_id, before_id = self._cleanup_window(cleanup_option, days, date_range)
+        limit = message_limit if cleanup_option == "🔢 Últimas X mensagens" else None
+        self.deleter._stop_event.clear()
+        with st.spinner("🧪 Contando mensagens (nada será deletado)..."):
+            try:
+                report = self.deleter.dry_run(
+                    channels,
+                    delay_range=(min_delay, max_delay),
+                    after_id=after_id,
+                    before_id=before_id,
+                    max_parallel=parallel_channels,
+                    limit_per_channel=limit
+                )
+            except Exception as e:
+                st.error(f"❌ Erro na simulação: {e}")
+                return
+
+        method_labels = {
+            'index': "Índice local",
+            'search_total': "Busca (total)",
+            'search': "Busca",
+            'pagination': "Paginação",
+            'erro': "Erro",
+        }
+        import pandas as pd  # Só quando há tabela para mostrar (não pesa no primeiro render)
+
+        table = pd.DataFrame([
+            {
+                "Canal": row['name'],
+                "Mensagens": row['count'] if row['exact'] else f"~{row['count']}",
+                "Método": method_labels.get(row['method'], row['method']),
+                "Tempo estimado": format_duration(row['estimated_seconds']),
+            }
+            for row in report['channels']
+        ])
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Mensagens", f"{report['total_messages']:,}")
+        col2.metric("Tempo estimado", format_duration(report['estimated_seconds']))
+        col3.metric("Ping médio", f"{report['avg_ping_ms']:.0f}ms")
+        st.dataframe(table, use_container_width=True, hide_index=True)
+        if any(not row['exact'] for row in report['channels']):
+            st.caption("~ Contagem aproximada pela busca do Discord (pode incluir mensagens fixadas/de sistema).")
+
+    def _run_parallel_stream(self, executor, channels, delay_range, after_id, before_id, parallel_channels,
+                             resume, show_progress, progress_bar, status_container):
+        """Limpeza em vários canais ao mesmo tempo, com uma linha de progresso por canal."""
+        update_queue = queue.Queue()
+        names = {c['id']: c.get('name', c.get('server_name', 'Canal')) for c in channels}
+        rows = {}
+        progress = {c['id']: {'state': 'waiting', 'current': 0, 'total': 0} for c in channels}
+        last_sent = {}
+        UI_UPDATE_THROTTLE = 0.3
+
+        def channel_callback(channel_id, event, current, total):
+            now = time.time()
+            # Eventos de início/fim sempre passam; fetch/delete com throttle por canal
+            if event in ('fetch', 'delete') and now - last_sent.get(channel_id, 0.0) < UI_UPDATE_THROTTLE:
+                return
+            last_sent[channel_id] = now
+            update_queue.put((channel_id, event, current, total))
+
+        status_container.info(f"⚡ Processando {len(channels)} canais, até {parallel_channels} ao mesmo tempo...")
+        if show_progress:
+            with st.container():
+                for c in channels:
+                    rows[c['id']] = st.empty()
+
+        def render(channel_id):
+            if channel_id not in rows:
+                return
+            p = progress[channel_id]
+            name = names[channel_id]
+            pacing = self.deleter.get_stats()['channel_pacing'].get(channel_id)
+            if p['state'] == 'waiting':
+                rows[channel_id].caption(f"⏳ {name} — na fila")
+            elif p['state'] in ('prefetch', 'fetch'):
+                waiting_txt = " (aguardando vez de deletar)" if p['state'] == 'prefetch' else ""
+                rows[channel_id].info(f"🔍 {name}: **{p['total']}** mensagens encontradas...{waiting_txt}")
+            elif p['state'] == 'delete':
+                delay_txt = f" · ⏱️ {pacing['delay']:.1f}s" if pacing else ""
+                rows[channel_id].progress(
+                    min(p['current'] / max(p['total'], 1), 1.0),
+                    text=f"🗑️ {name}: {p['current']}/{p['total']}{delay_txt}"
+                )
+            elif p['state'] == 'done':
+                if p['current']:
+                    rows[channel_id].success(f"✅ {name}: {p['current']} mensagens deletadas")
+                elif channel_id in self.deleter.get_stats()['skipped_channels']:
+                    rows[channel_id].info(f"⏭️ {name} já estava limpo")
+                else:
+                    rows[channel_id].caption(f"ℹ️ {name}: nenhuma mensagem encontrada")
+            elif p['state'] == 'error':
+                rows[channel_id].error(f"❌ Erro ao processar {name}")
+
+        for channel_id in rows:
+            render(channel_id)
+
+        future = executor.submit(
+            self.deleter.stream_delete_channels,
+            channels,
+            delay_range=delay_range,
+            after_id=after_id,
+            before_id=before_id,
+            max_parallel=parallel_channels,
+            channel_progress_callback=channel_callback,
+            resume=resume
+        )
+
+        finished = 0
+        while not future.done():
+            if self.deleter._stop_event.is_set():
+                return sum(p['current'] for p in progress.values() if p['state'] == 'done'), True
+            try:
+                channel_id, event, current, total = update_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            p = progress[channel_id]
+            if event == 'fetch':
+                if p['state'] == 'waiting':
+                    p['state'] = 'prefetch'
+                p['total'] = max(p['total'], current)
+            elif event == 'delete':
+                p['state'] = 'delete'
+                p['current'] = current
+                p['total'] = max(p['total'], total or 0)
+            elif event in ('done', 'error'):
+                p['state'] = event
+                p['current'] = current
+                finished += 1
+                progress_bar.progress(min(finished / len(channels), 1.0))
+            elif event == 'start':
+                if p['state'] != 'delete':
+                    p['state'] = 'fetch'
+            render(channel_id)
+
+        results = future.result()
+        return sum(results.values()), self.deleter._stop_event.is_set()
+
+    def execute_cleanup(self, channels, cleanup_option, min_delay, max_delay, days=None, message_limit=None, show_progress=True, date_range=None, resume_state=None, parallel_channels=1):
         """Executa a limpeza de mensagens com progressos de Fetching e Deletion em tempo real e suporte a cancelamento seguro."""
 
         # CORREÇÃO: Proteção contra deleter None ou inválido
@@ -958,6 +1296,7 @@ class DiscordMessageDeleterApp:
         
         # Flag para rastrear se o usuário cancelou a operação
         was_cancelled_by_user = False
+        run_failed = False  # Erro em algum canal ou na execução: o journal fica disponível para "Retomar"
         
         # CORREÇÃO: Throttle para evitar sobrecarga de UI
         last_ui_update = [0.0]  # Lista mutável para closure
@@ -979,119 +1318,188 @@ class DiscordMessageDeleterApp:
                 last_ui_update[0] = current_time
                 update_queue.put({"type": "delete", "current": current, "total": total, "name": name})
 
+        # Janela da limpeza em snowflakes (calculada uma vez para todos os canais)
+        if resume_state:
+            after_id = resume_state['options'].get('after_id')
+            before_id = resume_state['options'].get('before_id')
+        else:
+            after_id, before_id = self._cleanup_window(cleanup_option, days, date_range)
+
+        # Journal: permite retomar exatamente de onde parou se o processo cair
+        streaming = cleanup_option != "🔢 Últimas X mensagens"
+        if streaming and not resume_state:
+            self.deleter.begin_journal(channels, {
+                'cleanup_option': cleanup_option,
+                'delay_range': [min_delay, max_delay],
+                'after_id': after_id,
+                'before_id': before_id,
+                'parallel_channels': parallel_channels,
+            })
+
         # --- 2. EXECUÇÃO (BLOCO DE SEGURANÇA) ---
         try:
             with ThreadPoolExecutor(max_workers=1) as executor:
                 
-                for i, channel in enumerate(channels):
-                    # Checagem de parada antes de iniciar o canal
-                    if self.deleter._stop_event.is_set():
-                        was_cancelled_by_user = True
-                        break
+                # Vários canais: scheduler com look-ahead (o próximo canal já busca enquanto o atual deleta)
+                if streaming and total_channels > 1:
+                    total_deleted, was_cancelled_by_user = self._run_parallel_stream(
+                        executor, channels, (min_delay, max_delay), after_id, before_id,
+                        parallel_channels, bool(resume_state), show_progress, progress_bar, status_container
+                    )
+                else:
+                    for i, channel in enumerate(channels):
+                        # Checagem de parada antes de iniciar o canal
+                        if self.deleter._stop_event.is_set():
+                            was_cancelled_by_user = True
+                            break
 
-                    channel_name = channel.get('name', channel.get('server_name', 'Canal'))
+                        channel_name = channel.get('name', channel.get('server_name', 'Canal'))
                     
-                    # --- A. INICIAR BUSCA DE MENSAGENS (FETCHING) ---
+                        # --- A. INICIAR BUSCA DE MENSAGENS (FETCHING) ---
                     
-                    fetch_limit = message_limit if cleanup_option == "🔢 Últimas X mensagens" else None
+                        fetch_limit = message_limit if cleanup_option == "🔢 Últimas X mensagens" else None
                     
-                    status_container.info(f"🔍 Preparando {channel_name}... (Iniciando busca {i+1}/{total_channels})")
-                    progress_bar.progress(0.01) # Mostra que algo começou
+                        status_container.info(f"🔍 Preparando {channel_name}... (Iniciando busca {i+1}/{total_channels})")
+                        progress_bar.progress(0.01) # Mostra que algo começou
                     
-                    try:
-                        # 1. Submete a busca para a thread pool (agora com fetch_callback)
-                        if cleanup_option == "🗑️ Todas as mensagens":
-                            fetch_future = executor.submit(
-                                self.deleter.get_all_user_messages, channel, fetch_all=True, progress_callback=fetch_callback
-                            )
-                        elif cleanup_option == "📅 Mensagens dos últimos dias":
-                            since_date = datetime.now() - timedelta(days=days)
-                            fetch_future = executor.submit(
-                                self.deleter.get_messages_since_date, channel, since_date, progress_callback=fetch_callback
-                            )
-                        elif cleanup_option == "🔢 Últimas X mensagens":
-                            fetch_future = executor.submit(
-                                self.deleter.get_user_messages, channel, limit=fetch_limit, progress_callback=fetch_callback
-                            )
-                        
-                        # Loop para monitorar o progresso da busca
-                        while not fetch_future.done():
-                            if self.deleter._stop_event.is_set():
-                                was_cancelled_by_user = True
-                                break
-                            try:
-                                update = update_queue.get(timeout=0.1)
-                                if update["type"] == "fetch" and show_progress:
-                                    status_container.info(
-                                        f"🔍 Buscando em {update['name']}: **{update['current']}** mensagens suas encontradas..."
-                                    )
-                                # Mantém a barra em 1% para mostrar atividade
-                                progress_bar.progress(0.01) 
-                            except queue.Empty:
-                                pass
-                        
-                        # Pega o resultado da busca (timeout aumentado para deleções grandes)
-                        messages = fetch_future.result(timeout=900)  # 15 min timeout para canais grandes
-                        total_messages = len(messages)
-                        
-                        if not messages:
-                            status_container.warning(f"ℹ️ Nenhuma mensagem encontrada em {channel_name}")
-                            time.sleep(1)
-                            continue
+                        try:
+                            # Modos por janela (todas / dias / entre datas) usam o pipeline em streaming:
+                            # a deleção começa após a primeira página, sem esperar a busca completa.
+                            if streaming:
+                                stream_future = executor.submit(
+                                    self.deleter.stream_delete_channel,
+                                    channel,
+                                    delay_range=(min_delay, max_delay),
+                                    after_id=after_id,
+                                    before_id=before_id,
+                                    fetch_progress_callback=fetch_callback,
+                                    progress_callback=delete_callback,
+                                    resume=bool(resume_state)
+                                )
 
-                        # --- B. INICIAR EXCLUSÃO DE MENSAGENS (DELETION) ---
-                        
-                        # Limpa o container antes de mudar de estado para evitar overlap
-                        status_container.empty()
-                        status_container.info(f"🗑️ **{total_messages}** mensagens prontas para exclusão em **{channel_name}**...")
-                        
-                        # 2. Inicia a deleção (agora usando delete_callback)
-                        delete_future = executor.submit(
-                            self.deleter.safe_delete_messages,
-                            messages,
-                            channel,
-                            delay_range=(min_delay, max_delay),
-                            progress_callback=delete_callback
-                        )
+                                found_so_far = 0
+                                while not stream_future.done():
+                                    if self.deleter._stop_event.is_set():
+                                        was_cancelled_by_user = True
+                                        break
+                                    try:
+                                        update = update_queue.get(timeout=0.1)
+                                        if not show_progress:
+                                            continue
+                                        if update["type"] == "fetch":
+                                            found_so_far = max(found_so_far, update["current"])
+                                            status_container.info(
+                                                f"🔍 Buscando em {update['name']}: **{found_so_far}** mensagens suas encontradas..."
+                                            )
+                                        elif update["type"] == "delete":
+                                            current = update["current"]
+                                            found_so_far = max(found_so_far, update["total"])
+                                            delete_delay = self.deleter.get_stats()['delete_delay']
+                                            status_container.markdown(f"""
+                                                **Deletando em:** `{channel_name}`  
+                                                🔄 Progresso: **{current}/{found_so_far}** (busca em andamento)  
+                                                ⏱️ Intervalo atual: **{delete_delay:.1f}s**
+                                            """)
+                                            progress_bar.progress(min(current / max(found_so_far, 1), 1.0))
+                                    except queue.Empty:
+                                        pass
 
-                        # Loop de atualização da UI (focado na deleção)
-                        while not delete_future.done():
-                            if self.deleter._stop_event.is_set():
-                                was_cancelled_by_user = True
-                                break
-                            try:
-                                update = update_queue.get(timeout=0.1)
-                                if update["type"] == "delete" and show_progress:
-                                    current = update["current"]
-                                    
-                                    # Calcula porcentagem do canal atual
-                                    pct_channel = min(current / total_messages, 1.0)
-                                    
-                                    status_container.markdown(f"""
-                                        **Deletando em:** `{channel_name}`  
-                                        🔄 Progresso: **{current}/{total_messages}**
-                                    """)
-                                    progress_bar.progress(pct_channel)
-                                    
-                            except queue.Empty:
-                                pass
-                        
-                        # Pegar o resultado final da thread de deleção (timeout aumentado)
-                        if not self.deleter._stop_event.is_set():
-                            channel_deleted_count = delete_future.result(timeout=7200)  # 2 horas para canais muito grandes
-                            total_deleted += channel_deleted_count
-                            status_container.success(f"✅ {channel_deleted_count} mensagens deletadas de {channel_name}")
-                            time.sleep(1)
+                                if not self.deleter._stop_event.is_set():
+                                    channel_deleted_count = stream_future.result()
+                                    total_deleted += channel_deleted_count
+                                    if channel_deleted_count:
+                                        status_container.success(f"✅ {channel_deleted_count} mensagens deletadas de {channel_name}")
+                                    elif channel['id'] in self.deleter.get_stats()['skipped_channels']:
+                                        status_container.info(f"⏭️ {channel_name} já estava limpo (sem mensagens novas desde a última limpeza)")
+                                    else:
+                                        status_container.warning(f"ℹ️ Nenhuma mensagem encontrada em {channel_name}")
+                                    time.sleep(1)
+
+                            else:
+                                # 1. Submete a busca para a thread pool (agora com fetch_callback)
+                                fetch_future = executor.submit(
+                                    self.deleter.get_user_messages, channel, limit=fetch_limit, progress_callback=fetch_callback
+                                )
+
+                                # Loop para monitorar o progresso da busca
+                                while not fetch_future.done():
+                                    if self.deleter._stop_event.is_set():
+                                        was_cancelled_by_user = True
+                                        break
+                                    try:
+                                        update = update_queue.get(timeout=0.1)
+                                        if update["type"] == "fetch" and show_progress:
+                                            status_container.info(
+                                                f"🔍 Buscando em {update['name']}: **{update['current']}** mensagens suas encontradas..."
+                                            )
+                                        # Mantém a barra em 1% para mostrar atividade
+                                        progress_bar.progress(0.01) 
+                                    except queue.Empty:
+                                        pass
+
+                                # Pega o resultado da busca (timeout aumentado para deleções grandes)
+                                messages = fetch_future.result(timeout=900)  # 15 min timeout para canais grandes
+                                total_messages = len(messages)
+
+                                if not messages:
+                                    status_container.warning(f"ℹ️ Nenhuma mensagem encontrada em {channel_name}")
+                                    time.sleep(1)
+                                    continue
+
+                                # --- B. INICIAR EXCLUSÃO DE MENSAGENS (DELETION) ---
+
+                                # Limpa o container antes de mudar de estado para evitar overlap
+                                status_container.empty()
+                                status_container.info(f"🗑️ **{total_messages}** mensagens prontas para exclusão em **{channel_name}**...")
+
+                                # 2. Inicia a deleção (agora usando delete_callback)
+                                delete_future = executor.submit(
+                                    self.deleter.safe_delete_messages,
+                                    messages,
+                                    channel,
+                                    delay_range=(min_delay, max_delay),
+                                    progress_callback=delete_callback
+                                )
+
+                                # Loop de atualização da UI (focado na deleção)
+                                while not delete_future.done():
+                                    if self.deleter._stop_event.is_set():
+                                        was_cancelled_by_user = True
+                                        break
+                                    try:
+                                        update = update_queue.get(timeout=0.1)
+                                        if update["type"] == "delete" and show_progress:
+                                            current = update["current"]
+
+                                            # Calcula porcentagem do canal atual
+                                            pct_channel = min(current / total_messages, 1.0)
+
+                                            status_container.markdown(f"""
+                                                **Deletando em:** `{channel_name}`  
+                                                🔄 Progresso: **{current}/{total_messages}**
+                                            """)
+                                            progress_bar.progress(pct_channel)
+
+                                    except queue.Empty:
+                                        pass
+
+                                # Pegar o resultado final da thread de deleção (timeout aumentado)
+                                if not self.deleter._stop_event.is_set():
+                                    channel_deleted_count = delete_future.result(timeout=7200)  # 2 horas para canais muito grandes
+                                    total_deleted += channel_deleted_count
+                                    status_container.success(f"✅ {channel_deleted_count} mensagens deletadas de {channel_name}")
+                                    time.sleep(1)
                     
-                    except Exception as e:
-                        if not self.deleter._stop_event.is_set():
-                            status_container.error(f"❌ Erro ao processar {channel_name}: {str(e)}")
-                            time.sleep(2)
+                        except Exception as e:
+                            run_failed = True
+                            if not self.deleter._stop_event.is_set():
+                                status_container.error(f"❌ Erro ao processar {channel_name}: {str(e)}")
+                                time.sleep(2)
 
-                    # Pausa entre canais para segurança
-                    if i < total_channels - 1 and not self.deleter._stop_event.is_set():
-                        status_container.info("⏳ Aguardando cooldown entre canais...")
-                        time.sleep(2)
+                        # Pausa entre canais para segurança
+                        if i < total_channels - 1 and not self.deleter._stop_event.is_set():
+                            status_container.info("⏳ Aguardando cooldown entre canais...")
+                            time.sleep(2)
 
         # Captura interrupções do Streamlit (clique em "Stop" ou F5)
         except (KeyboardInterrupt, SystemExit):
@@ -1100,11 +1508,13 @@ class DiscordMessageDeleterApp:
             # CORREÇÃO: Trata cancelamento async como cancelamento pelo usuário
             was_cancelled_by_user = True
         except TimeoutError:
+            run_failed = True
             status_container.error("⏱️ Timeout: A operação demorou demais para responder.")
         except Exception as e:
             # Log para debug, mas não interrompe limpeza
             error_msg = str(e)
             if "cancelada" not in error_msg.lower() and "cancelled" not in error_msg.lower():
+                run_failed = True
                 print(f"⚠️ Erro durante execução: {e}") 
             else:
                 was_cancelled_by_user = True 
@@ -1114,6 +1524,9 @@ class DiscordMessageDeleterApp:
             # NÃO definir stop_event aqui - só é definido quando o usuário cancela
             # O stop_event é gerenciado pelo próprio fluxo ou pelo usuário
 
+            # Journal só é arquivado se tudo terminou; caso contrário fica disponível para "Retomar"
+            self.deleter.end_journal(completed=not was_cancelled_by_user and not run_failed)
+
             # Limpa a área de progresso e mostra o relatório final
             progress_bar.empty()
             status_container.empty()
@@ -1134,9 +1547,30 @@ class DiscordMessageDeleterApp:
                 col2.metric("Mensagens Deletadas", stats['deleted_count'])
                 col3.metric("Falhas", stats['failed_count'])
                 col4.metric("Rate Limits", stats['throttled_count'])
-                
+
+                metrics = stats['metrics']
+                if metrics['latency']:
+                    import pandas as pd
+
+                    with st.expander("📈 Latência por rota"):
+                        st.caption(
+                            f"{metrics['deletes_per_second']:.2f} deleções/s | "
+                            f"{metrics['rate_limit_wait_seconds']:.1f}s aguardando rate limit"
+                        )
+                        st.dataframe(pd.DataFrame([
+                            {
+                                'Rota': route,
+                                'Requests': hist['count'],
+                                'p50 (ms)': round(hist['p50_ms']),
+                                'p90 (ms)': round(hist['p90_ms']),
+                                'p99 (ms)': round(hist['p99_ms']),
+                                'Status': ", ".join(f"{code}: {n}" for code, n in sorted(metrics['status'].get(route, {}).items())),
+                            }
+                            for route, hist in metrics['latency'].items()
+                        ]), use_container_width=True, hide_index=True)
+
                 if st.button("🔄 Recarregar Dados"):
-                    st.cache_data.clear()
+                    get_listing_cache(self.deleter).clear()
                     st.rerun()
     
     def run(self):
@@ -1181,5 +1615,4 @@ if __name__ == "__main__":
                         pass
                 for key in list(st.session_state.keys()):
                     del st.session_state[key]
-                st.cache_data.clear()
                 st.rerun()
\ No newline at end of file
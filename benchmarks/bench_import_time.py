@@ -0,0 +1,97 @@
+# bench_import_time.py - Tempo de partida a frio: CLI/motor (import message_deleter) e primeiro render do Streamlit
+#
+# Uso:
+#   python benchmarks/bench_import_time.py             # 5 rodadas de cada alvo
+#   python benchmarks/bench_import_time.py --runs 10 --top 15
+#
+# Cada medida é um interpretador novo (sem cache de módulos em memória). O "primeiro render" usa o
+# AppTest do Streamlit (roda app.py até a tela de login, sem navegador).
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cada snippet imprime o tempo medido (s) na última linha
+TARGETS = {
+    'motor (import message_deleter)': (
+        "import time; t = time.perf_counter(); import message_deleter; print(time.perf_counter() - t)"
+    ),
+    'selenium (só para comparação)': (
+        "import time; t = time.perf_counter(); import selenium.webdriver; print(time.perf_counter() - t)"
+    ),
+    'streamlit: primeiro render do app.py': (
+        "import time; from streamlit.testing.v1 import AppTest; t = time.perf_counter(); "
+        "at = AppTest.from_file('app.py', default_timeout=120); at.run(); "
+        "assert not at.exception, at.exception; print(time.perf_counter() - t)"
+    ),
+}
+
+
+def _run(snippet: str) -> float:
+    """Roda o snippet num interpretador novo e retorna o tempo medido por ele (s)."""
+    proc = subprocess.run([sys.executable, '-c', snippet], cwd=ROOT, capture_output=True, text=True, timeout=300)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"código {proc.returncode}")
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def _top_imports(module: str, top: int):
+    """Módulos com maior tempo cumulativo em python -X importtime."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          cwd=ROOT, capture_output=True, text=True, timeout=120)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = [p.strip() for p in line.replace('import time:', '').split('|')]
+        rows.append((int(cumulative_us), int(self_us), name))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de tempo de partida (imports)")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help="maiores imports do motor a listar")
+    parser.add_argument('--json', action='store_true', help="saída em JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for name, snippet in TARGETS.items():
+        try:
+            _run(snippet)  # aquece o cache de bytecode (.pyc) e o disco
+            times = [_run(snippet) for _ in range(args.runs)]
+        except Exception as e:
+            results[name] = {'error': str(e)}
+            continue
+        results[name] = {'median_ms': statistics.median(times) * 1000, 'min_ms': min(times) * 1000,
+                         'max_ms': max(times) * 1000}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'alvo':40} {'mediana ms':>11} {'mín ms':>8} {'máx ms':>8}")
+    for name, r in results.items():
+        if 'error' in r:
+            print(f"{name:40} indisponível ({r['error']})")
+        else:
+            print(f"{name:40} {r['median_ms']:11.0f} {r['min_ms']:8.0f} {r['max_ms']:8.0f}")
+
+    selenium_loaded = subprocess.run(
+        [sys.executable, '-c', "import sys, message_deleter; print(any(m.startswith('selenium') for m in sys.modules))"],
+        cwd=ROOT, capture_output=True, text=True
+    ).stdout.strip()
+    print(f"\nSelenium carregado por 'import message_deleter': {selenium_loaded or '?'}")
+
+    print("\nMaiores imports (cumulativo) de message_deleter:")
+    for cumulative, own, name in _top_imports('message_deleter', args.top):
+        print(f"   {cumulative / 1000:7.1f} ms  (próprio {own / 1000:5.1f} ms)  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+# bench_login.py - Tempo de login pelo navegador: perfil temporário (frio) x modo enxuto x perfil persistente
+#
+# Uso:
+#   python benchmarks/bench_login.py                     # só carrega discord.com/login até o formulário
+#   DISCORD_EMAIL=... DISCORD_PASSWORD=... python benchmarks/bench_login.py --full --runs 3
+#
+# "form": abre o navegador e mede até o campo de email aparecer (mede o download do bundle do Discord,
+# não precisa de conta). "--full": login completo via DiscordMessageDeleter.login (conta sem 2FA).
+# Com psutil instalado, também mede a memória (RSS) somada dos processos do navegador ao fim do carregamento.
+# O perfil persistente usado aqui é descartável (diretório temporário), nunca o perfil real do app.
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+from typing import Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import browser_profile
+import message_deleter
+from message_deleter import DiscordMessageDeleter
+
+BENCH_ACCOUNT = "bench@example.com"
+
+
+def _browser_rss(deleter: DiscordMessageDeleter) -> Optional[int]:
+    """RSS somado do driver e de todos os processos do navegador (None sem psutil)."""
+    try:
+        import psutil
+        root = psutil.Process(deleter.driver.service.process.pid)
+        return sum(p.memory_info().rss for p in [root] + root.children(recursive=True))
+    except Exception:
+        return None
+
+
+def _form_ready(deleter: DiscordMessageDeleter, account):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    t = time.perf_counter()
+    try:
+        if not deleter.setup_selenium(headless=True, account=account):
+            raise RuntimeError("navegador não iniciou")
+        deleter.driver.get('https://discord.com/login')
+        WebDriverWait(deleter.driver, 60).until(
+            lambda d: 'channels' in d.current_url or d.find_elements(By.NAME, "email")
+        )
+        return time.perf_counter() - t, _browser_rss(deleter)
+    finally:
+        if deleter.driver:
+            deleter.driver.quit()
+            deleter.driver = None
+        deleter._release_user_data_dir()
+
+
+def _full_login(deleter: DiscordMessageDeleter, account):
+    t = time.perf_counter()
+    if not deleter.login(account, os.environ.get("DISCORD_PASSWORD", "")):
+        raise RuntimeError("login falhou")
+    return time.perf_counter() - t, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de login: perfil frio x modo enxuto x perfil persistente")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--full', action='store_true', help="login completo (DISCORD_EMAIL / DISCORD_PASSWORD)")
+    parser.add_argument('--json', action='store_true', help="saída em JSON")
+    args = parser.parse_args()
+
+    account = os.environ.get("DISCORD_EMAIL", BENCH_ACCOUNT) if args.full else BENCH_ACCOUNT
+    if args.full and account == BENCH_ACCOUNT:
+        parser.error("--full exige DISCORD_EMAIL e DISCORD_PASSWORD")
+    measure = _full_login if args.full else _form_ready
+
+    profile_root = tempfile.mkdtemp(prefix="bench_profiles_")
+    message_deleter.BROWSER_PROFILE_ROOT = profile_root
+    results = {}
+    try:
+        modes = (
+            ('perfil temporário (frio)', False, False),
+            ('temporário + modo enxuto', False, True),
+            ('persistente + modo enxuto', True, True),
+        )
+        for name, persistent, lean in modes:
+            times, rss = [], []
+            for _ in range(args.runs):
+                deleter = DiscordMessageDeleter()
+                deleter.persistent_profile = persistent
+                deleter.lean_browser = lean
+                try:
+                    seconds, peak = measure(deleter, account)
+                    times.append(seconds)
+                    if peak:
+                        rss.append(peak)
+                except Exception as e:
+                    results[name] = {'error': str(e)}
+                    break
+                finally:
+                    deleter.cleanup()
+            if name in results:
+                continue
+            # A primeira rodada persistente ainda é fria (cria o perfil); as seguintes mostram o ganho
+            warm = times[1:] if persistent and len(times) > 1 else times
+            results[name] = {'median_s': statistics.median(warm), 'first_s': times[0], 'runs': len(times),
+                             'rss_mb': max(rss) / (1024 * 1024) if rss else None}
+        profile_sizes = [browser_profile._dir_size(os.path.join(profile_root, d)) for d in os.listdir(profile_root)]
+    finally:
+        shutil.rmtree(profile_root, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"\n{'modo':28} {'mediana s':>10} {'1ª rodada s':>12} {'RSS MB':>8}")
+    for name, r in results.items():
+        if 'error' in r:
+            print(f"{name:28} indisponível ({r['error']})")
+        else:
+            rss = f"{r['rss_mb']:8.0f}" if r['rss_mb'] else f"{'-':>8}"
+            print(f"{name:28} {r['median_s']:10.2f} {r['first_s']:12.2f} {rss}")
+    if profile_sizes:
+        print(f"\nTamanho do perfil persistente: {max(profile_sizes) / (1024 * 1024):.0f} MB "
+              f"(teto {browser_profile.PROFILE_MAX_MB} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+# bench_page_decode.py - Compara o parse completo (resp.json()) com a decodificação projetada
+#
+# Uso:
+#   python benchmarks/bench_page_decode.py                  # página sintética com embeds pesados
+#   python benchmarks/bench_page_decode.py --page pagina.json [--page outra.json ...]
+#
+# Para gravar uma página real: salve o corpo de GET /channels/{id}/messages?limit=100 em um arquivo.
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import page_decoder  # noqa: E402
+
+USER_ID = "111111111111111111"
+
+
+def synthetic_page(n: int = 100, seed: int = 1) -> bytes:
+    """Página no formato da API com embeds, anexos, reações e referências (o pior caso comum)."""
+    rnd = random.Random(seed)
+    base_id = 1200000000000000000
+    msgs = []
+    for i in range(n):
+        author_id = USER_ID if rnd.random() < 0.4 else str(rnd.randrange(10 ** 17, 10 ** 18))
+        msgs.append({
+            'id': str(base_id - i * 4194304),
+            'type': rnd.choice([0, 0, 0, 19]),
+            'content': 'lorem ipsum ' * rnd.randrange(1, 40),
+            'channel_id': '900000000000000000',
+            'author': {
+                'id': author_id, 'username': 'user%d' % i, 'global_name': 'User %d' % i,
+                'avatar': 'a' * 32, 'discriminator': '0', 'public_flags': 0, 'flags': 0,
+                'banner': None, 'accent_color': None, 'avatar_decoration_data': None, 'clan': None,
+            },
+            'attachments': [
+                {'id': str(base_id + j), 'filename': 'image%d.png' % j, 'size': 123456,
+                 'url': 'https://cdn.discordapp.com/attachments/x/y/image.png?ex=abc&is=def&hm=' + 'f' * 64,
+                 'proxy_url': 'https://media.discordapp.net/attachments/x/y/image.png?ex=abc&is=def&hm=' + 'f' * 64,
+                 'width': 1920, 'height': 1080, 'content_type': 'image/png'}
+                for j in range(rnd.randrange(0, 3))
+            ],
+            'embeds': [
+                {'type': 'rich', 'title': 'Título do embed %d' % j, 'description': 'descrição ' * 60,
+                 'url': 'https://example.com/%d' % j, 'color': 5814783,
+                 'fields': [{'name': 'campo %d' % k, 'value': 'valor ' * 20, 'inline': True} for k in range(8)],
+                 'thumbnail': {'url': 'https://example.com/t.png', 'proxy_url': 'https://example.com/p.png', 'width': 80, 'height': 80},
+                 'footer': {'text': 'rodapé', 'icon_url': 'https://example.com/i.png'}}
+                for j in range(rnd.randrange(0, 4))
+            ],
+            'mentions': [], 'mention_roles': [], 'mention_everyone': False,
+            'reactions': [{'emoji': {'id': None, 'name': '👍'}, 'count': rnd.randrange(1, 50), 'me': False,
+                           'count_details': {'burst': 0, 'normal': 1}, 'burst_colors': []}],
+            'pinned': rnd.random() < 0.02,
+            'tts': False,
+            'timestamp': '2024-05-01T12:00:00.000000+00:00',
+            'edited_timestamp': None,
+            'flags': 0,
+            'components': [],
+        })
+    return json.dumps(msgs).encode()
+
+
+def current_path(content: bytes):
+    """O que o código fazia antes: resp.json() (objeto completo) e filtro."""
+    data = json.loads(content)
+    return [m['id'] for m in data
+            if m.get('author', {}).get('id') == USER_ID and not m.get('pinned', False) and m.get('type') in [0, 19]]
+
+
+def projected_path(decode):
+    def run(content: bytes):
+        data = decode(content)
+        return [m['id'] for m in data
+                if m['author']['id'] == USER_ID and not m['pinned'] and m['type'] in [0, 19]]
+    return run
+
+
+def bench(fn, pages, repeat):
+    fn(pages[0])  # aquecimento
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            fn(page)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    for page in pages:
+        result = fn(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / (repeat * len(pages)), peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de decodificação de páginas de mensagens")
+    parser.add_argument('--page', action='append', help="arquivo JSON com uma página gravada da API")
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    if args.page:
+        pages = []
+        for path in args.page:
+            with open(path, 'rb') as fh:
+                pages.append(fh.read())
+    else:
+        pages = [synthetic_page(seed=s) for s in range(5)]
+
+    avg_size = sum(len(p) for p in pages) / len(pages)
+    print(f"Páginas: {len(pages)} (média {avg_size / 1024:.0f} KB) | backend ativo: {page_decoder.page_decoder_backend()}")
+
+    candidates = [("json.loads + filtro (atual)", current_path),
+                  ("projetado - json", projected_path(page_decoder.build_decoder('json')))]
+    for backend in ('orjson', 'msgspec'):
+        decode = page_decoder.build_decoder(backend)
+        if decode is not None:
+            candidates.append((f"projetado - {backend}", projected_path(decode)))
+
+    baseline = None
+    expected = None
+    print(f"{'caminho':32} {'ms/página':>10} {'pico KB':>9} {'speedup':>8}")
+    for name, fn in candidates:
+        per_page, peak, result = bench(fn, pages, args.repeat)
+        if expected is None:
+            expected = result
+        assert result == expected, f"{name} retornou IDs diferentes"
+        baseline = baseline or per_page
+        print(f"{name:32} {per_page * 1000:10.3f} {peak / 1024:9.0f} {baseline / per_page:7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+# bench_throughput.py - Mede cada estratégia de busca/deleção contra o mock local da API (sem conta real)
+#
+# Uso:
+#   python benchmarks/bench_throughput.py                         # cenário padrão, todas as estratégias rápidas
+#   python benchmarks/bench_throughput.py --messages 2000 --latency-ms 40 --strategy search-stream-parallel
+#   python benchmarks/bench_throughput.py --error-rate 0.02 --timeout-rate 0.005 --hang-seconds 2
+#   python benchmarks/bench_throughput.py --include-super-lote    # modo massa (pausas fixas de segundos)
+#
+# Cada estratégia roda num subprocesso novo (pico de RSS isolado, índice local e journal em diretório
+# temporário) contra o mesmo servidor, que é reiniciado entre as rodadas.
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_discord import MockConfig, MockDiscordServer, USER_ID  # noqa: E402
+
+STRATEGIES = {
+    'pagination-batch': "paginação completa e depois deleção, canal a canal",
+    'search-batch': "busca por author_id e depois deleção, canal a canal",
+    'search-stream': "busca e deleção em paralelo (fila), canal a canal",
+    'search-stream-parallel': "stream em vários canais ao mesmo tempo, com prefetch",
+    'pagination-stream-parallel': "stream com paginação em vários canais ao mesmo tempo",
+    'super-lote': "modo massa (async_process_channels, só DMs)",
+}
+DEFAULT_STRATEGIES = [s for s in STRATEGIES if s != 'super-lote']
+
+
+def _peak_rss_kb():
+    """Pico de memória residente do processo em KB (None se não houver como medir)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == 'darwin' else peak  # macOS reporta em bytes
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) // 1024
+    except ImportError:
+        return None
+
+
+def run_strategy(strategy: str, delay_range, max_parallel: int, out_path: str):
+    """Executado no subprocesso: dirige o DiscordMessageDeleter contra DISCORD_API_BASE."""
+    from message_deleter import DiscordMessageDeleter, API_BASE
+
+    deleter = DiscordMessageDeleter(discovery_mode='pagination' if strategy.startswith('pagination') else 'search')
+    deleter.token = 'mock-token'
+    deleter.user_id = USER_ID
+    deleter.setup_api_session()
+
+    async def _channels():
+        dms = await deleter.async_api_request('GET', f'{API_BASE}/users/@me/channels') or []
+        channels = [{'id': dm['id'], 'name': f"dm-{dm['id'][-3:]}", 'last_message_id': dm.get('last_message_id')}
+                    for dm in dms]
+        for guild in await deleter.async_api_request('GET', f'{API_BASE}/users/@me/guilds') or []:
+            for ch in await deleter.async_api_request('GET', f"{API_BASE}/guilds/{guild['id']}/channels") or []:
+                channels.append({'id': ch['id'], 'name': ch['name'], 'guild_id': guild['id'],
+                                 'last_message_id': ch.get('last_message_id')})
+        return channels
+
+    async def _batch(channels):
+        for channel in channels:
+            msgs = await deleter.async_get_user_messages_in_range(channel)
+            await deleter.async_safe_delete_messages(msgs, channel, delay_range=delay_range)
+
+    async def _stream(channels):
+        for channel in channels:
+            await deleter.async_stream_delete_channel(channel, delay_range=delay_range)
+
+    channels = deleter.run_async(_channels(), timeout=None)
+    deleter.reset_stats()
+    start = time.perf_counter()
+    if strategy in ('pagination-batch', 'search-batch'):
+        deleter.run_async(_batch(channels), timeout=None)
+    elif strategy == 'search-stream':
+        deleter.run_async(_stream(channels), timeout=None)
+    elif strategy in ('search-stream-parallel', 'pagination-stream-parallel'):
+        deleter.stream_delete_channels(channels, delay_range=delay_range, max_parallel=max_parallel)
+    elif strategy == 'super-lote':
+        deleter.run_async(deleter.async_process_channels(), timeout=None)
+    elapsed = time.perf_counter() - start
+
+    stats = deleter.get_stats()
+    result = {
+        'deleted': stats['deleted_count'],
+        'failed': stats['failed_count'],
+        'elapsed': elapsed,
+        'rate_limit_wait': stats['rate_limit_wait_time'],
+        'peak_rss_kb': _peak_rss_kb(),
+    }
+    deleter.cleanup()
+    with open(out_path, 'w', encoding='utf-8') as fh:
+        json.dump(result, fh)
+
+
+def _mock_call(server: MockDiscordServer, path: str, method: str = 'GET'):
+    host, port = server.server_address[:2]
+    req = urllib.request.Request(f'http://{host}:{port}{path}', method=method)
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        body = resp.read()
+    return json.loads(body) if body else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de throughput contra o mock local da API do Discord")
+    parser.add_argument('--strategy', action='append', choices=list(STRATEGIES),
+                        help="estratégia a medir (repetível; padrão: todas exceto super-lote)")
+    parser.add_argument('--include-super-lote', action='store_true')
+    parser.add_argument('--min-delay', type=float, default=0.02, help="delay mínimo entre deleções (slider)")
+    parser.add_argument('--max-delay', type=float, default=0.05, help="delay máximo entre deleções (slider)")
+    parser.add_argument('--parallel', type=int, default=3, help="canais em paralelo nas estratégias *-parallel")
+    parser.add_argument('--timeout', type=float, default=600.0, help="tempo máximo por estratégia (s)")
+    parser.add_argument('--_child', nargs=2, metavar=('STRATEGY', 'OUT'), help=argparse.SUPPRESS)
+    MockConfig.add_arguments(parser)
+    args = parser.parse_args()
+
+    if args._child:
+        run_strategy(args._child[0], (args.min_delay, args.max_delay), args.parallel, args._child[1])
+        return
+
+    strategies = args.strategy or list(DEFAULT_STRATEGIES)
+    if args.include_super_lote and 'super-lote' not in strategies:
+        strategies.append('super-lote')
+
+    server = MockDiscordServer(MockConfig.from_args(args))
+    server.start_background()
+    channels = args.dms + args.guilds * args.channels_per_guild
+    print(f"🧪 Mock em {server.api_base}: {channels} canais x {args.messages} mensagens "
+          f"(~{args.own_ratio:.0%} nossas) | delay {args.min_delay}-{args.max_delay}s")
+
+    child_args = list(sys.argv[1:])
+    rows = []
+    try:
+        for strategy in strategies:
+            _mock_call(server, '/_mock/reset', 'POST')
+            with tempfile.TemporaryDirectory(prefix='dmd-bench-') as data_dir:
+                out_path = os.path.join(data_dir, 'result.json')
+                env = dict(os.environ, DISCORD_API_BASE=server.api_base, DMD_DATA_DIR=data_dir)
+                print(f"▶️ {strategy}: {STRATEGIES[strategy]}...")
+                try:
+                    proc = subprocess.run(
+                        [sys.executable, os.path.abspath(__file__), *child_args, '--_child', strategy, out_path],
+                        env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                        timeout=args.timeout, text=True
+                    )
+                except subprocess.TimeoutExpired:
+                    print(f"   ⏱️ Excedeu {args.timeout:.0f}s")
+                    continue
+                if proc.returncode != 0 or not os.path.exists(out_path):
+                    print(f"   ❌ Falhou (código {proc.returncode})\n{proc.stderr[-2000:]}")
+                    continue
+                with open(out_path, encoding='utf-8') as fh:
+                    result = json.load(fh)
+            mock = _mock_call(server, '/_mock/stats')
+            result.update(strategy=strategy, requests=mock['requests'], status_429=mock['status'].get('429', 0),
+                          injected=mock['injected_errors'] + mock['injected_timeouts'])
+            rows.append(result)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print()
+    print(f"{'estratégia':28} {'deletadas':>9} {'msgs/s':>8} {'req/del':>8} {'429':>5} {'falhas':>6} {'pico RSS MB':>11}")
+    for r in rows:
+        rate = r['deleted'] / r['elapsed'] if r['elapsed'] else 0.0
+        per_delete = r['requests'] / r['deleted'] if r['deleted'] else float('inf')
+        rss = f"{r['peak_rss_kb'] / 1024:.1f}" if r['peak_rss_kb'] is not None else '-'
+        print(f"{r['strategy']:28} {r['deleted']:9d} {rate:8.1f} {per_delete:8.2f} {r['status_429']:5d} "
+              f"{r['failed']:6d} {rss:>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,456 @@
+# mock_discord.py - Servidor local que imita a API do Discord para medir o deleter sem uma conta real
+#
+# Uso isolado:
+#   python benchmarks/mock_discord.py --port 8765 --dms 3 --messages 500
+#   DISCORD_API_BASE=http://127.0.0.1:8765/api/v9 python benchmarks/bench_throughput.py --api-base ...
+#
+# Rotas: /users/@me, /users/@me/channels, /users/@me/guilds, /guilds/{id}/channels,
+#        /channels/{id}, /channels/{id}/messages (GET paginado), /channels/{id}/messages/{id} (DELETE),
+#        /channels/{id}/messages/search, /guilds/{id}/messages/search
+# Controle: GET /_mock/stats (contadores), POST /_mock/reset (regera os dados e zera contadores)
+import json
+import time
+import random
+import argparse
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+DISCORD_EPOCH_MS = 1420070400000
+API_PREFIX = '/api/v9'
+USER_ID = '100000000000000001'
+
+
+def _snowflake(ms: int, seq: int) -> int:
+    return ((ms - DISCORD_EPOCH_MS) << 22) | (seq & 0x3FFFFF)
+
+
+class MockConfig:
+    """Parâmetros do cenário (dados, limites e falhas injetadas)."""
+
+    def __init__(self, dms=3, guilds=1, channels_per_guild=2, messages=500, own_ratio=0.4, pinned_ratio=0.01,
+                 embed_kb=0, latency_ms=0.0, jitter_ms=0.0, timeout_rate=0.0, hang_seconds=5.0, error_rate=0.0,
+                 delete_limit=5, delete_window=1.0, messages_limit=50, messages_window=1.0,
+                 search_limit=10, search_window=5.0, global_limit=50, seed=1, token=None):
+        self.dms = dms
+        self.guilds = guilds
+        self.channels_per_guild = channels_per_guild
+        self.messages = messages
+        self.own_ratio = own_ratio
+        self.pinned_ratio = pinned_ratio
+        self.embed_kb = embed_kb
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.error_rate = error_rate
+        # Limites por bucket: (requests, janela em segundos), separados por canal/servidor (major)
+        self.buckets = {
+            'delete': (delete_limit, delete_window),
+            'messages': (messages_limit, messages_window),
+            'search': (search_limit, search_window),
+            'default': (50, 1.0),
+        }
+        self.global_limit = global_limit  # requests por segundo (0 desativa)
+        self.seed = seed
+        self.token = token  # None = aceita qualquer Authorization
+
+    @classmethod
+    def add_arguments(cls, parser: argparse.ArgumentParser):
+        d = cls()
+        parser.add_argument('--dms', type=int, default=d.dms)
+        parser.add_argument('--guilds', type=int, default=d.guilds)
+        parser.add_argument('--channels-per-guild', type=int, default=d.channels_per_guild)
+        parser.add_argument('--messages', type=int, default=d.messages, help="mensagens por canal")
+        parser.add_argument('--own-ratio', type=float, default=d.own_ratio, help="fração das mensagens que são nossas")
+        parser.add_argument('--embed-kb', type=int, default=d.embed_kb, help="KB de embed por mensagem (páginas pesadas)")
+        parser.add_argument('--latency-ms', type=float, default=d.latency_ms)
+        parser.add_argument('--jitter-ms', type=float, default=d.jitter_ms)
+        parser.add_argument('--timeout-rate', type=float, default=d.timeout_rate, help="fração de requests que travam")
+        parser.add_argument('--hang-seconds', type=float, default=d.hang_seconds)
+        parser.add_argument('--error-rate', type=float, default=d.error_rate, help="fração de respostas 5xx")
+        parser.add_argument('--delete-limit', type=int, default=d.buckets['delete'][0])
+        parser.add_argument('--delete-window', type=float, default=d.buckets['delete'][1])
+        parser.add_argument('--messages-limit', type=int, default=d.buckets['messages'][0])
+        parser.add_argument('--messages-window', type=float, default=d.buckets['messages'][1])
+        parser.add_argument('--search-limit', type=int, default=d.buckets['search'][0])
+        parser.add_argument('--search-window', type=float, default=d.buckets['search'][1])
+        parser.add_argument('--global-limit', type=int, default=d.global_limit)
+        parser.add_argument('--seed', type=int, default=d.seed)
+        parser.add_argument('--token', default=None, help="exige este token (testa o login por token)")
+
+    @classmethod
+    def from_args(cls, args) -> 'MockConfig':
+        return cls(
+            dms=args.dms, guilds=args.guilds, channels_per_guild=args.channels_per_guild, messages=args.messages,
+            own_ratio=args.own_ratio, embed_kb=args.embed_kb, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+            timeout_rate=args.timeout_rate, hang_seconds=args.hang_seconds, error_rate=args.error_rate,
+            delete_limit=args.delete_limit, delete_window=args.delete_window,
+            messages_limit=args.messages_limit, messages_window=args.messages_window,
+            search_limit=args.search_limit, search_window=args.search_window,
+            global_limit=args.global_limit, seed=args.seed, token=args.token,
+        )
+
+
+class MockChannel:
+    __slots__ = ('id', 'guild_id', 'name', 'ids', 'meta', 'deleted')
+
+    def __init__(self, channel_id: str, guild_id=None, name=''):
+        self.id = channel_id
+        self.guild_id = guild_id
+        self.name = name
+        self.ids = []        # snowflakes em ordem crescente
+        self.meta = {}       # id -> (author_id, type, pinned)
+        self.deleted = set()
+
+    def last_message_id(self):
+        for mid in reversed(self.ids):
+            if mid not in self.deleted:
+                return mid
+        return None
+
+
+class MockState:
+    """Dados gerados + buckets de rate limit + contadores. Protegido por um lock (servidor com threads)."""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        cfg = self.config
+        rnd = random.Random(cfg.seed)
+        self.channels = {}
+        self.dm_ids = []
+        self.guilds = {}
+        seq = 0
+        now_ms = int(time.time() * 1000)
+
+        def fill(channel):
+            nonlocal seq
+            # Uma mensagem por minuto, da mais antiga para a mais nova
+            for i in range(cfg.messages):
+                seq += 1
+                mid = _snowflake(now_ms - (cfg.messages - i) * 60000, seq)
+                own = rnd.random() < cfg.own_ratio
+                author = USER_ID if own else str(200000000000000000 + rnd.randrange(1, 5))
+                mtype = 19 if rnd.random() < 0.1 else 0
+                pinned = rnd.random() < cfg.pinned_ratio
+                channel.ids.append(mid)
+                channel.meta[mid] = (author, mtype, pinned)
+
+        for d in range(cfg.dms):
+            ch = MockChannel(str(300000000000000000 + d), name=f'dm{d}')
+            fill(ch)
+            self.channels[ch.id] = ch
+            self.dm_ids.append(ch.id)
+        for g in range(cfg.guilds):
+            guild_id = str(400000000000000000 + g)
+            self.guilds[guild_id] = []
+            for c in range(cfg.channels_per_guild):
+                ch = MockChannel(str(500000000000000000 + g * 1000 + c), guild_id=guild_id, name=f'canal-{g}-{c}')
+                fill(ch)
+                self.channels[ch.id] = ch
+                self.guilds[guild_id].append(ch.id)
+
+        self.buckets = {}
+        self.global_window = (0.0, 0)
+        self.stats = {'requests': 0, 'by_route': {}, 'status': {}, 'rate_limited': 0, 'global_rate_limited': 0,
+                      'deleted': 0, 'injected_errors': 0, 'injected_timeouts': 0}
+        self.embed = ('x' * 1024) * cfg.embed_kb
+
+    # ----------------------------
+    # Rate limits
+    # ----------------------------
+    def check_rate_limit(self, bucket: str, major: str):
+        """Retorna (headers, retry_after, is_global). retry_after=None se liberado."""
+        now = time.monotonic()
+        cfg = self.config
+        if cfg.global_limit:
+            start, count = self.global_window
+            if now - start >= 1.0:
+                start, count = now, 0
+            if count >= cfg.global_limit:
+                self.stats['global_rate_limited'] += 1
+                return {'X-RateLimit-Global': 'true', 'X-RateLimit-Scope': 'global'}, 1.0 - (now - start), True
+            self.global_window = (start, count + 1)
+
+        limit, window = cfg.buckets.get(bucket, cfg.buckets['default'])
+        key = (bucket, major)
+        remaining, reset_at = self.buckets.get(key, (limit, now + window))
+        if now >= reset_at:
+            remaining, reset_at = limit, now + window
+        headers = {
+            'X-RateLimit-Bucket': f'mock-{bucket}',
+            'X-RateLimit-Limit': str(limit),
+            'X-RateLimit-Reset-After': f'{max(reset_at - now, 0.0):.3f}',
+        }
+        if remaining <= 0:
+            self.buckets[key] = (remaining, reset_at)
+            headers['X-RateLimit-Remaining'] = '0'
+            headers['X-RateLimit-Scope'] = 'user'
+            self.stats['rate_limited'] += 1
+            return headers, reset_at - now, False
+        remaining -= 1
+        self.buckets[key] = (remaining, reset_at)
+        headers['X-RateLimit-Remaining'] = str(remaining)
+        return headers, None, False
+
+    # ----------------------------
+    # Dados
+    # ----------------------------
+    def message_json(self, channel: MockChannel, mid: int):
+        author, mtype, pinned = channel.meta[mid]
+        msg = {
+            'id': str(mid),
+            'channel_id': channel.id,
+            'type': mtype,
+            'content': 'mensagem de teste',
+            'author': {'id': author, 'username': 'me' if author == USER_ID else 'outro', 'global_name': None},
+            'attachments': [],
+            'embeds': [{'type': 'rich', 'description': self.embed}] if self.embed else [],
+            'pinned': pinned,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime(((mid >> 22) + DISCORD_EPOCH_MS) / 1000)),
+        }
+        if channel.guild_id:
+            msg['guild_id'] = channel.guild_id
+        return msg
+
+    def page(self, channel: MockChannel, before=None, after=None, limit=50):
+        """Mensagens em ordem decrescente, como GET /channels/{id}/messages."""
+        limit = max(1, min(int(limit), 100))
+        out = []
+        if after is not None and before is None:
+            # after: as `limit` mensagens logo após o id (retornadas da mais nova para a mais antiga)
+            i = bisect_left(channel.ids, int(after) + 1)
+            while i < len(channel.ids) and len(out) < limit:
+                mid = channel.ids[i]
+                if mid not in channel.deleted:
+                    out.append(mid)
+                i += 1
+            out.reverse()
+        else:
+            i = bisect_left(channel.ids, int(before)) - 1 if before is not None else len(channel.ids) - 1
+            while i >= 0 and len(out) < limit:
+                mid = channel.ids[i]
+                if mid not in channel.deleted and (after is None or mid > int(after)):
+                    out.append(mid)
+                i -= 1
+        return [self.message_json(channel, mid) for mid in out]
+
+    def search(self, channels, author_id=None, min_id=None, max_id=None, offset=0, limit=25):
+        hits = []
+        for channel in channels:
+            for mid in channel.ids:
+                if mid in channel.deleted:
+                    continue
+                if min_id is not None and mid <= int(min_id):
+                    continue
+                if max_id is not None and mid >= int(max_id):
+                    continue
+                if author_id is not None and channel.meta[mid][0] != author_id:
+                    continue
+                hits.append((mid, channel))
+        hits.sort(key=lambda h: -h[0])
+        offset, limit = int(offset), max(1, min(int(limit), 25))
+        window = hits[offset:offset + limit]
+        return {
+            'total_results': len(hits),
+            'messages': [[dict(self.message_json(ch, mid), hit=True)] for mid, ch in window],
+        }
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    server_version = 'MockDiscord/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, fmt, *args):
+        pass  # Silencioso: o benchmark imprime o resumo
+
+    @property
+    def state(self) -> MockState:
+        return self.server.state
+
+    def _send(self, status: int, body=None, headers=None):
+        payload = b'' if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        if body is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def _handle(self, method: str):
+        parts = urlsplit(self.path)
+        path = parts.path
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        state = self.state
+
+        if path == '/_mock/stats':
+            with state.lock:
+                return self._send(200, state.stats)
+        if path == '/_mock/reset' and method == 'POST':
+            with state.lock:
+                state.reset()
+            return self._send(204)
+
+        if not path.startswith(API_PREFIX):
+            return self._send(404, {'message': '404: Not Found', 'code': 0})
+        auth = self.headers.get('Authorization')
+        if not auth or (state.config.token is not None and auth != state.config.token):
+            return self._send(401, {'message': '401: Unauthorized', 'code': 0})
+
+        segs = [s for s in path[len(API_PREFIX):].split('/') if s]
+        route, bucket, major = self._route(method, segs)
+        cfg = state.config
+
+        # Latência e falhas injetadas (fora do lock: simulam a rede)
+        if cfg.latency_ms or cfg.jitter_ms:
+            time.sleep((cfg.latency_ms + random.uniform(0, cfg.jitter_ms)) / 1000.0)
+        if cfg.timeout_rate and random.random() < cfg.timeout_rate:
+            with state.lock:
+                state.stats['injected_timeouts'] += 1
+            time.sleep(cfg.hang_seconds)
+
+        with state.lock:
+            state.stats['requests'] += 1
+            state.stats['by_route'][route] = state.stats['by_route'].get(route, 0) + 1
+            if cfg.error_rate and random.random() < cfg.error_rate:
+                state.stats['injected_errors'] += 1
+                return self._reply(502, {'message': '502: Bad Gateway', 'code': 0})
+
+            headers, retry_after, is_global = state.check_rate_limit(bucket, major)
+            if retry_after is not None:
+                headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+                return self._reply(429, {'message': 'You are being rate limited.', 'retry_after': round(retry_after, 3),
+                                         'global': is_global}, headers)
+            status, body = self._dispatch(method, segs, query)
+            return self._reply(status, body, headers)
+
+    def _reply(self, status, body=None, headers=None):
+        stats = self.state.stats
+        stats['status'][str(status)] = stats['status'].get(str(status), 0) + 1
+        return self._send(status, body, headers)
+
+    @staticmethod
+    def _route(method: str, segs):
+        """(rota para estatísticas, bucket, parâmetro major)."""
+        major = segs[1] if len(segs) > 1 and segs[0] in ('channels', 'guilds') else ''
+        if method == 'DELETE':
+            return 'DELETE message', 'delete', major
+        if segs[-1:] == ['search']:
+            return 'GET search', 'search', major
+        if len(segs) == 3 and segs[0] == 'channels' and segs[2] == 'messages':
+            return 'GET messages', 'messages', major
+        return f"{method} /{'/'.join(s if not s.isdigit() else ':id' for s in segs)}", 'default', major
+
+    def _dispatch(self, method: str, segs, query):
+        state = self.state
+        if method == 'GET' and segs == ['users', '@me']:
+            return 200, {'id': USER_ID, 'username': 'benchmark', 'global_name': 'Benchmark', 'email': 'bench@example.com'}
+        if method == 'GET' and segs == ['users', '@me', 'channels']:
+            out = []
+            for cid in state.dm_ids:
+                ch = state.channels[cid]
+                last = ch.last_message_id()
+                out.append({'id': cid, 'type': 1, 'last_message_id': str(last) if last else None,
+                            'recipients': [{'id': str(600000000000000000 + len(out)), 'username': ch.name, 'global_name': ch.name}]})
+            return 200, out
+        if method == 'GET' and segs == ['users', '@me', 'guilds']:
+            return 200, [{'id': gid, 'name': f'Servidor {i}', 'icon': None} for i, gid in enumerate(state.guilds)]
+        if len(segs) >= 2 and segs[0] == 'guilds':
+            gid = segs[1]
+            if gid not in state.guilds:
+                return 404, {'message': 'Unknown Guild', 'code': 10004}
+            if method == 'GET' and segs[2:] == ['channels']:
+                out = []
+                for cid in state.guilds[gid]:
+                    ch = state.channels[cid]
+                    last = ch.last_message_id()
+                    out.append({'id': cid, 'type': 0, 'guild_id': gid, 'name': ch.name,
+                                'last_message_id': str(last) if last else None})
+                return 200, out
+            if method == 'GET' and segs[2:] == ['messages', 'search']:
+                chans = [state.channels[c] for c in state.guilds[gid]]
+                if 'channel_id' in query:
+                    chans = [c for c in chans if c.id == query['channel_id']]
+                return 200, state.search(chans, query.get('author_id'), query.get('min_id'), query.get('max_id'),
+                                         query.get('offset', 0), query.get('limit', 25))
+        if len(segs) >= 2 and segs[0] == 'channels':
+            ch = state.channels.get(segs[1])
+            if ch is None:
+                return 404, {'message': 'Unknown Channel', 'code': 10003}
+            rest = segs[2:]
+            if method == 'GET' and not rest:
+                last = ch.last_message_id()
+                return 200, {'id': ch.id, 'type': 0 if ch.guild_id else 1, 'guild_id': ch.guild_id,
+                             'last_message_id': str(last) if last else None}
+            if method == 'GET' and rest == ['messages']:
+                return 200, state.page(ch, query.get('before'), query.get('after'), query.get('limit', 50))
+            if method == 'GET' and rest == ['messages', 'search']:
+                return 200, state.search([ch], query.get('author_id'), query.get('min_id'), query.get('max_id'),
+                                         query.get('offset', 0), query.get('limit', 25))
+            if method == 'DELETE' and len(rest) == 2 and rest[0] == 'messages':
+                mid = int(rest[1])
+                if mid not in ch.meta or mid in ch.deleted:
+                    return 404, {'message': 'Unknown Message', 'code': 10008}
+                if ch.meta[mid][0] != USER_ID and not ch.guild_id:
+                    return 403, {'message': 'Cannot delete a message authored by another user', 'code': 50003}
+                ch.deleted.add(mid)
+                state.stats['deleted'] += 1
+                return 204, None
+        return 404, {'message': '404: Not Found', 'code': 0}
+
+
+class MockDiscordServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, config: MockConfig, host='127.0.0.1', port=0):
+        super().__init__((host, port), MockHandler)
+        self.state = MockState(config)
+
+    @property
+    def api_base(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}{API_PREFIX}'
+
+    def start_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita a API do Discord")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    MockConfig.add_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockDiscordServer(MockConfig.from_args(args), args.host, args.port)
+    print(f"🧪 Mock do Discord em {server.api_base}")
+    print(f"   export DISCORD_API_BASE={server.api_base}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
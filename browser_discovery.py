@@ -0,0 +1,150 @@
+# browser_discovery.py - Descobre navegador + driver instalados (Windows, Linux, macOS) e lembra o que funcionou
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+from typing import Dict, Iterator, List, Optional
+
+BROWSER_KINDS = ('chrome', 'edge', 'firefox')  # ordem de preferência (chrome inclui Chromium e Brave)
+BROWSER_CACHE_MAX_AGE_DAYS = 7  # depois disso a escolha é revalidada do zero
+
+_WIN_LOCAL = os.environ.get('LOCALAPPDATA', os.path.expanduser('~\\AppData\\Local'))
+BINARY_CANDIDATES = {
+    'chrome': {
+        'win32': [
+            'C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe',
+            'C:\\Program Files (x86)\\Google\\Chrome\\Application\\chrome.exe',
+            os.path.join(_WIN_LOCAL, 'Google\\Chrome\\Application\\chrome.exe'),
+            'C:\\Program Files\\BraveSoftware\\Brave-Browser\\Application\\brave.exe',
+            os.path.join(_WIN_LOCAL, 'BraveSoftware\\Brave-Browser\\Application\\brave.exe'),
+        ],
+        'linux': [
+            '/usr/bin/google-chrome', '/usr/bin/google-chrome-stable', '/opt/google/chrome/chrome',
+            '/usr/bin/chromium', '/usr/bin/chromium-browser', '/snap/bin/chromium',
+            '/usr/bin/brave-browser', '/opt/brave.com/brave/brave',
+        ],
+        'darwin': [
+            '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+            '/Applications/Chromium.app/Contents/MacOS/Chromium',
+            '/Applications/Brave Browser.app/Contents/MacOS/Brave Browser',
+        ],
+        'which': ['google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'brave-browser', 'chrome'],
+    },
+    'edge': {
+        'win32': [
+            'C:\\Program Files (x86)\\Microsoft\\Edge\\Application\\msedge.exe',
+            'C:\\Program Files\\Microsoft\\Edge\\Application\\msedge.exe',
+        ],
+        'linux': ['/usr/bin/microsoft-edge', '/usr/bin/microsoft-edge-stable', '/opt/microsoft/msedge/msedge'],
+        'darwin': ['/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge'],
+        'which': ['microsoft-edge', 'microsoft-edge-stable', 'msedge'],
+    },
+    'firefox': {
+        'win32': [
+            'C:\\Program Files\\Mozilla Firefox\\firefox.exe',
+            'C:\\Program Files (x86)\\Mozilla Firefox\\firefox.exe',
+        ],
+        'linux': ['/usr/bin/firefox', '/usr/lib/firefox/firefox', '/snap/bin/firefox'],
+        'darwin': ['/Applications/Firefox.app/Contents/MacOS/firefox'],
+        'which': ['firefox'],
+    },
+}
+DRIVER_NAMES = {'chrome': 'chromedriver', 'edge': 'msedgedriver', 'firefox': 'geckodriver'}
+
+
+def _platform_key() -> str:
+    if sys.platform.startswith('win'):
+        return 'win32'
+    if sys.platform == 'darwin':
+        return 'darwin'
+    return 'linux'
+
+
+def find_binary(kind: str) -> Optional[str]:
+    candidates = BINARY_CANDIDATES[kind]
+    for path in candidates.get(_platform_key(), []):
+        if os.path.isfile(path):
+            return path
+    for name in candidates['which']:
+        found = shutil.which(name)
+        if found:
+            return found
+    return None
+
+
+def find_driver(kind: str) -> Optional[str]:
+    """Driver no PATH. None = deixa o Selenium Manager resolver (mais lento: consulta/baixa na hora)."""
+    return shutil.which(DRIVER_NAMES[kind])
+
+
+def discover() -> List[Dict]:
+    """Navegadores instalados, na ordem de BROWSER_KINDS: [{'kind', 'binary', 'driver'}]."""
+    found = []
+    for kind in BROWSER_KINDS:
+        binary = find_binary(kind)
+        if binary:
+            found.append({'kind': kind, 'binary': binary, 'driver': find_driver(kind)})
+    return found
+
+
+# ----------------------------
+# Escolha em cache (por máquina)
+# ----------------------------
+def load_choice(path: str) -> Optional[Dict]:
+    """Escolha salva, se ainda vale para esta máquina e os arquivos ainda existem."""
+    try:
+        with open(path, 'r', encoding='utf-8') as fh:
+            choice = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if choice.get('host') != platform.node() or choice.get('kind') not in BROWSER_KINDS:
+        return None
+    if time.time() - choice.get('checked_at', 0) > BROWSER_CACHE_MAX_AGE_DAYS * 86400:
+        return None
+    for key in ('binary', 'driver'):
+        if choice.get(key) and not os.path.isfile(choice[key]):
+            return None  # navegador/driver desinstalado ou atualizado para outro caminho
+    return choice
+
+
+def save_choice(path: str, choice: Dict):
+    record = {'kind': choice['kind'], 'binary': choice.get('binary'), 'driver': choice.get('driver'),
+              'host': platform.node(), 'checked_at': time.time()}
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump(record, fh)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"⚠️ Não foi possível salvar o navegador detectado: {e}")
+
+
+def clear_choice(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def candidates(path: str, force: bool = False) -> Iterator[Dict]:
+    """
+    Ordem de tentativa: a escolha em cache (se houver e force=False); depois o que a descoberta achar;
+    por último os tipos sem binário encontrado (o Selenium Manager ainda pode localizá-los).
+    A descoberta só roda se a escolha em cache não existir ou falhar.
+    """
+    tried = set()
+    cached = None if force else load_choice(path)
+    if cached:
+        cached['cached'] = True
+        tried.add(cached['kind'])
+        yield cached
+    for choice in discover():
+        if choice['kind'] not in tried:
+            tried.add(choice['kind'])
+            yield choice
+    for kind in BROWSER_KINDS:
+        if kind not in tried:
+            yield {'kind': kind, 'binary': None, 'driver': find_driver(kind)}
@@ -0,0 +1,102 @@
+# browser_profile.py - Perfil persistente do navegador por conta (cache HTTP e sessão aquecidos entre logins)
+import os
+import time
+import shutil
+import threading
+from typing import Optional, Set
+
+from session_cache import account_key
+
+PROFILE_MAX_MB = int(os.environ.get("DMD_PROFILE_MAX_MB", "300"))  # teto por perfil; acima disso o cache é podado
+PROFILE_MAX_AGE_DAYS = 30  # perfis sem uso há mais tempo são removidos inteiros
+
+# Só caches descartáveis, do mais barato de perder para o mais caro. Cookies, Local Storage e
+# IndexedDB (onde fica a sessão do Discord) nunca são tocados.
+DISPOSABLE_CACHE_DIRS = [
+    "GrShaderCache",
+    "ShaderCache",
+    "GraphiteDawnCache",
+    "Crashpad",
+    os.path.join("Default", "GPUCache"),
+    os.path.join("Default", "DawnCache"),
+    os.path.join("Default", "Service Worker", "CacheStorage"),
+    os.path.join("Default", "Code Cache"),
+    os.path.join("Default", "Cache"),
+]
+
+# Perfis abertos por este processo: o Chrome não aceita dois navegadores no mesmo user-data-dir
+_in_use: Set[str] = set()
+_in_use_lock = threading.Lock()
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for folder, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(folder, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def acquire_profile(root: str, account: str) -> Optional[str]:
+    """
+    Diretório do perfil da conta (criado se preciso) ou None se já estiver em uso neste processo;
+    nesse caso quem chama usa um perfil temporário.
+    """
+    path = os.path.join(root, f"profile_{account_key(account)}")
+    with _in_use_lock:
+        if path in _in_use:
+            return None
+        _in_use.add(path)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def release_profile(path: str, max_bytes: int = PROFILE_MAX_MB * 1024 * 1024) -> int:
+    """Libera o perfil (chamar depois de driver.quit()) e poda o cache se passou do teto. Retorna o tamanho final."""
+    try:
+        size = prune_profile(path, max_bytes)
+        os.utime(path)  # marca o último uso para prune_stale_profiles
+    finally:
+        with _in_use_lock:
+            _in_use.discard(path)
+    return size
+
+
+def prune_profile(path: str, max_bytes: int) -> int:
+    """Remove caches descartáveis (na ordem de DISPOSABLE_CACHE_DIRS) até o perfil caber em max_bytes."""
+    size = _dir_size(path)
+    for relative in DISPOSABLE_CACHE_DIRS:
+        if size <= max_bytes:
+            break
+        target = os.path.join(path, relative)
+        if os.path.isdir(target):
+            freed = _dir_size(target)
+            shutil.rmtree(target, ignore_errors=True)
+            size -= freed
+            print(f"🧹 Perfil do navegador acima de {max_bytes // (1024 * 1024)} MB: removido {relative} ({freed / (1024 * 1024):.0f} MB)")
+    return size
+
+
+def prune_stale_profiles(root: str, max_age_days: int = PROFILE_MAX_AGE_DAYS) -> int:
+    """Remove perfis sem uso há mais de max_age_days. Retorna quantos foram removidos."""
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if not name.startswith("profile_") or not os.path.isdir(path):
+            continue
+        with _in_use_lock:
+            if path in _in_use:
+                continue
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        except OSError:
+            pass
+    return removed
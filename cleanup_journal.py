@@ -0,0 +1,263 @@
+# cleanup_journal.py - Journal append-only para retomar limpezas interrompidas
+import os
+import json
+import time
+from typing import Optional, Dict, List, Iterable
+
+# fsync em lote: a cada N registros ou T segundos (eventos de controle fazem fsync imediato)
+JOURNAL_FSYNC_EVERY = 50
+JOURNAL_FSYNC_INTERVAL = 2.0
+# Registros page/x entre compactações: o arquivo é reescrito só com o que ainda falta
+JOURNAL_COMPACT_EVERY = 5000
+
+
+class CleanupJournal:
+    """
+    Registra em JSONL (uma linha por evento) o progresso de uma limpeza:
+      run             -> conta, canais e opções da execução
+      channel         -> início de um canal com a janela (after/before) pedida e o last_message_id
+                         do canal no início da varredura (para o índice local na retomada)
+      page            -> IDs enfileirados de uma página + cursor (menor ID já varrido)
+      x               -> mensagem processada (deletada ou falha definitiva)
+      channel_done    -> canal concluído
+      run_done        -> execução concluída
+    Uma linha truncada no fim (queda durante a escrita) é ignorada na leitura.
+    O estado de retomada também fica em memória: ao concluir um canal e a cada JOURNAL_COMPACT_EVERY
+    registros o arquivo é reescrito só com ele, então o tamanho acompanha o que falta, não o que já foi feito.
+    """
+
+    def __init__(self, path: str, fsync_every: int = JOURNAL_FSYNC_EVERY, fsync_interval: float = JOURNAL_FSYNC_INTERVAL,
+                 compact_every: int = JOURNAL_COMPACT_EVERY):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._fh = open(path, 'a', encoding='utf-8')
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        # Mesmo formato de load_state(), mas 'pending' é um dict (conjunto ordenado) para remover em O(1)
+        self._state: Optional[Dict] = None
+        self._since_compact = 0
+
+    # ----------------------------
+    # Escrita
+    # ----------------------------
+    def _write(self, record: Dict, sync: bool = False):
+        self._fh.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._unsynced += 1
+        if sync or self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        if self._fh.closed:
+            return
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _channel_state(self, channel_id: str) -> Dict:
+        return self._state['channels_state'].setdefault(channel_id, _new_channel_state())
+
+    def start_run(self, account_id: str, channels: List[Dict], options: Optional[Dict] = None):
+        self._state = {
+            'account_id': str(account_id),
+            'channels': channels,
+            'options': options or {},
+            'finished': False,
+            'channels_state': {},
+        }
+        self._write_run()
+
+    def _write_run(self):
+        self._write({
+            'e': 'run',
+            'account': self._state['account_id'],
+            'channels': self._state['channels'],
+            'options': self._state['options'],
+            'ts': time.time(),
+        }, sync=True)
+
+    def channel_started(self, channel_id: str, after_id: Optional[int] = None, before_id: Optional[int] = None,
+                        scan_last: Optional[int] = None):
+        if self._state is not None:
+            cs = self._channel_state(channel_id)
+            if not cs['started']:
+                cs['after'], cs['before'], cs['scan_last'] = after_id, before_id, scan_last
+            cs['started'] = True
+        self._write({'e': 'channel', 'ch': channel_id, 'after': after_id, 'before': before_id, 'last': scan_last}, sync=True)
+
+    def page(self, channel_id: str, message_ids: Iterable, oldest: Optional[int]):
+        ids = [str(m) for m in message_ids]
+        if self._state is not None:
+            cs = self._channel_state(channel_id)
+            cs['pending'].update(dict.fromkeys(ids))
+            if oldest is not None:
+                cs['oldest'] = oldest if cs['oldest'] is None else min(cs['oldest'], oldest)
+        self._write({'e': 'page', 'ch': channel_id, 'ids': ids, 'oldest': oldest})
+        self._maybe_compact()
+
+    def processed(self, channel_id: str, message_id: str, ok: bool = True):
+        if self._state is not None:
+            self._channel_state(channel_id)['pending'].pop(str(message_id), None)
+        self._write({'e': 'x', 'ch': channel_id, 'id': str(message_id), 'ok': ok})
+        self._maybe_compact()
+
+    def channel_done(self, channel_id: str):
+        if self._state is None:
+            self._write({'e': 'channel_done', 'ch': channel_id}, sync=True)
+            return
+        cs = self._channel_state(channel_id)
+        cs['done'] = True
+        cs['pending'].clear()
+        # Os registros page/x do canal não servem mais para nada: reescreve sem eles
+        self.compact()
+
+    def all_channels_done(self) -> bool:
+        """True se todos os canais da execução registraram channel_done."""
+        if self._state is None:
+            return False
+        states = self._state['channels_state']
+        return all(states.get(ch['id'], {}).get('done', False) for ch in self._state['channels'])
+
+    # ----------------------------
+    # Compactação
+    # ----------------------------
+    def _maybe_compact(self):
+        self._since_compact += 1
+        if self._state is not None and self._since_compact >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """Reescreve o arquivo (atômico) só com o estado necessário para retomar e continua anexando nele."""
+        if self._state is None or self._fh.closed:
+            return
+        self._fh.close()
+        tmp_path = self.path + '.tmp'
+        self._fh = open(tmp_path, 'w', encoding='utf-8')
+        self._write_run()
+        for ch, cs in self._state['channels_state'].items():
+            if cs['started']:
+                self._write({'e': 'channel', 'ch': ch, 'after': cs['after'], 'before': cs['before'], 'last': cs['scan_last']})
+            if cs['pending'] or cs['oldest'] is not None:
+                self._write({'e': 'page', 'ch': ch, 'ids': list(cs['pending']), 'oldest': cs['oldest']})
+            if cs['done']:
+                self._write({'e': 'channel_done', 'ch': ch})
+        self.sync()
+        self._fh.close()
+        os.replace(tmp_path, self.path)
+        self._fh = open(self.path, 'a', encoding='utf-8')
+        self._since_compact = 0
+
+    def finish_run(self):
+        """Marca a execução como concluída e arquiva o journal (não há mais o que retomar)."""
+        self._write({'e': 'run_done', 'ts': time.time()}, sync=True)
+        self.close()
+        try:
+            os.replace(self.path, self.path + '.done')
+        except OSError:
+            pass
+
+    def close(self):
+        if not self._fh.closed:
+            try:
+                self.sync()
+            finally:
+                self._fh.close()
+
+    # ----------------------------
+    # Leitura / retomada
+    # ----------------------------
+    @staticmethod
+    def load_state(path: str) -> Optional[Dict]:
+        """
+        Reconstrói o estado a partir do journal. Retorna None se não houver journal.
+        {
+          'account_id', 'channels', 'options', 'finished',
+          'channels_state': {channel_id: {'after', 'before', 'scan_last', 'oldest', 'pending': [ids], 'done', 'started'}}
+        }
+        """
+        if not os.path.exists(path):
+            return None
+
+        state = None
+        queued: Dict[str, List[str]] = {}
+        processed: Dict[str, set] = {}
+
+        with open(path, 'r', encoding='utf-8') as fh:
+            for line in fh:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    break  # Linha truncada: fim do que foi persistido
+                kind = rec.get('e')
+                if kind == 'run':
+                    if state is None:
+                        state = {
+                            'account_id': rec.get('account'),
+                            'channels': rec.get('channels', []),
+                            'options': rec.get('options', {}),
+                            'finished': False,
+                            'channels_state': {},
+                        }
+                    continue
+                if state is None:
+                    continue
+                ch = rec.get('ch')
+                cs = state['channels_state'].setdefault(ch, dict(_new_channel_state(), pending=[])) if ch is not None else None
+
+                if kind == 'channel':
+                    if not cs['started']:
+                        cs['after'] = rec.get('after')
+                        cs['before'] = rec.get('before')
+                        cs['scan_last'] = rec.get('last')
+                    cs['started'] = True
+                elif kind == 'page':
+                    queued.setdefault(ch, []).extend(rec.get('ids', []))
+                    if rec.get('oldest') is not None:
+                        cs['oldest'] = rec['oldest'] if cs['oldest'] is None else min(cs['oldest'], rec['oldest'])
+                elif kind == 'x':
+                    processed.setdefault(ch, set()).add(rec.get('id'))
+                elif kind == 'channel_done':
+                    cs['done'] = True
+                elif kind == 'run_done':
+                    state['finished'] = True
+
+        if state is None:
+            return None
+
+        for ch, cs in state['channels_state'].items():
+            done_ids = processed.get(ch, set())
+            seen = set()
+            pending = []
+            for mid in queued.get(ch, []):
+                if mid in done_ids or mid in seen:
+                    continue
+                seen.add(mid)
+                pending.append(mid)
+            cs['pending'] = pending
+        return state
+
+    @classmethod
+    def reopen_compacted(cls, path: str, state: Dict) -> 'CleanupJournal':
+        """
+        Reescreve o journal só com o estado necessário para retomar (evita crescer sem limite
+        a cada retomada) e o reabre para continuar registrando.
+        """
+        journal = cls(path)
+        journal._state = {
+            'account_id': state['account_id'],
+            'channels': state['channels'],
+            'options': state['options'],
+            'finished': False,
+            'channels_state': {
+                ch: dict(cs, pending=dict.fromkeys(cs['pending'])) for ch, cs in state['channels_state'].items()
+            },
+        }
+        journal.compact()
+        return journal
+
+
+def _new_channel_state() -> Dict:
+    return {'after': None, 'before': None, 'scan_last': None, 'oldest': None, 'pending': {}, 'done': False, 'started': False}
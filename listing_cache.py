@@ -0,0 +1,125 @@
+# listing_cache.py - Cache em disco, por conta, das listas de DMs, servidores e canais (stale-while-revalidate)
+import os
+import json
+import time
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Optional
+
+LISTING_CACHE_TTL = 300  # s; depois disso a lista é servida do snapshot e atualizada em segundo plano
+LISTING_CACHE_VERSION = 1
+
+
+class ListingCache:
+    """
+    Snapshot das listas da conta user_id em listings_{user_id}.json (sobrevive a reinícios).
+    get() responde na hora com o snapshot; se ele passou do TTL, dispara uma atualização em
+    segundo plano (uma por chave) e a próxima renderização já vê os dados novos.
+    """
+
+    def __init__(self, directory: str, user_id: str, ttl: float = LISTING_CACHE_TTL):
+        self.directory = directory
+        self.user_id = str(user_id)
+        self.ttl = ttl
+        self.path = os.path.join(directory, f"listings_{self.user_id}.json")
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # serializa gravações: o último snapshot é o que fica no disco
+        self._refreshing: Dict[str, threading.Thread] = {}
+        self._entries: Dict[str, Dict] = self._load()
+
+    # ----------------------------
+    # API
+    # ----------------------------
+    def get(self, key: str, fetch: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            # Primeira vez para esta conta/chave: não há o que mostrar, busca agora
+            return self._store(key, fetch())
+        if time.time() - entry['fetched_at'] > self.ttl:
+            self._refresh_in_background(key, fetch)
+        return entry['data']
+
+    def age(self, key: str) -> Optional[float]:
+        """Segundos desde a última busca (None se nunca buscou)."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return time.time() - entry['fetched_at'] if entry else None
+
+    def is_refreshing(self, key: Optional[str] = None) -> bool:
+        with self._lock:
+            threads = [self._refreshing.get(key)] if key else list(self._refreshing.values())
+        return any(t is not None and t.is_alive() for t in threads)
+
+    def invalidate(self):
+        """Marca tudo como velho: o snapshot continua aparecendo e a atualização roda em segundo plano."""
+        with self._lock:
+            for entry in self._entries.values():
+                entry['fetched_at'] = 0.0
+
+    def clear(self):
+        """Descarta o snapshot (memória e disco): a próxima leitura busca na hora."""
+        with self._lock:
+            self._entries = {}
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    # ----------------------------
+    # Internos
+    # ----------------------------
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Any]):
+        with self._lock:
+            running = self._refreshing.get(key)
+            if running is not None and running.is_alive():
+                return
+            thread = threading.Thread(target=self._refresh, args=(key, fetch), name=f"listing-refresh-{key}", daemon=True)
+            self._refreshing[key] = thread
+        thread.start()
+
+    def _refresh(self, key: str, fetch: Callable[[], Any]):
+        try:
+            data = fetch()
+        except (Exception, asyncio.CancelledError) as e:
+            # CancelledError (BaseException) vem do run_async quando a limpeza é parada durante a atualização
+            print(f"⚠️ Falha ao atualizar {key} em segundo plano: {type(e).__name__}: {e}")
+            return
+        with self._lock:
+            previous = self._entries.get(key)
+        # Os wrappers do deleter devolvem [] em erro de rede: não troca uma lista boa por uma vazia
+        if not data and previous and previous['data']:
+            print(f"⚠️ Atualização de {key} voltou vazia; mantendo o snapshot anterior")
+            return
+        self._store(key, data)
+
+    def _store(self, key: str, data: Any) -> Any:
+        with self._save_lock:
+            with self._lock:
+                self._entries[key] = {'data': data, 'fetched_at': time.time()}
+                snapshot = dict(self._entries)
+            self._save(snapshot)
+        return data
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                payload = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+        if payload.get('v') != LISTING_CACHE_VERSION or payload.get('user_id') != self.user_id:
+            return {}
+        return payload.get('entries', {})
+
+    def _save(self, entries: Dict[str, Dict]):
+        payload = {'v': LISTING_CACHE_VERSION, 'user_id': self.user_id, 'entries': entries}
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = self.path + '.tmp'
+            # Nomes e ids de DMs/servidores: só o dono lê
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+                json.dump(payload, fh, separators=(',', ':'))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"⚠️ Não foi possível salvar o cache de listas: {e}")
@@ -9,17 +9,8 @@ import math
 import traceback
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Callable, List, Dict, Any
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.edge.service import Service as EdgeService
-from selenium.webdriver.firefox.service import Service as FirefoxService
-from selenium.webdriver.edge.options import Options as EdgeOptions
-from selenium.webdriver.firefox.options import Options as FirefoxOptions
+# Selenium só é importado dentro de setup_selenium/login: o motor de deleção (token, CLI, benchmarks)
+# carrega sem a pilha do navegador
 import httpx
 import shutil
 import tempfile
@@ -29,13 +20,26 @@ import signal
 from contextlib import contextmanager
 import threading
 from collections import deque
+from message_index import MessageIndex
+from cleanup_journal import CleanupJournal
+from rate_limits import RateLimiter, split_route
+from pacing import AIMDPacer
+from message_store import MessageStore
+from page_decoder import decode_message_page
+from message_filters import FilterSpec
+from snowflakes import datetime_to_snowflake
+from metrics import MetricsRegistry, MetricsServer
+from tracing import Tracer, NULL_TRACER
+from session_cache import SessionCache
+import browser_profile
+import browser_discovery
 
 # ----------------------------
 # CONFIGURÁVEIS OTIMIZADAS - ANTI RATE LIMIT
 # ----------------------------
-API_BASE = "https://discord.com/api/v9"
+# DISCORD_API_BASE permite apontar para um servidor local (ex.: benchmarks/mock_discord.py)
+API_BASE = os.environ.get("DISCORD_API_BASE", "https://discord.com/api/v9").rstrip("/")
 MAX_CONCURRENT_REQUESTS = 1  # SERIAL - evita 429 em cascata
-REQUEST_MIN_DELAY = 1.5  # AUMENTADO para evitar rate limits
 DEFAULT_FETCH_PAGE_LIMIT = 100
 SUPER_LOTE_SIZE = 400  # REDUZIDO para menos memória
 CHUNK_SIZE = 50  # Chunks menores para liberar memória
@@ -44,6 +48,29 @@ CLIENT_RECREATE_INTERVAL = 5  # Recria cliente a cada 5 canais
 FORCE_GC_INTERVAL = 50  # GC forçado a cada 50 deleções
 SEEN_BEFORES_MAXLEN = 2048  # tamanho do histórico de cursors (deque)
 
+# Descoberta via busca (search) - só traz mensagens do próprio usuário
+DEFAULT_DISCOVERY_MODE = "search"  # "search" ou "pagination"
+SEARCH_PAGE_SIZE = 25  # Máximo aceito pelo endpoint de busca
+SEARCH_MAX_OFFSET = 5000  # Teto de offset; acima disso deslizamos a janela (max_id)
+SEARCH_INDEX_MAX_RETRIES = 10  # Tentativas quando o índice ainda não está pronto (202)
+SEARCH_INDEX_NOT_READY_CODE = 110000
+SEARCH_PAGE_DELAY = 0.5
+
+# Pipeline em streaming (busca e deleção simultâneas no mesmo canal)
+STREAM_QUEUE_MAXSIZE = 500  # IDs em espera entre a busca e a deleção
+# Canais processados ao mesmo tempo (o rate limit de DELETE é por canal); requests em voo
+# continuam limitados globalmente por max_concurrent_requests
+MAX_PARALLEL_CHANNELS = 3
+# Look-ahead: canais seguintes já buscando enquanto os atuais deletam
+PREFETCH_CHANNELS = 1  # quantos canais à frente (0 desativa)
+PREFETCH_MAX_IDS = 2000  # teto de IDs em memória somando as filas de todos os canais abertos
+SUPER_LOTE_PREFETCH_DEPTH = 1  # super lotes buscados à frente no modo massa (mínimo 1)
+
+# Dados locais (índice de mensagens etc.)
+APP_DATA_DIR = os.environ.get("DMD_DATA_DIR", os.path.join(os.path.expanduser("~"), ".discord_message_deleter"))
+MESSAGE_INDEX_PATH = os.path.join(APP_DATA_DIR, "message_index.sqlite3")
+SEARCH_INDEX_LAG_SECONDS = 600  # Mensagens mais novas que isso podem ainda não estar no índice de busca
+
 # Rate Limit Protection
 CONSECUTIVE_429_COOLDOWN_THRESHOLD = 3  # Após 3 429s seguidos, pausa longa
 COOLDOWN_AFTER_429_BURST = 30  # 30 segundos de cooldown
@@ -52,11 +79,137 @@ COOLDOWN_AFTER_429_BURST = 30  # 30 segundos de cooldown
 HTTP_REQUEST_TIMEOUT = 30.0  # segundos para cada request HTTP
 CLIENT_CLOSE_TIMEOUT = 10.0
 
+# Métricas: DMD_METRICS_PORT > 0 sobe um endpoint local GET /metrics (OpenMetrics/Prometheus)
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = int(os.environ.get("DMD_METRICS_PORT", "0") or 0)
+DELETE_MESSAGE_ROUTE = "DELETE /channels/:major/messages/:id"
+
+# Login por token (sem navegador): variável de ambiente ou arquivo .env
+TOKEN_ENV_VAR = "DISCORD_TOKEN"
+
+# Sessão salva (opt-in): DMD_SESSION_CACHE=1 liga no CLI; DMD_SESSION_PASSPHRASE cifra o arquivo local
+SESSION_CACHE_ENV_VAR = "DMD_SESSION_CACHE"
+SESSION_PASSPHRASE_ENV_VAR = "DMD_SESSION_PASSPHRASE"
+
+# Busca o token no store do webpack do Discord (módulo com getToken)
+TOKEN_JS = """
+function findToken() {
+    let token = null;
+    if (!window.webpackChunkdiscord_app) return null;
+    window.webpackChunkdiscord_app.push([
+        [Symbol()],
+        {},
+        req => {
+            if (!req.c) return;
+            for (let m of Object.values(req.c)) {
+                try {
+                    if (!m.exports || m.exports === window) continue;
+                    if (m.exports?.getToken) {
+                        token = m.exports.getToken();
+                        break;
+                    }
+                    for (let ex in m.exports) {
+                        if (m.exports?.[ex]?.getToken && m.exports[ex][Symbol.toStringTag] !== 'IntlMessagesProxy') {
+                            token = m.exports[ex].getToken();
+                            break;
+                        }
+                    }
+                } catch {}
+            }
+        },
+    ]);
+    window.webpackChunkdiscord_app.pop();
+    return token;
+}
+"""
+
+# Uma ida ao navegador por checagem: estado do login (URL/elementos, 2FA, captcha, erro) e, se logado, o token
+LOGIN_PROBE_JS = TOKEN_JS + """
+const loggedIn = ['channels', 'app', 'library'].includes(location.pathname.split('/')[1]) ||
+    !!document.querySelector('[class*="privateChannels"], [class*="guilds"], [class*="chatContent"], button[aria-label*="User Settings"]');
+if (loggedIn) {
+    let token = null;
+    try { token = findToken(); } catch (e) {}
+    return {state: 'logged_in', token: token};
+}
+if (document.querySelector('input[name="code"]')) return {state: '2fa', token: null};
+if (document.querySelector('iframe[title*="hCaptcha"], iframe[src*="hcaptcha"]')) return {state: 'captcha', token: null};
+const text = document.body ? document.body.textContent : '';
+if (/Invalid login|Wrong email|Wrong password|Login inválido/.test(text)) return {state: 'invalid', token: null};
+return {state: 'pending', token: null};
+"""
+LOGIN_PROBE_INTERVAL = 0.5  # s entre checagens (cada uma é um único execute_script)
+
+# Modo enxuto do navegador headless: o login só precisa do formulário e do store do webpack
+LEAN_BROWSER = os.environ.get("DMD_LEAN_BROWSER", "1").lower() not in ("0", "false", "no")
+LEAN_BLOCKED_URLS = [
+    # imagens, fontes e mídia (inclui avatares e ícones do CDN do Discord)
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.ico", "*.svg",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp3", "*.mp4", "*.webm", "*.ogg", "*.wav",
+    "*cdn.discordapp.com/*", "*media.discordapp.net/*",
+]
+LEAN_JS_HEAP_MB = 768  # teto do heap V8 por renderer (o app do Discord fica bem abaixo no login)
+LEAN_CHROMIUM_ARGS = [
+    "--blink-settings=imagesEnabled=false",
+    "--renderer-process-limit=2",
+    f"--js-flags=--max-old-space-size={LEAN_JS_HEAP_MB}",
+    "--disable-extensions",
+    "--disable-gpu",
+    "--mute-audio",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication",
+]
+
+# Navegador que funcionou por último nesta máquina (DMD_BROWSER_REPROBE=1 força nova detecção)
+BROWSER_CACHE_PATH = os.path.join(APP_DATA_DIR, "browser.json")
+BROWSER_REPROBE = os.environ.get("DMD_BROWSER_REPROBE", "").lower() in ("1", "true", "yes")
+
+# Perfil persistente do Chrome por conta (opt-in): cache HTTP e sessão do Discord aquecidos entre logins
+PERSISTENT_PROFILE = os.environ.get("DMD_PERSISTENT_PROFILE", "").lower() in ("1", "true", "yes")
+BROWSER_PROFILE_ROOT = os.path.join(APP_DATA_DIR, "browser_profiles")
+
+# Tracing: DMD_TRACE_FILE=trace.jsonl grava spans de requests/esperas (analisar com: python tracing.py trace.jsonl)
+TRACE_FILE = os.environ.get("DMD_TRACE_FILE") or None
+
+
+def format_duration(seconds: float) -> str:
+    """Duração legível: 45s, 12min, 3h 05min."""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes = seconds // 60
+    if minutes < 60:
+        return f"{minutes}min"
+    return f"{minutes // 60}h {minutes % 60:02d}min"
+
+
+def load_env_token() -> Optional[str]:
+    """Token em DISCORD_TOKEN (ambiente ou .env, via python-dotenv se instalado). None se ausente."""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()  # Não sobrescreve variáveis já definidas no ambiente
+    except ImportError:
+        pass
+    token = os.environ.get(TOKEN_ENV_VAR, "").strip().strip('"\'')
+    return token or None
+
+
+class SearchUnavailableError(Exception):
+    """O endpoint de busca não está disponível (403/404) para o escopo pedido."""
+
+
+class InvalidTokenError(Exception):
+    """401: token inválido ou expirado. Não é retentado."""
+
+
 # ----------------------------
 # Classe principal
 # ----------------------------
 class DiscordMessageDeleter:
-    def __init__(self, max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS, fetch_all_by_default: bool = True):
+    def __init__(self, max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS, fetch_all_by_default: bool = True, discovery_mode: str = DEFAULT_DISCOVERY_MODE,
+                 message_index_path: Optional[str] = MESSAGE_INDEX_PATH):
         self.driver = None
         self.token = None
         self.async_client: Optional[httpx.AsyncClient] = None
@@ -72,13 +225,36 @@ class DiscordMessageDeleter:
             'last_ping': 0.0,
             'avg_ping': 0.0,
             'client_recreate_count': 0,
-            'gc_forced_count': 0
+            'gc_forced_count': 0,
+            'discovery_strategy': {},  # channel_id -> "search" | "pagination"
+            'skipped_channels': [],  # canais pulados pelo índice local (sem mudanças desde a última limpeza)
+            'rate_limit_wait_time': 0.0,  # tempo aguardando buckets de rate limit (em vez de delay fixo)
+            'delete_rate': 0.0,  # taxa atual do pacing adaptativo (msgs/s, soma dos canais ativos)
+            'delete_delay': 0.0,  # intervalo atual entre deleções (segundos, último canal atualizado)
+            'channel_pacing': {}  # channel_id -> {'rate', 'delay'} dos canais em andamento
         }
         self.max_concurrent_requests = max_concurrent_requests
         # semáforo para controlar concorrência das requisições HTTP
         # Fix Crítico: asyncio.Semaphore must be used inside the loop. Initialized lazily.
         self._semaphore = None
         self.fetch_all_by_default = fetch_all_by_default
+        # "search" usa o endpoint de busca filtrado por author_id; "pagination" varre o canal inteiro
+        self.discovery_mode = discovery_mode
+
+        # Índice local: canais já limpos são pulados e re-varreduras só buscam após o high-water mark.
+        # message_index_path=None desativa.
+        self.message_index: Optional[MessageIndex] = None
+        if message_index_path:
+            try:
+                self.message_index = MessageIndex(message_index_path)
+            except Exception as e:
+                print(f"⚠️ Índice local indisponível ({e}). Continuando sem ele.")
+
+        # Journal da execução atual (retomada após queda) e estado carregado por prepare_resume()
+        self.journal: Optional[CleanupJournal] = None
+        self._resume_state: Optional[Dict] = None
+        # get_pending_journal() sem reler o arquivo: (caminho, mtime, tamanho) -> estado
+        self._pending_journal_cache: Optional[tuple] = None
 
         # safety: optional hard cap to avoid accidental full wipes; None = disabled
         self.max_total_deletes: Optional[int] = None
@@ -89,6 +265,36 @@ class DiscordMessageDeleter:
         # Lock para proteger inicialização do semáforo (thread-safe)
         self._semaphore_lock = threading.Lock()
 
+        # Buckets de rate limit (headers X-RateLimit-*): cada request sai assim que o bucket permite
+        self.rate_limiter = RateLimiter()
+        # Critérios de exclusão (um único FilterSpec, compilado sob demanda para a conta logada)
+        self.message_filter_spec = FilterSpec()
+        self._compiled_filter = None
+        self._compiled_filter_key = None
+
+        # Pacing adaptativo (AIMD) entre deleções, um por canal; recriado quando os limites (sliders) mudam
+        self.pacers: Dict[str, AIMDPacer] = {}
+
+        # Histogramas de latência por rota, status, esperas de rate limit, filas e deleções/s
+        self.metrics = MetricsRegistry()
+        self.metrics_server: Optional[MetricsServer] = None
+        if METRICS_PORT:
+            self.start_metrics_server(METRICS_PORT)
+
+        # Sessão salva entre execuções (opt-in via enable_session_cache): login() tenta ela antes do navegador
+        self.session_cache: Optional[SessionCache] = None
+        # Perfil do navegador reaproveitado entre logins (senão um diretório temporário por login)
+        self.persistent_profile = PERSISTENT_PROFILE
+        # Login headless sem imagens/fontes/mídia e com memória do renderer limitada
+        self.lean_browser = LEAN_BROWSER
+        self.profile_dir: Optional[str] = None
+        self.temp_user_data_dir: Optional[str] = None
+
+        # Spans de requests, retries e esperas em JSONL (NULL_TRACER = desativado, custo ~zero)
+        self.tracer = NULL_TRACER
+        if TRACE_FILE:
+            self.enable_tracing(TRACE_FILE)
+
         # cria um event loop em thread separada (graceful, para permitir run_coroutine_threadsafe)
         self.loop = asyncio.new_event_loop()
         self._loop_thread = threading.Thread(target=self._start_loop, daemon=True)
@@ -144,8 +350,8 @@ class DiscordMessageDeleter:
             future.cancel()
             raise
         except Exception as e:
-            # CORREÇÃO: Não propaga exceção se foi cancelamento
-            if self._stop_event.is_set():
+            # CORREÇÃO: Não propaga exceção se foi cancelamento (o 401 sobe como está: quem chamou precisa saber)
+            if self._stop_event.is_set() and not isinstance(e, InvalidTokenError):
                 raise asyncio.CancelledError("Operação cancelada pelo usuário.")
             raise
 
@@ -155,34 +361,7 @@ class DiscordMessageDeleter:
     def get_discord_token_safe(self):
         """Método seguro para obter token via webpack"""
         try:
-            js_code = """
-            let token = null;
-            window.webpackChunkdiscord_app.push([
-                [Symbol()],
-                {},
-                req => {
-                    if (!req.c) return;
-                    for (let m of Object.values(req.c)) {
-                        try {
-                            if (!m.exports || m.exports === window) continue;
-                            if (m.exports?.getToken) {
-                                token = m.exports.getToken();
-                                break;
-                            }
-                            for (let ex in m.exports) {
-                                if (m.exports?.[ex]?.getToken && m.exports[ex][Symbol.toStringTag] !== 'IntlMessagesProxy') {
-                                    token = m.exports[ex].getToken();
-                                    break;
-                                }
-                            }
-                        } catch {}
-                    }
-                },
-            ]);
-            window.webpackChunkdiscord_app.pop();
-            return token;
-            """
-            token = self.driver.execute_script(js_code)
+            token = self.driver.execute_script(TOKEN_JS + "return findToken();")
             if token and len(token) > 50:
                 print("✅ Token obtido com sucesso")
                 return token
@@ -194,12 +373,34 @@ class DiscordMessageDeleter:
     # ----------------------------
     # Setup Selenium
     # ----------------------------
-    def setup_selenium(self, headless: bool = True):
-        """Configura o Selenium WebDriver com fallback (Chrome -> Brave -> Edge -> Firefox)"""
-        
+    def setup_selenium(self, headless: bool = True, account: Optional[str] = None, force_probe: bool = False):
+        """
+        Configura o Selenium WebDriver. Usa direto o navegador que funcionou da última vez nesta máquina
+        (browser_discovery); se falhar ou force_probe, tenta os instalados (Chrome/Brave -> Edge -> Firefox).
+        Com persistent_profile e account, o Chrome usa o perfil persistente da conta.
+        Headless com lean_browser: sem imagens/fontes/mídia e com memória do renderer limitada.
+        """
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.edge.options import Options as EdgeOptions
+        from selenium.webdriver.edge.service import Service as EdgeService
+        from selenium.webdriver.firefox.options import Options as FirefoxOptions
+        from selenium.webdriver.firefox.service import Service as FirefoxService
+
+        lean = headless and self.lean_browser
+
+        def _configure_lean_options(options):
+            # Só flags de linha de comando (nada de prefs): não ficam gravadas no perfil persistente
+            for arg in LEAN_CHROMIUM_ARGS:
+                options.add_argument(arg)
+            return options
+
         def _configure_common_options(options):
             if headless:
                 options.add_argument("--headless=new")
+            if lean:
+                _configure_lean_options(options)
             options.add_argument("--window-size=1920,1080")
             options.add_argument("--disable-blink-features=AutomationControlled")
             options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
@@ -209,46 +410,36 @@ class DiscordMessageDeleter:
             options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
             return options
 
-        # 1. Tentar Chrome / Brave
-        try:
-            print("🚀 Tentando inicializar Chrome/Brave...")
-            chrome_paths = [
-                'C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe',
-                'C:\\Program Files (x86)\\Google\\Chrome\\Application\\chrome.exe',
-                os.path.expanduser('~\\AppData\\Local\\Google\\Chrome\\Application\\chrome.exe'),
-                'C:\\Program Files\\BraveSoftware\\Brave-Browser\\Application\\brave.exe', # Brave
-                os.path.expanduser('~\\AppData\\Local\\BraveSoftware\\Brave-Browser\\Application\\brave.exe') # Brave User
-            ]
-            
-            binary_location = None
-            for path in chrome_paths:
-                if os.path.exists(path):
-                    binary_location = path
-                    print(f"   Encontrado binário: {path}")
-                    break
-            
+        def _start_chrome(choice):
             options = Options()
-            if binary_location:
-                options.binary_location = binary_location
+            if choice['binary']:
+                options.binary_location = choice['binary']
             
             _configure_common_options(options)
             
-            # Use a persistent temp dir for 2FA flows to potentially save some state if needed, 
-            # though we clear it after, it helps during the session.
-            self.temp_user_data_dir = tempfile.mkdtemp(prefix="chrome_data_") 
-            options.add_argument(f"--user-data-dir={self.temp_user_data_dir}")
-
-            self.driver = webdriver.Chrome(options=options)
-            self._apply_stealth()
-            print("✅ Chrome/Brave inicializado com sucesso!")
-            return self.driver
-        except Exception as e:
-            print(f"⚠️ Falha ao iniciar Chrome/Brave: {e}")
+            if self.persistent_profile and account:
+                browser_profile.prune_stale_profiles(BROWSER_PROFILE_ROOT)
+                self.profile_dir = browser_profile.acquire_profile(BROWSER_PROFILE_ROOT, account)
+            if self.profile_dir:
+                print(f"   Perfil persistente: {self.profile_dir}")
+                options.add_argument(f"--user-data-dir={self.profile_dir}")
+                # O cache HTTP cresce até no máximo metade do teto; o resto fica para sessão e code cache
+                options.add_argument(f"--disk-cache-size={browser_profile.PROFILE_MAX_MB * 1024 * 1024 // 2}")
+            else:
+                # Use a persistent temp dir for 2FA flows to potentially save some state if needed,
+                # though we clear it after, it helps during the session.
+                self.temp_user_data_dir = tempfile.mkdtemp(prefix="chrome_data_")
+                options.add_argument(f"--user-data-dir={self.temp_user_data_dir}")
 
-        # 2. Tentar Edge
-        try:
-            print("🚀 Tentando inicializar Edge...")
+            # Driver conhecido: pula a consulta do Selenium Manager
+            service = Service(executable_path=choice['driver']) if choice['driver'] else None
+            self.driver = webdriver.Chrome(options=options, service=service)
+            self._apply_stealth(lean=lean)
+
+        def _start_edge(choice):
             options = EdgeOptions()
+            if choice['binary']:
+                options.binary_location = choice['binary']
             # Edge options need to be configured similarly
             if headless:
                 options.add_argument("--headless=new")
@@ -258,34 +449,85 @@ class DiscordMessageDeleter:
             options.add_experimental_option("useAutomationExtension", False)
             options.add_argument("--no-sandbox")
             options.add_argument("--disable-dev-shm-usage")
+            if lean:
+                _configure_lean_options(options)
             
-            self.driver = webdriver.Edge(options=options)
-            self._apply_stealth()
-            print("✅ Edge inicializado com sucesso!")
-            return self.driver
-        except Exception as e:
-            print(f"⚠️ Falha ao iniciar Edge: {e}")
+            service = EdgeService(executable_path=choice['driver']) if choice['driver'] else None
+            self.driver = webdriver.Edge(options=options, service=service)
+            self._apply_stealth(lean=lean)
 
-        # 3. Tentar Firefox
-        try:
-            print("🚀 Tentando inicializar Firefox...")
+        def _start_firefox(choice):
             options = FirefoxOptions()
+            if choice['binary']:
+                options.binary_location = choice['binary']
             if headless:
                 options.add_argument("--headless")
             options.add_argument("--width=1920")
             options.add_argument("--height=1080")
+            if lean:
+                # Perfil descartável do geckodriver: as prefs não vazam para outros logins
+                options.set_preference("permissions.default.image", 2)
+                options.set_preference("gfx.downloadable_fonts.enabled", False)
+                options.set_preference("media.autoplay.default", 5)
             
-            self.driver = webdriver.Firefox(options=options)
-            print("✅ Firefox inicializado com sucesso!")
-            return self.driver
-        except Exception as e:
-            print(f"⚠️ Falha ao iniciar Firefox: {e}")
+            service = FirefoxService(executable_path=choice['driver']) if choice['driver'] else None
+            self.driver = webdriver.Firefox(options=options, service=service)
+
+        starters = {'chrome': ('Chrome/Brave', _start_chrome), 'edge': ('Edge', _start_edge),
+                    'firefox': ('Firefox', _start_firefox)}
+        force_probe = force_probe or BROWSER_REPROBE
+        if force_probe:
+            print("🔎 Redetectando navegadores instalados...")
+        for choice in browser_discovery.candidates(BROWSER_CACHE_PATH, force=force_probe):
+            name, start = starters[choice['kind']]
+            try:
+                origin = " (última escolha nesta máquina)" if choice.get('cached') else ""
+                print(f"🚀 Tentando inicializar {name}{origin}...")
+                if choice['binary']:
+                    print(f"   Encontrado binário: {choice['binary']}")
+                start(choice)
+                print(f"✅ {name} inicializado com sucesso!")
+                if not choice.get('cached'):
+                    browser_discovery.save_choice(BROWSER_CACHE_PATH, choice)
+                return self.driver
+            except Exception as e:
+                print(f"⚠️ Falha ao iniciar {name}: {e}")
+                self._release_user_data_dir()
+                if self.driver:
+                    try:
+                        self.driver.quit()
+                    except Exception:
+                        pass
+                    self.driver = None
+                if choice.get('cached'):
+                    browser_discovery.clear_choice(BROWSER_CACHE_PATH)
 
         print("❌ ERRO FATAL: Nenhum navegador suportado (Chrome, Brave, Edge, Firefox) pôde ser iniciado.")
         return None
 
-    def _apply_stealth(self):
-        """Aplica patches anti-detecção no driver atual"""
+    def _release_user_data_dir(self):
+        """Remove o diretório temporário do Chrome ou poda e libera o perfil persistente (após driver.quit)."""
+        if self.profile_dir:
+            try:
+                size = browser_profile.release_profile(self.profile_dir)
+                print(f"💾 Perfil persistente mantido ({size / (1024 * 1024):.0f} MB)")
+            except Exception as e:
+                print(f"⚠️ Erro ao podar perfil do navegador: {e}")
+            finally:
+                self.profile_dir = None
+        if self.temp_user_data_dir:
+            try:
+                if os.path.exists(self.temp_user_data_dir):
+                    # O shutil.rmtree remove o diretório e todo o seu conteúdo
+                    shutil.rmtree(self.temp_user_data_dir, ignore_errors=True)
+                    print(f"🧹 Pasta temporária do login removida: {self.temp_user_data_dir}")
+            except Exception as e:
+                print(f"⚠️ Erro ao remover temp dir: {e}")
+            finally:
+                self.temp_user_data_dir = None
+
+    def _apply_stealth(self, lean: bool = False):
+        """Aplica patches anti-detecção no driver atual (e, no modo enxuto, bloqueia recursos pesados)"""
         try:
             if not self.driver: return
             self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
@@ -294,125 +536,148 @@ class DiscordMessageDeleter:
                     "userAgent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
                 })
             except: pass
+            if lean:
+                try:
+                    # Vale só para esta sessão do DevTools: nada fica no perfil
+                    self.driver.execute_cdp_cmd('Network.enable', {})
+                    self.driver.execute_cdp_cmd('Network.setBlockedURLs', {"urls": LEAN_BLOCKED_URLS})
+                    print(f"🪶 Modo enxuto: {len(LEAN_BLOCKED_URLS)} padrões de imagens/fontes/mídia bloqueados")
+                except Exception as e:
+                    print(f"⚠️ Não foi possível bloquear recursos pesados: {e}")
         except: pass
 
     # ----------------------------
     # Login helpers
     # ----------------------------
     def wait_for_login_success(self, timeout=90, expect_2fa=False):
-        """Aguarda o login ser bem-sucedido com múltiplas estratégias"""
+        """
+        Aguarda o login com uma única sonda JS por checagem (LOGIN_PROBE_JS): estado do login, 2FA,
+        captcha, erro de credenciais e o token. Se o token vier junto, já fica em self.token.
+        """
         print("⏳ Aguardando confirmação de login...")
         start_time = time.time()
+        logged_in_since = None
         while time.time() - start_time < timeout:
             if self._stop_event.is_set():
                 print("⏹️ Stop event set — interrompendo wait_for_login_success")
                 return False
             try:
-                current_url = self.driver.current_url
-                if any(pattern in current_url for pattern in ['channels', 'app', 'library']):
-                    print("✅ Login confirmado pela URL")
-                    return True
-
-                login_indicators = [
-                    "//div[contains(@class, 'privateChannels')]",
-                    "//div[contains(@class, 'guilds')]",
-                    "//div[contains(@class, 'chatContent')]",
-                    "//div[contains(text(), 'Friends')]",
-                    "//div[contains(text(), 'Amigos')]",
-                    "//button[contains(@aria-label, 'User Settings')]",
-                ]
-                for indicator in login_indicators:
-                    try:
-                        elements = self.driver.find_elements(By.XPATH, indicator)
-                        if elements:
-                            print(f"✅ Login confirmado pelo elemento: {indicator}")
-                            return True
-                    except:
-                        continue
+                probe = self.driver.execute_script(LOGIN_PROBE_JS) or {}
+                state = probe.get('state')
+
+                if state == 'logged_in':
+                    token = probe.get('token')
+                    if token and len(token) > 50:
+                        self.token = token
+                        print(f"✅ Login confirmado e token obtido ({time.time() - start_time:.1f}s)")
+                        return True
+                    # Logado mas o store do webpack ainda não carregou: espera um pouco antes de
+                    # devolver para o fallback (get_discord_token_safe com retries)
+                    logged_in_since = logged_in_since or time.time()
+                    if time.time() - logged_in_since > 10:
+                        print("✅ Login confirmado (token ainda não disponível)")
+                        return True
 
                 # Se estamos esperando 2FA, não falhamos por detectar campos de 2FA
                 # apenas continuamos esperando o usuário completar
-                if not expect_2fa:
-                    error_indicators = [
-                        "//div[contains(text(), 'Invalid login') ]",
-                        "//div[contains(text(), 'Wrong email') ]",
-                        "//div[contains(text(), 'Wrong password') ]",
-                        "//div[contains(text(), 'Login inválido') ]",
-                    ]
-                    for error_indicator in error_indicators:
-                        try:
-                            elements = self.driver.find_elements(By.XPATH, error_indicator)
-                            if elements:
-                                print("❌ Credenciais inválidas detectadas")
-                                return False
-                        except:
-                            continue
-
-                    try:
-                        code_input = self.driver.find_elements(By.NAME, "code")
-                        if code_input:
-                            print("🔐 2FA detectado")
-                            return "2FA_REQUIRED"
-                    except:
-                        pass
-
-                    try:
-                        captcha_iframe = self.driver.find_elements(By.XPATH, "//iframe[contains(@title, 'hCaptcha')]")
-                        if captcha_iframe:
-                            print("❌ CAPTCHA detectado. O login headless não pode continuar.")
-                            print("❌ Tente novamente mais tarde ou com uma conexão de internet diferente.")
-                            return False
-                    except:
-                        pass
+                elif not expect_2fa:
+                    if state == 'invalid':
+                        print("❌ Credenciais inválidas detectadas")
+                        return False
+                    if state == '2fa':
+                        print("🔐 2FA detectado")
+                        return "2FA_REQUIRED"
+                    if state == 'captcha':
+                        print("❌ CAPTCHA detectado. O login headless não pode continuar.")
+                        print("❌ Tente novamente mais tarde ou com uma conexão de internet diferente.")
+                        return False
 
-                time.sleep(2)
+                time.sleep(LOGIN_PROBE_INTERVAL)
             except Exception as e:
                 print(f"⚠️ Erro durante verificação de login: {e}")
                 time.sleep(2)
         print("❌ Timeout na verificação de login")
         return False
 
-    def login(self, email, password, has_2fa=False):
-        """Login melhorado com opção de 2FA manual (non-headless)"""
+    def login(self, email, password, has_2fa=False, password_prompt: Optional[Callable[[], str]] = None):
+        """
+        Login melhorado com opção de 2FA manual (non-headless).
+        password_prompt: pedida só quando a sessão salva não serve e a senha veio vazia (CLI).
+        """
+        if self.session_cache is not None and email:
+            cached = self.session_cache.load(email)
+            if cached:
+                print("💾 Sessão salva encontrada. Revalidando token (sem navegador)...")
+                try:
+                    if self._validate_token(cached['token']):
+                        print(f"👤 Usuário autenticado: {self.user_info.get('global_name', self.user_info.get('username', 'N/A'))}")
+                        return True
+                    # Falha que não é 401 (rede, 5xx): o navegador também falharia; mantém a sessão salva
+                    print("❌ Não foi possível validar a sessão salva agora. Tente novamente em instantes.")
+                    return False
+                except InvalidTokenError:
+                    print("🔁 Sessão salva expirou (401). Fazendo login pelo navegador...")
+                    self.session_cache.clear(email)
+
+        if not password and password_prompt:
+            password = password_prompt()
+        if not password:
+            print("❌ Nenhuma sessão salva válida para esta conta: informe a senha.")
+            return False
+
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.common.exceptions import TimeoutException, NoSuchElementException
+
         print(f"🔄 Iniciando processo de login no Discord (modo {'Visual' if has_2fa else 'Headless'})...")
         
         # Se tem 2FA, abre sem headless
-        if not self.setup_selenium(headless=not has_2fa):
+        if not self.setup_selenium(headless=not has_2fa, account=email):
             print("❌ Falha ao configurar navegador")
             return False
 
         try:
+            self.token = None
             self.driver.get('https://discord.com/login')
-            time.sleep(5)
 
-            # Tenta preencher email e senha mesmo com 2FA, para agilizar
-            print("📧 Preenchendo email...")
+            # Perfil persistente com sessão válida: o Discord redireciona direto para /channels
             try:
-                email_input = WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_element_located((By.NAME, "email"))
+                WebDriverWait(self.driver, 20).until(
+                    lambda d: 'channels' in d.current_url or d.find_elements(By.NAME, "email")
                 )
-                email_input.clear()
-                email_input.send_keys(email)
-                print("✅ Email preenchido")
             except TimeoutException:
-                print("⚠️ Campo de email não encontrado (talvez já logado?)")
+                pass
+            already_logged_in = 'channels' in self.driver.current_url
 
-            print("🔒 Preenchendo senha...")
-            try:
-                password_input = self.driver.find_element(By.NAME, "password")
-                password_input.clear()
-                password_input.send_keys(password)
-                print("✅ Senha preenchida")
-            except NoSuchElementException:
-                print("⚠️ Campo de senha não encontrado")
-
-            print("🚀 Clicando em login...")
-            try:
-                submit_button = self.driver.find_element(By.XPATH, "//button[@type='submit']")
-                submit_button.click()
-                print("✅ Botão de login clicado")
-            except NoSuchElementException:
-                print("⚠️ Botão de login não encontrado")
+            if already_logged_in:
+                print("✅ Sessão do perfil persistente ainda ativa (formulário de login ignorado)")
+            else:
+                # Tenta preencher email e senha mesmo com 2FA, para agilizar
+                print("📧 Preenchendo email...")
+                try:
+                    email_input = self.driver.find_element(By.NAME, "email")
+                    email_input.clear()
+                    email_input.send_keys(email)
+                    print("✅ Email preenchido")
+                except NoSuchElementException:
+                    print("⚠️ Campo de email não encontrado (talvez já logado?)")
+
+                print("🔒 Preenchendo senha...")
+                try:
+                    password_input = self.driver.find_element(By.NAME, "password")
+                    password_input.clear()
+                    password_input.send_keys(password)
+                    print("✅ Senha preenchida")
+                except NoSuchElementException:
+                    print("⚠️ Campo de senha não encontrado")
+
+                print("🚀 Clicando em login...")
+                try:
+                    submit_button = self.driver.find_element(By.XPATH, "//button[@type='submit']")
+                    submit_button.click()
+                    print("✅ Botão de login clicado")
+                except NoSuchElementException:
+                    print("⚠️ Botão de login não encontrado")
 
             # Se tem 2FA, damos muuuito mais tempo e não falhamos se detectar 2FA
             timeout = 300 if has_2fa else 60 # 5 minutos para 2FA manual
@@ -423,10 +688,10 @@ class DiscordMessageDeleter:
                 return False
 
             if login_result is True:
-                print("✅ Login bem-sucedido! Obtendo token...")
-                time.sleep(5)
-
-                max_attempts = 10
+                # Normalmente a sonda de login já trouxe o token; senão, tenta pelo webpack
+                max_attempts = 0 if self.token else 10
+                if max_attempts:
+                    print("✅ Login bem-sucedido! Obtendo token...")
                 for attempt in range(max_attempts):
                     print(f"🔄 Tentativa {attempt + 1}/{max_attempts} de obter token...")
                     self.token = self.get_discord_token_safe()
@@ -447,6 +712,10 @@ class DiscordMessageDeleter:
                 if self.user_info:
                     self.user_id = self.user_info['id']
                     print(f"👤 Usuário autenticado: {self.user_info.get('global_name', self.user_info.get('username', 'N/A'))}")
+                    if self.session_cache is not None:
+                        backend = self.session_cache.save(email, self.token, self.user_id)
+                        if backend:
+                            print(f"💾 Sessão salva ({backend}); o próximo login não abre o navegador.")
 
                     delay = random.uniform(3, 6)
                     print(f"⏳ Estabilizando token... aguardando {delay:.1f} segundos.")
@@ -472,16 +741,71 @@ class DiscordMessageDeleter:
                     print(f"⚠️ Erro ao fechar o driver: {e}")
                 self.driver = None
             
-            # Limpa diretório temporário do Chrome
-            if hasattr(self, 'temp_user_data_dir') and self.temp_user_data_dir:
-                try:
-                    if os.path.exists(self.temp_user_data_dir):
-                        shutil.rmtree(self.temp_user_data_dir, ignore_errors=True)
-                        print(f"🧹 Pasta temporária do login removida: {self.temp_user_data_dir}")
-                except Exception as e:
-                    print(f"⚠️ Erro ao remover temp dir no login: {e}")
-                finally:
-                    self.temp_user_data_dir = None
+            # Limpa diretório temporário do Chrome (o perfil persistente só é podado)
+            self._release_user_data_dir()
+
+    def login_with_token(self, token: Optional[str] = None) -> bool:
+        """
+        Login sem navegador: valida o token com uma única chamada a /users/@me e deixa a sessão
+        da API pronta. token=None usa DISCORD_TOKEN (ambiente ou .env).
+        """
+        token = (token or load_env_token() or "").strip().strip('"\'')
+        if not token:
+            print(f"❌ Nenhum token informado (nem em {TOKEN_ENV_VAR}).")
+            return False
+
+        print("🔑 Validando token (sem navegador)...")
+        try:
+            user_info = self._validate_token(token)
+        except InvalidTokenError:
+            user_info = None
+        if not user_info:
+            print("❌ Token inválido ou expirado")
+            return False
+
+        print(f"👤 Usuário autenticado: {user_info.get('global_name', user_info.get('username', 'N/A'))}")
+        return True
+
+    def _validate_token(self, token: str) -> Optional[Dict]:
+        """
+        Abre a sessão da API com o token e busca /users/@me (uma chamada).
+        401 levanta InvalidTokenError; outras falhas retornam None. Em ambos os casos o token é descartado.
+        """
+        self.token = token
+        self.setup_api_session()
+        try:
+            user_info = self.run_async(self.async_api_request('GET', f'{API_BASE}/users/@me'))
+        except InvalidTokenError:
+            self._discard_token()
+            raise
+        except Exception as e:
+            print(f"❌ Exceção ao obter info usuário: {e}")
+            user_info = None
+        if not user_info or 'id' not in user_info:
+            self._discard_token()
+            return None
+        self.user_info = user_info
+        self.user_id = user_info['id']
+        return user_info
+
+    def _discard_token(self):
+        self.token = None
+        self._close_async_client()
+        # Um 401 aciona o stop_event; nada estava rodando, então libera para a próxima tentativa
+        self._stop_event.clear()
+
+    def enable_session_cache(self, passphrase: Optional[str] = None, directory: str = APP_DATA_DIR) -> bool:
+        """
+        Liga a sessão salva (token cifrado no keyring do sistema ou em arquivo com frase-senha).
+        Retorna False (e deixa desligado) se nenhum backend seguro estiver disponível.
+        """
+        cache = SessionCache(directory, passphrase=passphrase)
+        if not cache.available:
+            print(f"⚠️ Sessão salva indisponível: {cache.unavailable_reason()}.")
+            self.session_cache = None
+            return False
+        self.session_cache = cache
+        return True
 
     # ----------------------------
     # Setup API
@@ -537,30 +861,91 @@ class DiscordMessageDeleter:
         self.stats['client_recreate_count'] += 1
         print(f"🔄 AsyncClient recriado (#{self.stats['client_recreate_count']})")
 
-    def before_request(self):
-        self.stats['_before_ts'] = time.time() * 1000
+    def before_request(self) -> float:
+        """Marca o início de um request; o valor retornado vai para after_request (seguro com requests em paralelo)."""
+        started = time.perf_counter()
+        self.stats['_before_ts'] = started
+        return started
+
+    def after_request(self, started: Optional[float] = None) -> float:
+        """Atualiza last_ping/avg_ping e retorna a duração do request em segundos."""
+        if started is None:
+            started = self.stats.get('_before_ts', time.perf_counter())
+        elapsed = time.perf_counter() - started
+        ping = elapsed * 1000
+        self.stats['last_ping'] = ping
+        self.stats['avg_ping'] = self.stats['avg_ping'] * 0.9 + ping * 0.1 if self.stats['avg_ping'] > 0 else ping
+        return elapsed
+
+    def start_metrics_server(self, port: int = 9464, host: str = METRICS_HOST) -> Optional[str]:
+        """Sobe o endpoint local GET /metrics (OpenMetrics). Retorna a URL, ou None se a porta estiver ocupada."""
+        if self.metrics_server is not None:
+            return self.metrics_server.url
+        try:
+            self.metrics_server = MetricsServer(self.metrics, host=host, port=port)
+        except OSError as e:
+            print(f"⚠️ Endpoint de métricas indisponível em {host}:{port} ({e}).")
+            return None
+        print(f"📈 Métricas em {self.metrics_server.url}")
+        return self.metrics_server.url
 
-    def after_request(self):
-        if hasattr(self, 'stats') and '_before_ts' in self.stats:
-            ping = (time.time() * 1000) - self.stats['_before_ts']
-            self.stats['last_ping'] = ping
-            self.stats['avg_ping'] = self.stats['avg_ping'] * 0.9 + ping * 0.1 if self.stats['avg_ping'] > 0 else ping
+    def enable_tracing(self, path: str, **kwargs) -> bool:
+        """Passa a gravar spans em path (JSONL rotativo). kwargs vão para Tracer (max_bytes, backup_count, trace_gc)."""
+        self.disable_tracing()
+        try:
+            self.tracer = Tracer(path, **kwargs)
+        except OSError as e:
+            print(f"⚠️ Não foi possível abrir o arquivo de trace {path} ({e}).")
+            return False
+        print(f"🧭 Tracing em {path}")
+        return True
+
+    def disable_tracing(self):
+        tracer, self.tracer = self.tracer, NULL_TRACER
+        tracer.close()
+
+    async def _traced_sleep(self, seconds: float, kind: str, **fields):
+        """asyncio.sleep registrado como span (pacing, backoff, cooldown...) quando o tracing está ativo."""
+        with self.tracer.span(kind, seconds=seconds, **fields):
+            await asyncio.sleep(seconds)
+
+    async def _acquire_rate_limit(self, method: str, url: str, route: str):
+        """Espera apenas o que o bucket da rota exigir (Remaining / Reset-After / 429 global)."""
+        start = time.monotonic()
+        waited = await self.rate_limiter.acquire(method, url)
+        if waited > 0:
+            self.stats['rate_limit_wait_time'] += waited
+            self.metrics.add_rate_limit_wait(waited)
+            self.tracer.emit('rate_limit_wait', start, waited, route=route)
+
+    def stop_metrics_server(self):
+        if self.metrics_server is not None:
+            try:
+                self.metrics_server.stop()
+            except Exception as e:
+                print(f"⚠️ Erro ao parar endpoint de métricas: {e}")
+            self.metrics_server = None
 
-    async def async_api_request(self, method: str, url: str, params: Optional[Dict] = None, json_data: Optional[Dict] = None, max_retries: int = 6):
-        """Realiza uma requisição HTTP assíncrona com semáforo, retry e tratamento robusto de 429"""
+    async def async_api_request(self, method: str, url: str, params: Optional[Dict] = None, json_data: Optional[Dict] = None, max_retries: int = 6,
+                                decode: Optional[Callable] = None):
+        """
+        Realiza uma requisição HTTP assíncrona com semáforo, retry e tratamento robusto de 429.
+        decode (opcional) recebe o corpo bruto de respostas 200 no lugar de resp.json()
+        (ex.: decode_message_page, que só extrai os campos usados).
+        """
         if not self.async_client:
             # se não houver client, crie (seguro pois setup_api_session usa run_coroutine_threadsafe)
             self.setup_api_session()
 
         attempt = 0
         backoff_base = 1.5  # Aumentado para backoff mais agressivo
+        route = split_route(method, url)[0]
 
         while attempt < max_retries:
             if self._stop_event.is_set():
                 raise asyncio.CancelledError("Operação abortada pelo usuário.")
             attempt += 1
-            # Delay mínimo aumentado antes de cada tentativa
-            await asyncio.sleep(REQUEST_MIN_DELAY)
+            await self._acquire_rate_limit(method, url, route)
 
             try:
                 # Acquire do semáforo apenas para a chamada de rede.
@@ -571,26 +956,43 @@ class DiscordMessageDeleter:
                             self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
 
                 async with self._semaphore:
-                    self.before_request()
-                    
-                    # O request continua sendo async/await pois é do httpx
-                    resp = await asyncio.wait_for(
-                        self.async_client.request(method, url, params=params, json=json_data),
-                        timeout=HTTP_REQUEST_TIMEOUT
-                    )
-                    
-                    self.after_request()
+                    started = self.before_request()
+                    with self.tracer.span('request', route=route, attempt=attempt) as span:
+                        try:
+                            # O request continua sendo async/await pois é do httpx
+                            resp = await asyncio.wait_for(
+                                self.async_client.request(method, url, params=params, json=json_data),
+                                timeout=HTTP_REQUEST_TIMEOUT
+                            )
+                        except asyncio.TimeoutError:
+                            self.metrics.observe_request(route, 'timeout')
+                            raise
+                        except httpx.RequestError:
+                            self.metrics.observe_request(route, 'error')
+                            raise
+                        span['status'] = resp.status_code
+                        span['bytes'] = len(resp.content)
+                        span['bucket'] = resp.headers.get('x-ratelimit-bucket')
+                    self.metrics.observe_request(route, resp.status_code, self.after_request(started))
+
+                if resp.status_code != 429:
+                    self.rate_limiter.update(method, url, resp.headers, resp.status_code)
 
                 # Tratar códigos de sucesso
-                if resp.status_code in (200, 201, 204):
-                    return {} if resp.status_code == 204 else resp.json()
+                # 202 = busca com índice ainda não pronto; o corpo traz retry_after e é tratado por quem chamou
+                if resp.status_code in (200, 201, 202, 204):
+                    if resp.status_code == 204:
+                        return {}
+                    if decode is not None and resp.status_code == 200:
+                        return decode(resp.content)
+                    return resp.json()
 
                 # 401 - Token Inválido (CRÍTICO)
                 if resp.status_code == 401:
                     print("\n🚨 ERRO CRÍTICO: Token inválido ou expirado (401).")
                     print("⏹️ Parando execução imediatamente para segurança da conta.")
                     self._stop_event.set()
-                    raise Exception("Token inválido (401) - Verifique se a senha foi alterada.")
+                    raise InvalidTokenError("Token inválido (401) - Verifique se a senha foi alterada.")
 
                 # Tratamento dedicado para 429 (rate limit)
                 if resp.status_code == 429:
@@ -610,16 +1012,15 @@ class DiscordMessageDeleter:
 
                     self.stats['throttled_total_time'] += retry_after
 
-                    # Espera exponencial aumentada
-                    wait = retry_after * 1.5 + (backoff_base * (2 ** (attempt - 1)))
+                    # O limiter bloqueia o bucket (ou todas as rotas, se global) até o reset;
+                    # a próxima tentativa aguarda em acquire()
+                    self.rate_limiter.update(method, url, resp.headers, 429, retry_after=retry_after, is_global=is_global)
+                    self.tracer.emit('throttle', time.monotonic(), route=route, retry_after=retry_after, is_global=is_global)
                     if is_global:
-                        wait *= 2  # Global = espera dobrada
-                        print(f"🚨 GLOBAL RATE LIMIT! Esperando {wait:.1f}s (tentativa {attempt}/{max_retries})")
+                        self._throttle_all_pacers()
+                        print(f"🚨 GLOBAL RATE LIMIT! Pausando todas as rotas por {retry_after:.1f}s (tentativa {attempt}/{max_retries})")
                     else:
-                        print(f"⚠️ Rate limit (429). Esperando {wait:.1f}s (tentativa {attempt}/{max_retries})")
-
-                    # Antes de dormir, permita que outros tasks rodem
-                    await asyncio.sleep(wait)
+                        print(f"⚠️ Rate limit (429). Bucket bloqueado por {retry_after:.1f}s (tentativa {attempt}/{max_retries})")
                     continue
 
                 # Outros erros
@@ -635,7 +1036,7 @@ class DiscordMessageDeleter:
             except asyncio.TimeoutError:
                 wait = backoff_base * (2 ** (attempt - 1))
                 print(f"⚠️ Timeout na requisição (tentativa {attempt}/{max_retries}). Esperando {wait:.1f}s")
-                await asyncio.sleep(wait)
+                await self._traced_sleep(wait, 'backoff', route=route, reason='timeout')
                 # recria client em erros persistentes para limpar sockets
                 if attempt >= 3:
                     print("🔧 Recriando cliente após timeout persistente...")
@@ -648,7 +1049,7 @@ class DiscordMessageDeleter:
             except httpx.RequestError as e:
                 wait = backoff_base * (2 ** (attempt - 1))
                 print(f"⚠️ Erro de conexão httpx (tentativa {attempt}/{max_retries}): {e}. Esperando {wait:.1f}s")
-                await asyncio.sleep(wait)
+                await self._traced_sleep(wait, 'backoff', route=route, reason='connection')
                 if attempt >= 3:
                     print("🔧 Recriando cliente após erro persistente...")
                     try:
@@ -661,12 +1062,15 @@ class DiscordMessageDeleter:
                 print("⏹️ Requisição cancelada via stop_event.")
                 raise
 
+            except InvalidTokenError:
+                raise
+
             except Exception as e:
                 if attempt >= max_retries:
                     raise
                 wait = backoff_base * (2 ** (attempt - 1))
                 print(f"⚠️ Erro na requisição (tentativa {attempt}/{max_retries}): {e}. Retentando em {wait:.1f}s.")
-                await asyncio.sleep(wait)
+                await self._traced_sleep(wait, 'backoff', route=route, reason='error')
                 # se muitos erros, tenta recriar client
                 if attempt >= 3:
                     try:
@@ -696,38 +1100,42 @@ class DiscordMessageDeleter:
         """Alias para compatibilidade"""
         return self.user_info
 
+    def _format_dm(self, dm: Dict) -> Dict:
+        """DM/grupo da API no formato usado pela UI e pela limpeza (nome/avatar do outro participante)."""
+        recipients = [r for r in dm.get('recipients', []) if r.get('id') != self.user_id]
+        dm_info = {
+            'id': dm['id'],
+            'name': 'DM',
+            'username': '',
+            'avatar': None,
+            'type': 'dm' if dm.get('type') == 1 else 'group',
+            'last_message_id': dm.get('last_message_id', '0')
+        }
+        if recipients:
+            recipient = recipients[0]
+            dm_info['user_id'] = recipient.get('id')
+            dm_info['name'] = recipient.get('global_name', recipient.get('username', 'Unknown User'))
+            dm_info['username'] = recipient.get('username', 'unknown')
+            dm_info['avatar'] = recipient.get('avatar')
+        return dm_info
+
+    def _format_dms(self, raw_dms: List[Dict]) -> List[Dict]:
+        """Formata, ordena da mais recente para a mais antiga e mantém uma DM por destinatário."""
+        formatted_dms = sorted((self._format_dm(dm) for dm in raw_dms),
+                               key=lambda x: int(x['last_message_id'] or 0), reverse=True)
+        seen = set()
+        unique_dms = []
+        for dm_info in formatted_dms:
+            uid = dm_info.get('user_id', dm_info['id'])
+            if uid not in seen:
+                seen.add(uid)
+                unique_dms.append(dm_info)
+        return unique_dms
+
     def get_dms(self):
         """Lista DMs (síncrono wrapper)"""
         try:
-            dms = self.run_async(self.async_get_dms())
-            formatted_dms = []
-            for dm in dms:
-                recipients = [r for r in dm.get('recipients', []) if r.get('id') != self.user_id]
-                dm_info = {
-                    'id': dm['id'],
-                    'name': 'DM',
-                    'username': '',
-                    'avatar': None,
-                    'type': 'dm' if dm.get('type') == 1 else 'group',
-                    'last_message_id': dm.get('last_message_id', '0')
-                }
-                if recipients:
-                    recipient = recipients[0]
-                    dm_info['user_id'] = recipient.get('id')
-                    dm_info['name'] = recipient.get('global_name', recipient.get('username', 'Unknown User'))
-                    dm_info['username'] = recipient.get('username', 'unknown')
-                    dm_info['avatar'] = recipient.get('avatar')
-                formatted_dms.append(dm_info)
-
-            formatted_dms.sort(key=lambda x: int(x['last_message_id'] or 0), reverse=True)
-            seen = set()
-            unique_dms = []
-            for dm_info in formatted_dms:
-                uid = dm_info.get('user_id', dm_info['id'])
-                if uid not in seen:
-                    seen.add(uid)
-                    unique_dms.append(dm_info)
-            return unique_dms
+            return self._format_dms(self.run_async(self.async_get_dms()))
         except Exception as e:
             print(f"❌ Exceção ao obter DMs: {e}")
             return []
@@ -760,156 +1168,26 @@ class DiscordMessageDeleter:
         if before:
             params['before'] = before
         url = f'{API_BASE}/channels/{channel_id}/messages'
-        data = await self.async_api_request('GET', url, params=params)
+        data = await self.async_api_request('GET', url, params=params, decode=self._page_decoder())
         return data or []
 
-    async def async_fetch_all_messages(self, channel_id: str, on_progress: Optional[Callable] = None):
-        """
-        Faz paginação completa para buscar todas as mensagens (OTIMIZADO PARA VELOCIDADE).
-        """
-        all_messages = []
-        before = None
-        page = 0
-        seen_befores = deque(maxlen=SEEN_BEFORES_MAXLEN)
-        consecutive_empty = 0
-
-        while True:
-            if self._stop_event.is_set():
-                break
-            
-            page += 1
-            # LIMIT=100 é mandatório para velocidade máxima
-            page_msgs = await self.async_fetch_messages_page(channel_id, limit=100, before=before)
-            
-            if not page_msgs:
-                consecutive_empty += 1
-                if consecutive_empty >= 3:
-                    break
-                await asyncio.sleep(0.5) # Espera um pouco se falhar
-                continue
-
-            consecutive_empty = 0
-            last_id = page_msgs[-1]['id']
-            
-            # Proteção contra loop infinito
-            if last_id in seen_befores:
-                break
-            seen_befores.append(last_id)
-
-            all_messages.extend(page_msgs)
-            before = last_id
-            
-            # --- CALLBACK DE PROGRESSO PARA A UI ---
-            if on_progress:
-                try:
-                    # Envia apenas o total acumulado para a UI mostrar "Preparando: 500..."
-                    # Note: fetch é rápido, pode disparar muitas atualizações, o Streamlit aguenta
-                    on_progress(len(all_messages), f"Página {page}")
-                except Exception:
-                    pass
-
-            # GC forçado periodicamente (mantido para segurança de memória)
-            if len(all_messages) % 2000 == 0:
-                gc.collect()
-
-            # --- OTIMIZAÇÃO DE VELOCIDADE AQUI ---
-            # Antes estava random(0.4, 0.8). 
-            # Para fetch, 0.1s é seguro o suficiente (10 req/s = 1000 msgs/s)
-            await asyncio.sleep(0.1) 
-            
-            if len(page_msgs) < 100: # Se vier menos de 100, acabou o canal
-                break
-
-        # Limpeza final mais agressiva
-        try:
-            del page_msgs
-        except NameError:
-            pass
-        gc.collect()
-        return all_messages
     async def async_get_all_user_messages(self, channel: Dict, limit: int = 100, fetch_all: Optional[bool] = None, progress_callback: Optional[Callable] = None): # MODIFICADO
         """Retorna todas mensagens do usuário no canal com suporte a progresso"""
         if fetch_all is None:
             fetch_all = self.fetch_all_by_default
             
         channel_id = channel['id']
-        channel_name = channel.get('name', 'DM') # Adicionado para o callback
-        
-        if fetch_all:
-            # Modificação: O callback agora filtra e conta mensagens do usuário em tempo real
-            all_messages = []
-            user_messages = []
-            
-            async def _fetch_and_filter_progress(page_msgs):
-                nonlocal all_messages, user_messages
-                all_messages.extend(page_msgs)
-                
-                # Filtra apenas as novas mensagens da página
-                new_user_msgs = [msg for msg in page_msgs if msg.get('author', {}).get('id') == self.user_id and not msg.get('pinned', False) and msg.get('type') in [0, 19]]
-                user_messages.extend(new_user_msgs)
-                
-                if progress_callback:
-                    try:
-                        # Envia a contagem de mensagens do usuário e o nome do canal
-                        progress_callback(len(user_messages), channel_name)
-                    except Exception:
-                        pass
 
-            await self.async_fetch_all_messages_v2(channel_id, on_page_fetched=_fetch_and_filter_progress)
-            return user_messages
+        if fetch_all:
+            # Busca (ou paginação como fallback) filtrando por página; só os IDs ficam em memória
+            return await self.async_get_user_messages_in_range(channel, progress_callback=progress_callback)
         else:
             msgs = await self.async_fetch_messages_page(channel_id, limit=limit)    
-            user_messages = [msg for msg in msgs if msg.get('author', {}).get('id') == self.user_id and not msg.get('pinned', False) and msg.get('type') in [0, 19]]
+            is_deletable = self._message_predicate()
+            user_messages = MessageStore()
+            user_messages.extend_messages(msg for msg in msgs if is_deletable(msg))
             return user_messages[:limit]
 
-    async def async_fetch_all_messages_v2(self, channel_id: str, on_page_fetched: Optional[Callable] = None):
-        """
-        Versão otimizada do fetch que chama um callback com cada página de mensagens recebida.
-        """
-        before = None
-        page = 0
-        seen_befores = deque(maxlen=SEEN_BEFORES_MAXLEN)
-        consecutive_empty = 0
-
-        while True:
-            if self._stop_event.is_set():
-                break
-            
-            page += 1
-            page_msgs = await self.async_fetch_messages_page(channel_id, limit=100, before=before)
-            
-            if not page_msgs:
-                consecutive_empty += 1
-                if consecutive_empty >= 3:
-                    break
-                await asyncio.sleep(0.5)
-                continue
-
-            consecutive_empty = 0
-            last_id = page_msgs[-1]['id']
-            
-            if last_id in seen_befores:
-                break
-            seen_befores.append(last_id)
-
-            if on_page_fetched:
-                try:
-                    await on_page_fetched(page_msgs)
-                except Exception:
-                    pass
-
-            before = last_id
-            
-            if page % 20 == 0: # GC a cada 20 páginas
-                gc.collect()
-
-            await asyncio.sleep(0.1) 
-            
-            if len(page_msgs) < 100:
-                break
-
-        gc.collect()
-
     def get_all_user_messages(self, channel, limit=100, fetch_all=True, progress_callback=None): 
             return self.run_async(
                 self.async_get_all_user_messages(
@@ -925,77 +1203,275 @@ class DiscordMessageDeleter:
         return self.get_all_user_messages(channel, limit=limit, fetch_all=False, progress_callback=progress_callback)
 
     def get_messages_since_date(self, channel, since_date, progress_callback=None):
-        """Obtém mensagens desde uma data específica (SÍNCRONO) - OTIMIZADO"""
-        channel_name = channel.get('name', 'DM')
-        
-        # Wrapper síncrono para a versão async otimizada
-        async def _async_get_since():
-            filtered = []
-            channel_id = channel['id']
-            before = None
-            
-            while True:
-                if self._stop_event.is_set(): break
-                
-                # Busca página de 100
-                msgs = await self.async_fetch_messages_page(channel_id, limit=100, before=before)
-                if not msgs: break
-                
-                page_filtered = []
-                reached_limit = False
-                
-                for msg in msgs:
-                    try:
-                        msg_timestamp = datetime.fromisoformat(msg['timestamp'].replace('Z', '+00:00'))
-                        if msg_timestamp >= since_date:
-                            # Pertence ao usuário?
-                            if msg.get('author', {}).get('id') == self.user_id:
-                                page_filtered.append(msg)
-                        else:
-                            # Encontramos mensagem mais antiga que a data limite
-                            # Como a API retorna em ordem decrescente, podemos parar aqui
-                            reached_limit = True
-                    except:
-                        continue
-                
-                filtered.extend(page_filtered)
-                
-                # Progress callback
-                if progress_callback:
-                    try:
-                        progress_callback(len(filtered), channel_name)
-                    except Exception:
-                        pass
-                
-                if reached_limit or len(msgs) < 100:
-                    break
-                    
-                before = msgs[-1]['id']
-                await asyncio.sleep(0.1)
-                
-            return filtered
+        """Obtém mensagens desde uma data específica (SÍNCRONO) - limites convertidos uma vez em snowflake"""
+        return self.get_messages_between_dates(channel, since_date, None, progress_callback=progress_callback)
 
+    def get_messages_between_dates(self, channel, start_date=None, end_date=None, progress_callback=None):
+        """
+        Obtém mensagens do usuário entre start_date (inclusive) e end_date (exclusive) (SÍNCRONO).
+        Datas sem fuso são interpretadas no horário local.
+        """
+        after_id = datetime_to_snowflake(start_date) - 1 if start_date else None
+        before_id = datetime_to_snowflake(end_date) if end_date else None
         try:
-            return self.run_async(_async_get_since())
+            return self.run_async(self.async_get_user_messages_in_range(
+                channel, after_id=after_id, before_id=before_id, progress_callback=progress_callback
+            ))
         except Exception as e:
-            print(f"❌ Erro em get_messages_since_date: {e}")
+            print(f"❌ Erro em get_messages_between_dates: {e}")
             return []
 
-    # ----------------------------
-    # SUPER LOTE: Agora com proteções extremas
-    # ----------------------------
-    async def _super_lote_get_all_messages(self, channel: Dict, initial_before: Optional[str] = None):
-        channel_id = channel['id']
-        super_lote = []
-        before = initial_before  # Use o 'before' passado para continuar
-        reached_end = False
-        accumulated = 0
-        page = 0
-        # deque para controlar visto de cursors
-        seen_befores = deque(maxlen=SEEN_BEFORES_MAXLEN)
-        consecutive_empty = 0  # Novo: detecta API travada
+    async def async_get_user_messages_in_range(
+            self,
+            channel: Dict,
+            after_id: Optional[int] = None,
+            before_id: Optional[int] = None,
+            progress_callback: Optional[Callable] = None
+        ):
+        """
+        Mensagens do usuário com after_id < id < before_id.
+        A paginação começa em before_id (nunca busca páginas mais novas que a janela) e para ao cruzar after_id.
+        O filtro é por comparação inteira de IDs, sem parsear timestamps.
+        Retorna um MessageStore (só os snowflakes ficam em memória).
+        """
+        channel_name = channel.get('name', 'DM')
+        found = MessageStore()
+        async for ids in self._async_iter_user_message_pages(channel, after_id=after_id, before_id=before_id):
+            for mid in ids:
+                found.append(mid)
+            if progress_callback:
+                try:
+                    progress_callback(len(found), channel_name)
+                except Exception:
+                    pass
+        return found
 
-        print(f"\n[Super Lote] Iniciando busca em: {channel.get('name', 'DM')} a partir de {before if before else 'início'}")
+    async def _async_iter_user_message_pages(
+            self,
+            channel: Dict,
+            after_id: Optional[int] = None,
+            before_id: Optional[int] = None,
+            stable_cursor: bool = False,
+            cursor: Optional[Dict] = None
+        ):
+        """
+        Gera, página a página, os IDs das mensagens deletáveis do usuário no canal (after_id < id < before_id).
+        Usa a busca quando discovery_mode == "search"; se ela falhar (mesmo no meio), continua por paginação
+        a partir da mensagem mais antiga já encontrada, sem repetir páginas.
+        stable_cursor=True é para quem deleta enquanto consome (não depende de offsets).
+        Se cursor for passado, cursor['oldest'] guarda o menor ID já varrido (limite inferior da faixa coberta).
+        """
+        channel_id = channel['id']
+        channel_name = channel.get('name', 'DM')
+        # A janela do filtro (ex.: "pular mensagens com mais de 1 ano") também limita a descoberta
+        after_id, before_id = self.message_filter_spec.narrow_window(after_id, before_id)
+        is_deletable = self._message_predicate()
+        oldest = before_id
+
+        if self.discovery_mode == "search":
+            guild_id = channel.get('guild_id') or channel.get('server_id')
+            if guild_id:
+                search_url = f'{API_BASE}/guilds/{guild_id}/messages/search'
+                scope_channel = channel_id
+            else:
+                search_url = f'{API_BASE}/channels/{channel_id}/messages/search'
+                scope_channel = None
+
+            self.stats['discovery_strategy'][channel_id] = 'search'
+            try:
+                async for hits in self._async_iter_search_pages(
+                        search_url,
+                        channel_id=scope_channel,
+                        min_id=str(after_id) if after_id is not None else None,
+                        max_id=str(before_id) if before_id is not None else None,
+                        slide_each_page=stable_cursor):
+                    ids = []
+                    for m in hits:
+                        mid = int(m['id'])
+                        if oldest is None or mid < oldest:
+                            oldest = mid
+                            if cursor is not None:
+                                cursor['oldest'] = mid
+                        if m.get('channel_id', channel_id) != channel_id:
+                            continue
+                        if (after_id is not None and mid <= after_id) or (before_id is not None and mid >= before_id):
+                            continue
+                        if is_deletable(m):
+                            ids.append(m['id'])
+                    yield ids
+                if cursor is not None:
+                    cursor['oldest'] = after_id + 1 if after_id is not None else 0
+                return
+            except asyncio.CancelledError:
+                raise
+            except SearchUnavailableError:
+                print(f"↩️ Busca indisponível em {channel_name}; usando paginação.")
+            except Exception as e:
+                print(f"↩️ Busca falhou em {channel_name} ({e}); continuando por paginação.")
+
+        self.stats['discovery_strategy'][channel_id] = 'pagination'
+        before = str(oldest) if oldest is not None else None
+        seen_befores = deque(maxlen=SEEN_BEFORES_MAXLEN)
+        page = 0
+
+        while not self._stop_event.is_set():
+            msgs = await self.async_fetch_messages_page(channel_id, limit=100, before=before)
+            if not msgs:
+                break
+            page += 1
+
+            ids = []
+            reached_limit = False
+            for msg in msgs:
+                if after_id is not None and int(msg['id']) <= after_id:
+                    # A API retorna em ordem decrescente: o resto da página (e do canal) está fora da janela
+                    reached_limit = True
+                    break
+                if is_deletable(msg):
+                    ids.append(msg['id'])
+
+            last_id = msgs[-1]['id']
+            full_page = len(msgs) == 100
+            del msgs
+            if cursor is not None:
+                cursor['oldest'] = after_id + 1 if reached_limit else int(last_id)
+            yield ids
+
+            if reached_limit or not full_page or last_id in seen_befores:
+                if cursor is not None and not reached_limit:
+                    cursor['oldest'] = after_id + 1 if after_id is not None else 0
+                break
+            seen_befores.append(last_id)
+            before = last_id
+
+            if page % 20 == 0:
+                gc.collect()
+            await self._traced_sleep(0.1, 'page_delay')
+
+    # ----------------------------
+    # Filtro de exclusão (compilado uma vez)
+    # ----------------------------
+    def set_message_filter(self, spec: Optional[FilterSpec] = None):
+        """Define os critérios de exclusão usados por todos os caminhos de busca (None = padrão)."""
+        self.message_filter_spec = spec or FilterSpec()
+        self._compiled_filter = None
+        self._compiled_filter_key = None
+
+    def _message_predicate(self) -> Callable[[Dict], bool]:
+        """Predicado compilado do filtro atual para a conta logada (recompila só se algo mudou)."""
+        key = (id(self.message_filter_spec), self.user_id)
+        if self._compiled_filter is None or self._compiled_filter_key != key:
+            self._compiled_filter = self.message_filter_spec.with_author(self.user_id).compile()
+            self._compiled_filter_key = key
+        return self._compiled_filter
+
+    def _page_decoder(self) -> Optional[Callable]:
+        """Decodificação projetada, a menos que o filtro precise de campos fora dela."""
+        return None if self.message_filter_spec.needs_full_message else decode_message_page
+
+    # ----------------------------
+    # Descoberta via busca (search): número de requests proporcional às NOSSAS mensagens
+    # ----------------------------
+    async def _async_iter_search_pages(
+            self,
+            search_url: str,
+            channel_id: Optional[str] = None,
+            min_id: Optional[str] = None,
+            max_id: Optional[str] = None,
+            slide_each_page: bool = False
+        ):
+        """
+        Pagina o endpoint de busca filtrado por author_id.
+        - Pagina por offset (SEARCH_PAGE_SIZE por página)
+        - Ao atingir SEARCH_MAX_OFFSET, desliza a janela (max_id = mais antiga vista) e zera o offset
+        - slide_each_page=True desliza a janela a cada página (offset sempre 0): seguro quando
+          as mensagens encontradas são deletadas durante a paginação, o que deslocaria os offsets
+        - Trata a resposta 202 "índice não pronto" aguardando retry_after
+        Gera listas de mensagens (hits) por página. Levanta SearchUnavailableError se a busca não estiver disponível.
+        """
+        offset = 0
+        window_max_id = max_id
+        oldest_seen = None
+        index_retries = 0
+
+        while not self._stop_event.is_set():
+            params = {
+                'author_id': self.user_id,
+                'sort_by': 'timestamp',
+                'sort_order': 'desc',
+                'offset': offset,
+                'limit': SEARCH_PAGE_SIZE,
+                'include_nsfw': 'true',
+            }
+            if channel_id:
+                params['channel_id'] = channel_id
+            if min_id:
+                params['min_id'] = min_id
+            if window_max_id:
+                params['max_id'] = window_max_id
+
+            data = await self.async_api_request('GET', search_url, params=params)
+            if data is None:
+                # 403/404: busca indisponível para este escopo
+                raise SearchUnavailableError(search_url)
+
+            # 202 - índice ainda sendo construído pelo Discord
+            if data.get('code') == SEARCH_INDEX_NOT_READY_CODE or ('messages' not in data and 'retry_after' in data):
+                index_retries += 1
+                if index_retries > SEARCH_INDEX_MAX_RETRIES:
+                    raise Exception("Índice de busca do Discord não ficou pronto a tempo.")
+                wait = float(data.get('retry_after') or 2.0)
+                print(f"⏳ Índice de busca ainda não pronto. Aguardando {wait:.1f}s ({index_retries}/{SEARCH_INDEX_MAX_RETRIES})...")
+                await self._traced_sleep(wait, 'search_wait')
+                continue
+            index_retries = 0
+
+            groups = data.get('messages') or []
+            hits = []
+            for group in groups:
+                # Formato antigo: lista com mensagens de contexto, a encontrada tem hit=True
+                if isinstance(group, list):
+                    found = [m for m in group if m.get('hit')] or group[:1]
+                    hits.extend(found)
+                elif isinstance(group, dict):
+                    hits.append(group)
+
+            if not hits:
+                return
+
+            for m in hits:
+                if oldest_seen is None or int(m['id']) < int(oldest_seen):
+                    oldest_seen = m['id']
+
+            yield hits
+
+            if len(groups) < SEARCH_PAGE_SIZE:
+                return
+
+            offset += SEARCH_PAGE_SIZE
+            if slide_each_page or offset >= SEARCH_MAX_OFFSET:
+                # Teto de offset atingido: nova janela termina na mensagem mais antiga já vista
+                window_max_id = oldest_seen
+                offset = 0
+
+            await self._traced_sleep(SEARCH_PAGE_DELAY, 'page_delay')
+
+    # ----------------------------
+    # SUPER LOTE: Agora com proteções extremas
+    # ----------------------------
+    async def _super_lote_get_all_messages(self, channel: Dict, initial_before: Optional[str] = None, after_id: Optional[int] = None):
+        channel_id = channel['id']
+        super_lote = MessageStore()  # Só IDs + flags: um lote não guarda os dicts completos da API
+        before = initial_before  # Use o 'before' passado para continuar
+        reached_end = False
+        accumulated = 0
+        page = 0
+        # deque para controlar visto de cursors
+        seen_befores = deque(maxlen=SEEN_BEFORES_MAXLEN)
+        consecutive_empty = 0  # Novo: detecta API travada
+        is_deletable = self._message_predicate()
+
+        print(f"\n[Super Lote] Iniciando busca em: {channel.get('name', 'DM')} a partir de {before if before else 'início'}")
         print(f"   Carregando até {SUPER_LOTE_SIZE} mensagens do usuário...")
 
         while len(super_lote) < SUPER_LOTE_SIZE and page < MAX_PAGES_PER_LOTE:
@@ -1008,7 +1484,8 @@ class DiscordMessageDeleter:
             params = {'limit': 100}
             if before:
                 params['before'] = before
-            data = await self.async_api_request('GET', f'{API_BASE}/channels/{channel_id}/messages', params=params)
+            data = await self.async_api_request('GET', f'{API_BASE}/channels/{channel_id}/messages', params=params,
+                                                decode=self._page_decoder())
 
             if not data:
                 consecutive_empty += 1
@@ -1027,15 +1504,14 @@ class DiscordMessageDeleter:
                 break
             seen_befores.append(last_id)
 
-            user_msgs = [
-                m for m in data
-                if m.get('author', {}).get('id') == self.user_id
-                and not m.get('pinned', False)
-                and m.get('type') in [0, 19]
-            ]
+            # Limite inferior (high-water mark do índice): o resto do canal já foi limpo
+            crossed_after = after_id is not None and int(last_id) <= after_id
+            if crossed_after:
+                data = [m for m in data if int(m['id']) > after_id]
 
-            super_lote.extend(user_msgs)
-            accumulated += len(user_msgs)
+            before_count = len(super_lote)
+            super_lote.extend_messages(m for m in data if is_deletable(m))
+            accumulated += len(super_lote) - before_count
             before = last_id  # Atualize 'before' com o último da página
 
             if accumulated % 200 == 0 and accumulated > 0:
@@ -1046,7 +1522,12 @@ class DiscordMessageDeleter:
                 gc.collect()
                 self.stats['gc_forced_count'] += 1
 
-            await asyncio.sleep(random.uniform(0.5, 1.0))  # Delay aumentado
+            if crossed_after:
+                print(f"   High-water mark do índice alcançado. Restante do canal já foi limpo.")
+                reached_end = True
+                break
+
+            await self._traced_sleep(random.uniform(0.5, 1.0), 'page_delay')  # Delay aumentado
 
             if len(data) < 100:
                 print(f"   Página incompleta (<100 mensagens). Fim do canal detectado.")
@@ -1056,7 +1537,7 @@ class DiscordMessageDeleter:
         print(f"   Lote carregado: {len(super_lote)} mensagens do usuário (páginas: {page})")
 
         # Limpeza final
-        del data, user_msgs
+        data = None
         gc.collect()
 
         return super_lote, before, reached_end
@@ -1065,7 +1546,7 @@ class DiscordMessageDeleter:
     # Message deletion
     # ----------------------------
     async def async_delete_single_message(self, channel_id: str, message_id: str, max_retries: int = 5):
-        """Deleta uma mensagem com backoff exponencial agressivo em 429s"""
+        """Deleta uma mensagem respeitando o bucket de rate limit da rota (espera exata em 429s)"""
         url = f'{API_BASE}/channels/{channel_id}/messages/{message_id}'
         attempt = 0
         consecutive_429 = 0  # Contador de 429s consecutivos
@@ -1081,17 +1562,35 @@ class DiscordMessageDeleter:
                     with self._semaphore_lock:
                         if self._semaphore is None:  # Double-check locking
                             self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+                await self._acquire_rate_limit('DELETE', url, DELETE_MESSAGE_ROUTE)
                 async with self._semaphore:
-                    self.before_request()
-                    resp = await asyncio.wait_for(self.async_client.delete(url), timeout=HTTP_REQUEST_TIMEOUT)
-                    self.after_request()
-                    
+                    started = self.before_request()
+                    with self.tracer.span('request', route=DELETE_MESSAGE_ROUTE, attempt=attempt, channel=channel_id) as span:
+                        try:
+                            resp = await asyncio.wait_for(self.async_client.delete(url), timeout=HTTP_REQUEST_TIMEOUT)
+                        except asyncio.TimeoutError:
+                            self.metrics.observe_request(DELETE_MESSAGE_ROUTE, 'timeout')
+                            raise
+                        except httpx.RequestError:
+                            self.metrics.observe_request(DELETE_MESSAGE_ROUTE, 'error')
+                            raise
+                        span['status'] = resp.status_code
+                        span['bytes'] = len(resp.content)
+                        span['bucket'] = resp.headers.get('x-ratelimit-bucket')
+                    self.metrics.observe_request(DELETE_MESSAGE_ROUTE, resp.status_code, self.after_request(started))
+
+                if resp.status_code != 429:
+                    self.rate_limiter.update('DELETE', url, resp.headers, resp.status_code)
+
                 if resp.status_code in (200, 204):
                     return True
                     
                 if resp.status_code == 429:
                     consecutive_429 += 1
                     self.stats['throttled_count'] += 1
+                    pacer = self.pacers.get(channel_id)
+                    if pacer:
+                        pacer.on_throttle()  # Redução multiplicativa da taxa
                     
                     # Pegar retry_after da resposta
                     retry_after = 5.0  # Padrão mais alto
@@ -1105,19 +1604,24 @@ class DiscordMessageDeleter:
                             pass
                     
                     self.stats['throttled_total_time'] += retry_after
-                    
-                    # BACKOFF EXPONENCIAL AGRESSIVO: base * 2^attempt
-                    base_wait = max(retry_after, 3.0)  # Mínimo 3 segundos
-                    exponential_wait = base_wait * (2 ** (attempt - 1))  # 3, 6, 12, 24, 48...
-                    wait = min(exponential_wait, 120)  # Cap em 2 minutos
-                    
-                    print(f"⚠️ 429 ao deletar msg {message_id}. Backoff exponencial: {wait:.1f}s (attempt {attempt}/{max_retries}).")
-                    await asyncio.sleep(wait)
+
+                    # Bucket bloqueado até o retry_after exato; a próxima tentativa espera em acquire()
+                    is_global = resp.headers.get('x-ratelimit-global', 'false').lower() == 'true'
+                    try:
+                        is_global = is_global or bool(resp.json().get('global'))
+                    except Exception:
+                        pass
+                    self.rate_limiter.update('DELETE', url, resp.headers, 429, retry_after=retry_after, is_global=is_global)
+                    self.tracer.emit('throttle', time.monotonic(), route=DELETE_MESSAGE_ROUTE, retry_after=retry_after,
+                                     is_global=is_global, channel=channel_id)
+                    if is_global:
+                        self._throttle_all_pacers()
+                    print(f"⚠️ 429 ao deletar msg {message_id}. Aguardando reset do bucket: {retry_after:.1f}s (attempt {attempt}/{max_retries}).")
                     
                     # COOLDOWN GLOBAL após múltiplos 429s
                     if consecutive_429 >= CONSECUTIVE_429_COOLDOWN_THRESHOLD:
                         print(f"🚨 {consecutive_429} 429s consecutivos! Cooldown de {COOLDOWN_AFTER_429_BURST}s...")
-                        await asyncio.sleep(COOLDOWN_AFTER_429_BURST)
+                        await self._traced_sleep(COOLDOWN_AFTER_429_BURST, 'cooldown', channel=channel_id)
                         consecutive_429 = 0  # Reset contador
                     
                     continue
@@ -1135,17 +1639,76 @@ class DiscordMessageDeleter:
             except asyncio.TimeoutError:
                 wait = 2.0 * (2 ** (attempt - 1))  # Backoff exponencial
                 print(f"⚠️ Timeout ao deletar (attempt {attempt}/{max_retries}). Esperando {wait:.1f}s.")
-                await asyncio.sleep(wait)
+                await self._traced_sleep(wait, 'backoff', route=DELETE_MESSAGE_ROUTE, reason='timeout')
             except httpx.RequestError as e:
                 wait = 2.0 * (2 ** (attempt - 1))  # Backoff exponencial
                 print(f"⚠️ httpx.RequestError ao deletar (attempt {attempt}/{max_retries}): {e}. Esperando {wait:.1f}s.")
-                await asyncio.sleep(wait)
+                await self._traced_sleep(wait, 'backoff', route=DELETE_MESSAGE_ROUTE, reason='connection')
             except Exception as e:
                 print(f"❌ Exceção ao deletar mensagem {message_id}: {e}")
                 traceback.print_exc()
                 return False
         return False
 
+    def _delete_cap_reached(self) -> bool:
+        """safety: observa o cap global de deleções - com validação"""
+        if self.max_total_deletes is not None:
+            if self.max_total_deletes <= 0:  # Validação para evitar trava
+                print("⚠️ max_total_deletes inválido (<=0). Parando deleções.")
+                return True
+            if self.stats['deleted_count'] >= self.max_total_deletes:
+                print("⚠️ Cap global de deleções atingido; abortando remoções adicionais.")
+                return True
+        return False
+
+    def _pacer_for(self, channel_id: str, delay_range) -> AIMDPacer:
+        """Pacer AIMD do canal com os limites (min, max) do usuário; mantém a taxa aprendida se os limites não mudaram."""
+        bounds = (float(delay_range[0]), float(delay_range[1]))
+        pacer = self.pacers.get(channel_id)
+        if pacer is None or pacer.bounds != tuple(sorted(bounds)):
+            pacer = self.pacers[channel_id] = AIMDPacer(*bounds)
+        return pacer
+
+    def _release_pacer(self, channel_id: str):
+        """Canal terminou: sai da taxa agregada."""
+        self.pacers.pop(channel_id, None)
+        self.stats['channel_pacing'].pop(channel_id, None)
+        self.stats['delete_rate'] = sum(p['rate'] for p in self.stats['channel_pacing'].values())
+
+    def _throttle_all_pacers(self):
+        """429 global: vale para a conta inteira, então todos os canais desaceleram."""
+        for pacer in self.pacers.values():
+            pacer.on_throttle()
+
+    async def _async_delete_and_pace(self, channel_id: str, message_id: str, delay_range) -> bool:
+        """Deleta uma mensagem, atualiza as estatísticas e aguarda o intervalo do pacing adaptativo."""
+        pacer = self._pacer_for(channel_id, delay_range)
+        success = await self.async_delete_single_message(channel_id, message_id)
+        self.metrics.record_delete(success)
+        if success:
+            self.stats['deleted_count'] += 1
+            pacer.on_success()  # Aumento aditivo da taxa
+            if self.message_index and self.user_id:
+                self.message_index.record_deleted(self.user_id, channel_id, (message_id,))
+        else:
+            self.stats['failed_count'] += 1
+        if self.journal and not self._stop_event.is_set():
+            # Interrompida pelo usuário não conta como processada: será refeita na retomada
+            self.journal.processed(channel_id, message_id, ok=success)
+
+        # GC forçado periodicamente
+        if self.stats['deleted_count'] % FORCE_GC_INTERVAL == 0 and self.stats['deleted_count'] > 0:
+            gc.collect()
+            self.stats['gc_forced_count'] += 1
+
+        # Intervalo adaptativo, sempre dentro do min/max definido pelo usuário
+        delay = pacer.next_delay()
+        self.stats['channel_pacing'][channel_id] = {'rate': pacer.rate, 'delay': pacer.delay}
+        self.stats['delete_rate'] = sum(p['rate'] for p in self.stats['channel_pacing'].values())
+        self.stats['delete_delay'] = pacer.delay
+        await self._traced_sleep(delay, 'pacing', channel=channel_id)
+        return success
+
     async def async_safe_delete_messages(
             self,
             messages: List,
@@ -1156,6 +1719,7 @@ class DiscordMessageDeleter:
         """ 
         Deleta mensagens respeitando o delay configurado (min_delay, max_delay) passado pelo app.
         Executa em sequência para evitar rate limits.
+        messages pode ser um MessageStore ou uma lista de dicts com 'id'.
         """
         deleted = 0
         total = len(messages)
@@ -1167,14 +1731,8 @@ class DiscordMessageDeleter:
                 print("⏹️ Stop event set — abortando safe_delete_messages.")
                 break
 
-            # safety: observe cap global de deleções - com validação
-            if self.max_total_deletes is not None:
-                if self.max_total_deletes <= 0:  # Validação para evitar trava
-                    print("⚠️ max_total_deletes inválido (<=0). Parando deleções.")
-                    break
-                if self.stats['deleted_count'] >= self.max_total_deletes:
-                    print("⚠️ Cap global de deleções atingido; abortando remoções adicionais.")
-                    break
+            if self._delete_cap_reached():
+                break
 
             if progress_callback:
                 try:
@@ -1182,33 +1740,673 @@ class DiscordMessageDeleter:
                 except Exception as e:
                     print(f"⚠️ Erro no progress_callback: {e}")  # Loga em vez de silenciar
 
-            success = await self.async_delete_single_message(channel_id, msg['id'])
-            if success:
-                self.stats['deleted_count'] += 1
+            if await self._async_delete_and_pace(channel_id, msg['id'], delay_range):
                 deleted += 1
+
+        self._release_pacer(channel_id)
+        return deleted
+
+    def safe_delete_messages(self, messages, channel, delay_range=(1.8, 3.5), progress_callback=None):
+        return self.run_async(self.async_safe_delete_messages(messages, channel, delay_range=delay_range, progress_callback=progress_callback))
+
+    # ----------------------------
+    # Índice local (high-water marks)
+    # ----------------------------
+    async def _async_channel_last_message_id(self, channel: Dict, fresh: bool = False) -> Optional[int]:
+        """
+        last_message_id do canal: usa o valor da listagem; só consulta a API se ele não vier.
+        fresh=True sempre consulta a API (a listagem pode vir de um snapshot antigo).
+        """
+        last = None if fresh else channel.get('last_message_id')
+        if not last:
+            try:
+                data = await self.async_api_request('GET', f"{API_BASE}/channels/{channel['id']}")
+                last = (data or {}).get('last_message_id')
+            except Exception as e:
+                print(f"⚠️ Não foi possível obter last_message_id de {channel['id']}: {e}")
+                return None
+        return int(last) if last else None
+
+    async def _async_index_can_skip(self, channel: Dict):
+        """
+        (pular?, last_message_id atual). Só canais marcados como limpos no índice custam 1 request
+        (GET /channels/{id}): o pulo nunca é decidido pelo last_message_id da listagem, que pode estar velho.
+        """
+        state = self.message_index.get_channel_state(self.user_id, channel['id'])
+        if not state or not state['complete']:
+            return False, None
+        current = await self._async_channel_last_message_id(channel, fresh=True)
+        return self.message_index.can_skip(self.user_id, channel['id'], current), current
+
+    def _index_mark_channel_clean(self, channel_id: str, scan_last: Optional[int], after_id: Optional[int]):
+        """Registra uma varredura completa (after_id, scan_last] e avança o high-water mark."""
+        if not self.message_index or scan_last is None or not self.message_filter_spec.is_default:
+            # Com filtro personalizado o canal não fica "limpo" para o critério padrão
+            return
+        high_water = scan_last
+        if self.stats['discovery_strategy'].get(channel_id) == 'search':
+            # O índice de busca pode ainda não conter as mensagens mais recentes: high-water conservador
+            lag_bound = datetime_to_snowflake(datetime.now(timezone.utc) - timedelta(seconds=SEARCH_INDEX_LAG_SECONDS))
+            high_water = min(high_water, lag_bound)
+        previous = self.message_index.high_water(self.user_id, channel_id)
+        if previous is not None:
+            high_water = max(high_water, previous)
+        low = after_id + 1 if after_id is not None else 0
+        self.message_index.record_scan_range(self.user_id, channel_id, low, scan_last)
+        self.message_index.mark_complete(self.user_id, channel_id, scan_last, high_water)
+
+    def forget_channel_index(self, channel_id: str) -> bool:
+        """Esquece o que o índice sabe do canal: a próxima limpeza varre tudo de novo."""
+        if not self.message_index or not self.user_id:
+            return False
+        self.message_index.forget_channel(self.user_id, channel_id)
+        print(f"🗂️ Índice do canal {channel_id} apagado; a próxima limpeza faz a varredura completa.")
+        return True
+
+    def reset_message_index(self) -> int:
+        """Esquece todos os canais da conta logada no índice (IDs já deletados continuam registrados)."""
+        if not self.message_index or not self.user_id:
+            return 0
+        forgotten = self.message_index.forget_account(self.user_id)
+        print(f"🗂️ Índice zerado: {forgotten} canal(is) voltam a ser varridos por completo.")
+        return forgotten
+
+    # ----------------------------
+    # Pipeline em streaming: busca -> fila limitada -> deleção
+    # ----------------------------
+    async def async_stream_delete_channel(
+            self,
+            channel: Dict,
+            delay_range=(2.5, 4.5),
+            after_id: Optional[int] = None,
+            before_id: Optional[int] = None,
+            queue_size: int = STREAM_QUEUE_MAXSIZE,
+            fetch_progress_callback: Optional[Callable] = None,
+            progress_callback: Optional[Callable] = None,
+            resume: bool = False
+        ) -> int:
+        """
+        Produtor/consumidor dentro de um canal: a busca empurra os IDs encontrados numa asyncio.Queue
+        limitada e a deleção consome em paralelo. A primeira deleção acontece após UMA página e a
+        memória fica limitada a queue_size IDs (o produtor espera quando a fila enche).
+        progress_callback recebe (deletadas, encontradas_até_agora, nome).
+        resume=True continua de onde o journal parou: primeiro os IDs já enfileirados, depois a busca
+        a partir do cursor salvo (sem re-buscar páginas já varridas).
+        """
+        stream = await self._async_open_channel_stream(
+            channel, after_id=after_id, before_id=before_id, queue_size=queue_size,
+            fetch_progress_callback=fetch_progress_callback, resume=resume
+        )
+        return await self._async_drain_channel_stream(stream, delay_range, progress_callback)
+
+    async def _async_open_channel_stream(
+            self,
+            channel: Dict,
+            after_id: Optional[int] = None,
+            before_id: Optional[int] = None,
+            queue_size: int = STREAM_QUEUE_MAXSIZE,
+            fetch_progress_callback: Optional[Callable] = None,
+            resume: bool = False
+        ) -> Dict:
+        """
+        Lado produtor do stream: aplica retomada/índice e inicia a busca em background numa fila
+        limitada. Pode ser aberto antes da vez do canal (prefetch): a busca para sozinha quando a
+        fila enche, até _async_drain_channel_stream começar a consumir.
+        """
+        channel_id = channel['id']
+        channel_name = channel.get('name', channel.get('server_name', 'Canal'))
+        stream = {
+            'channel': channel,
+            'channel_id': channel_id,
+            'channel_name': channel_name,
+            'skipped': False,
+            'after_id': after_id,
+            'scan_last': None,
+            'index': None,
+            'queue': None,
+            'producer': None,
+            'cursor': {},
+            'found': 0,
+            'fetch_complete': False,
+        }
+
+        resumed = self._resume_state['channels_state'].get(channel_id) if (resume and self._resume_state) else None
+        if resumed and not resumed['started']:
+            resumed = None
+        # Índice local só vale para a janela completa do canal ("todas as mensagens") com o filtro padrão.
+        # Na retomada continua valendo se a varredura original era do canal inteiro: no fim ela cobre
+        # (after original, last_message_id do início da varredura], gravados no journal.
+        full_window = after_id is None and before_id is None and (
+            resumed is None or (resumed['before'] is None and resumed['scan_last'] is not None)
+        )
+        pending_ids: List[str] = []
+        fetch_needed = True
+        if resumed:
+            pending_ids = list(resumed['pending'])
+            after_id = resumed['after']
+            oldest = resumed['oldest']
+            if oldest is not None:
+                before_id = oldest
+                # Cursor já chegou ao limite inferior: só falta deletar o que estava na fila
+                fetch_needed = oldest > (after_id + 1 if after_id is not None else 0)
             else:
-                self.stats['failed_count'] += 1
+                before_id = resumed['before']
+            print(f"⏯️ Retomando {channel_name}: {len(pending_ids)} mensagens pendentes na fila.")
+
+        index = self.message_index if (
+            self.message_index and self.user_id and full_window and self.message_filter_spec.is_default
+        ) else None
+        if index and resumed:
+            stream['scan_last'] = resumed['scan_last']
+        elif index:
+            skip, current_last = await self._async_index_can_skip(channel)
+            if skip:
+                print(f"⏭️ {channel_name} sem mudanças desde a última limpeza completa. Pulando (1 request).")
+                self.stats['skipped_channels'].append(channel_id)
+                if self.journal:
+                    self.journal.channel_done(channel_id)
+                stream['skipped'] = True
+                return stream
+            high_water = index.high_water(self.user_id, channel_id)
+            if high_water is not None:
+                after_id = high_water
+                print(f"📌 {channel_name}: buscando apenas mensagens após a última limpeza completa.")
+            stream['scan_last'] = current_last or await self._async_channel_last_message_id(channel, fresh=True)
+        stream['index'] = index
+        stream['after_id'] = after_id
+
+        if self.journal and not resumed:
+            self.journal.channel_started(channel_id, after_id, before_id, stream['scan_last'])
+
+        id_queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        cursor = stream['cursor']
+
+        async def _producer():
+            try:
+                for mid in pending_ids:
+                    await id_queue.put(mid)
+                    stream['found'] += 1
+                if not fetch_needed:
+                    stream['fetch_complete'] = not self._stop_event.is_set()
+                    return
+                async for ids in self._async_iter_user_message_pages(
+                        channel, after_id=after_id, before_id=before_id, stable_cursor=True, cursor=cursor):
+                    if self.journal:
+                        self.journal.page(channel_id, ids, cursor.get('oldest'))
+                    for mid in ids:
+                        await id_queue.put(mid)
+                        stream['found'] += 1
+                    if fetch_progress_callback:
+                        try:
+                            fetch_progress_callback(stream['found'], channel_name)
+                        except Exception:
+                            pass
+                stream['fetch_complete'] = not self._stop_event.is_set()
+            finally:
+                # Sentinela: avisa o consumidor que a busca terminou (inclusive em erro)
+                await id_queue.put(None)
+
+        stream['queue'] = id_queue
+        stream['producer'] = asyncio.ensure_future(_producer())
+        return stream
+
+    async def _async_close_channel_stream(self, stream: Dict):
+        """Encerra o produtor de um stream (drenado ou abandonado)."""
+        producer_task = stream.get('producer')
+        if producer_task is None:
+            return
+        if not producer_task.done():
+            producer_task.cancel()
+        try:
+            await producer_task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            # Erro na busca: o que já foi encontrado foi deletado; reporta e segue
+            print(f"⚠️ Erro na busca durante o stream de {stream['channel_name']}: {e}")
 
-            # GC forçado periodicamente
-            if self.stats['deleted_count'] % FORCE_GC_INTERVAL == 0 and self.stats['deleted_count'] > 0:
-                gc.collect()
-                self.stats['gc_forced_count'] += 1
+    async def _async_drain_channel_stream(self, stream: Dict, delay_range, progress_callback: Optional[Callable] = None) -> int:
+        """Lado consumidor do stream: deleta os IDs da fila e registra o resultado no journal/índice."""
+        if stream['skipped']:
+            return 0
+        channel_id = stream['channel_id']
+        channel_name = stream['channel_name']
+        id_queue = stream['queue']
+        deleted = 0
+        failed = 0
+        processed = 0
+        stopped_early = False
+
+        try:
+            while True:
+                message_id = await id_queue.get()
+                self.metrics.set_queue_depth(f"stream:{channel_id}", id_queue.qsize())
+                if message_id is None:
+                    break
+                if self._stop_event.is_set():
+                    print("⏹️ Stop event set — abortando stream de deleção.")
+                    stopped_early = True
+                    break
+                if self._delete_cap_reached():
+                    stopped_early = True
+                    break
 
-            # Delay real definido pelo usuário (respeita min e max)
-            delay = random.uniform(*delay_range)
-            await asyncio.sleep(delay)
+                processed += 1
+                if progress_callback:
+                    try:
+                        progress_callback(processed, stream['found'], channel_name)
+                    except Exception as e:
+                        print(f"⚠️ Erro no progress_callback: {e}")
+
+                if await self._async_delete_and_pace(channel_id, message_id, delay_range):
+                    deleted += 1
+                else:
+                    failed += 1
+        finally:
+            self._release_pacer(channel_id)
+            self.metrics.drop_queue(f"stream:{channel_id}")
+            await self._async_close_channel_stream(stream)
+
+        fetch_complete = stream['fetch_complete']
+        if self.journal and fetch_complete and not stopped_early:
+            self.journal.channel_done(channel_id)
+
+        index = stream['index']
+        if index:
+            scan_last = stream['scan_last']
+            cursor = stream['cursor']
+            if fetch_complete and not stopped_early and failed == 0:
+                self._index_mark_channel_clean(channel_id, scan_last, stream['after_id'])
+            elif scan_last is not None and cursor.get('oldest') is not None:
+                # Interrompido ou com deleções que falharam: só a faixa varrida; o canal segue elegível
+                if failed:
+                    print(f"⚠️ {channel_name}: {failed} deleções falharam. O canal será varrido de novo na próxima vez.")
+                index.record_scan_range(self.user_id, channel_id, cursor['oldest'], scan_last)
 
         return deleted
 
-    def safe_delete_messages(self, messages, channel, delay_range=(1.8, 3.5), progress_callback=None):
-        return self.run_async(self.async_safe_delete_messages(messages, channel, delay_range=delay_range, progress_callback=progress_callback))
+    def stream_delete_channel(self, channel, delay_range=(2.5, 4.5), after_id=None, before_id=None,
+                              queue_size=STREAM_QUEUE_MAXSIZE, fetch_progress_callback=None, progress_callback=None,
+                              resume=False):
+        """Wrapper síncrono para async_stream_delete_channel"""
+        return self.run_async(self.async_stream_delete_channel(
+            channel,
+            delay_range=delay_range,
+            after_id=after_id,
+            before_id=before_id,
+            queue_size=queue_size,
+            fetch_progress_callback=fetch_progress_callback,
+            progress_callback=progress_callback,
+            resume=resume
+        ))
+
+    async def async_stream_delete_channels(
+            self,
+            channels: List[Dict],
+            delay_range=(2.5, 4.5),
+            after_id: Optional[int] = None,
+            before_id: Optional[int] = None,
+            max_parallel: int = MAX_PARALLEL_CHANNELS,
+            channel_progress_callback: Optional[Callable] = None,
+            resume: bool = False,
+            prefetch_channels: int = PREFETCH_CHANNELS,
+            prefetch_max_ids: int = PREFETCH_MAX_IDS
+        ) -> Dict[str, int]:
+        """
+        Roda o stream de deleção em até max_parallel canais ao mesmo tempo. Cada canal tem
+        seu próprio pacing (o rate limit de DELETE é por canal); o limite de requests em voo, o
+        RateLimiter e o 429 global são compartilhados.
+        Até prefetch_channels canais além dos ativos já ficam buscando (GET) enquanto os atuais
+        deletam; as filas são dimensionadas para que o total em memória fique em prefetch_max_ids.
+        channel_progress_callback recebe (channel_id, evento, atual, total) com evento em
+        'start' | 'fetch' | 'delete' | 'done' | 'error'.
+        Retorna {channel_id: deletadas}.
+        """
+        max_parallel = max(1, max_parallel)
+        open_limit = max_parallel + max(0, prefetch_channels)
+        queue_size = max(1, min(STREAM_QUEUE_MAXSIZE, prefetch_max_ids // open_limit))
+        # Semáforos do asyncio acordam em ordem FIFO: canais abrem e deletam na ordem da lista
+        opened = asyncio.Semaphore(open_limit)
+        slots = asyncio.Semaphore(max_parallel)
+        results: Dict[str, int] = {}
+
+        def _notify(channel_id, event, current=0, total=None):
+            if channel_progress_callback:
+                try:
+                    channel_progress_callback(channel_id, event, current, total)
+                except Exception as e:
+                    print(f"⚠️ Erro no channel_progress_callback: {e}")
+
+        async def _run(channel):
+            channel_id = channel['id']
+            async with opened:
+                if self._stop_event.is_set() or self._delete_cap_reached():
+                    return
+                stream = None
+                try:
+                    # Abre o stream (busca começa já, em prefetch) e espera a vez de deletar
+                    stream = await self._async_open_channel_stream(
+                        channel,
+                        after_id=after_id,
+                        before_id=before_id,
+                        queue_size=queue_size,
+                        fetch_progress_callback=lambda found, _name: _notify(channel_id, 'fetch', found),
+                        resume=resume
+                    )
+                    async with slots:
+                        if self._stop_event.is_set():
+                            return
+                        _notify(channel_id, 'start')
+                        deleted = await self._async_drain_channel_stream(
+                            stream,
+                            delay_range,
+                            progress_callback=lambda processed, found, _name: _notify(channel_id, 'delete', processed, found)
+                        )
+                except Exception as e:
+                    print(f"❌ Erro ao processar canal {channel_id}: {e}")
+                    results[channel_id] = 0
+                    _notify(channel_id, 'error')
+                    return
+                finally:
+                    if stream is not None:
+                        await self._async_close_channel_stream(stream)
+                results[channel_id] = deleted
+                _notify(channel_id, 'done', deleted, deleted)
+
+        await asyncio.gather(*(_run(channel) for channel in channels))
+        return results
+
+    def stream_delete_channels(self, channels, delay_range=(2.5, 4.5), after_id=None, before_id=None,
+                               max_parallel=MAX_PARALLEL_CHANNELS, channel_progress_callback=None, resume=False,
+                               prefetch_channels=PREFETCH_CHANNELS, prefetch_max_ids=PREFETCH_MAX_IDS):
+        """Wrapper síncrono para async_stream_delete_channels"""
+        return self.run_async(self.async_stream_delete_channels(
+            channels,
+            delay_range=delay_range,
+            after_id=after_id,
+            before_id=before_id,
+            max_parallel=max_parallel,
+            channel_progress_callback=channel_progress_callback,
+            resume=resume,
+            prefetch_channels=prefetch_channels,
+            prefetch_max_ids=prefetch_max_ids
+        ))
+
+    # ----------------------------
+    # Dry-run: contagem e estimativa de tempo sem deletar nada
+    # ----------------------------
+    async def _async_search_total(self, channel: Dict, after_id: Optional[int], before_id: Optional[int]) -> Optional[int]:
+        """total_results da busca por author_id no canal (1 request). None se a busca não estiver disponível."""
+        guild_id = channel.get('guild_id') or channel.get('server_id')
+        if guild_id:
+            search_url = f'{API_BASE}/guilds/{guild_id}/messages/search'
+        else:
+            search_url = f"{API_BASE}/channels/{channel['id']}/messages/search"
+        params = {'author_id': self.user_id, 'limit': 1, 'include_nsfw': 'true'}
+        if guild_id:
+            params['channel_id'] = channel['id']
+        if after_id is not None:
+            params['min_id'] = str(after_id)
+        if before_id is not None:
+            params['max_id'] = str(before_id)
+
+        for attempt in range(SEARCH_INDEX_MAX_RETRIES):
+            data = await self.async_api_request('GET', search_url, params=params)
+            if data is None:
+                return None
+            if data.get('code') == SEARCH_INDEX_NOT_READY_CODE or ('total_results' not in data and 'retry_after' in data):
+                await self._traced_sleep(float(data.get('retry_after') or 2.0), 'search_wait')
+                continue
+            total = data.get('total_results')
+            return int(total) if total is not None else None
+        return None
+
+    async def async_count_user_messages(self, channel: Dict, after_id: Optional[int] = None, before_id: Optional[int] = None) -> Dict:
+        """
+        Conta as mensagens que uma limpeza apagaria no canal, pelo método mais barato disponível:
+        - 'index':        canal limpo e sem mensagens novas segundo o índice local (1 request: last_message_id atual)
+        - 'search_total': total_results da busca (1 request; aproximado - inclui fixadas/sistema)
+        - 'search'/'pagination': varredura completa aplicando o filtro (exato)
+        Retorna {'count', 'exact', 'method'}.
+        """
+        channel_id = channel['id']
+        spec = self.message_filter_spec
+        if self.message_index and self.user_id and after_id is None and before_id is None and spec.is_default:
+            skip, _ = await self._async_index_can_skip(channel)
+            if skip:
+                return {'count': 0, 'exact': True, 'method': 'index'}
+            high_water = self.message_index.high_water(self.user_id, channel_id)
+            if high_water is not None:
+                after_id = high_water
+
+        after_id, before_id = spec.narrow_window(after_id, before_id)
+        if self.discovery_mode == "search" and not spec.needs_full_message:
+            try:
+                total = await self._async_search_total(channel, after_id, before_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Contagem via busca falhou em {channel.get('name', channel_id)} ({e}); contando por varredura.")
+                total = None
+            if total is not None:
+                return {'count': total, 'exact': False, 'method': 'search_total'}
+
+        count = 0
+        async for ids in self._async_iter_user_message_pages(channel, after_id=after_id, before_id=before_id):
+            count += len(ids)
+        return {'count': count, 'exact': True, 'method': self.stats['discovery_strategy'].get(channel_id, 'pagination')}
+
+    async def async_dry_run(
+            self,
+            channels: List[Dict],
+            delay_range=(2.5, 4.5),
+            after_id: Optional[int] = None,
+            before_id: Optional[int] = None,
+            max_parallel: int = 1,
+            limit_per_channel: Optional[int] = None,
+            progress_callback: Optional[Callable] = None
+        ) -> Dict:
+        """
+        Simula a limpeza: conta as mensagens por canal (sem deletar) e estima o tempo com o
+        modelo de pacing (rampa AIMD entre os delays) e a latência observada (avg_ping).
+        progress_callback recebe (atual, total, nome).
+        Retorna {'channels': [{'id', 'name', 'count', 'exact', 'method', 'estimated_seconds'}],
+                 'total_messages', 'estimated_seconds', 'avg_ping_ms'}.
+        """
+        rows = []
+        for idx, channel in enumerate(channels):
+            if self._stop_event.is_set():
+                break
+            name = channel.get('name', channel.get('server_name', 'Canal'))
+            if progress_callback:
+                try:
+                    progress_callback(idx + 1, len(channels), name)
+                except Exception:
+                    pass
+            try:
+                result = await self.async_count_user_messages(channel, after_id=after_id, before_id=before_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Não foi possível contar {name}: {e}")
+                result = {'count': 0, 'exact': False, 'method': 'erro'}
+            if limit_per_channel is not None:
+                result['count'] = min(result['count'], limit_per_channel)
+            rows.append({'id': channel['id'], 'name': name, **result})
+
+        # Latência observada durante a própria contagem (ms -> s)
+        latency = self.stats['avg_ping'] / 1000.0
+        for row in rows:
+            row['estimated_seconds'] = AIMDPacer(*delay_range).estimate_seconds(row['count'], latency)
+
+        per_channel = [row['estimated_seconds'] for row in rows]
+        max_parallel = max(1, max_parallel)
+        # Canais em paralelo: limitado pelo canal mais longo ou pela soma dividida entre os slots
+        wall = max(max(per_channel, default=0.0), sum(per_channel) / max_parallel)
+        return {
+            'channels': rows,
+            'total_messages': sum(row['count'] for row in rows),
+            'estimated_seconds': wall,
+            'avg_ping_ms': self.stats['avg_ping'],
+        }
+
+    def dry_run(self, channels, delay_range=(2.5, 4.5), after_id=None, before_id=None, max_parallel=1,
+                limit_per_channel=None, progress_callback=None):
+        """Wrapper síncrono para async_dry_run"""
+        return self.run_async(self.async_dry_run(
+            channels,
+            delay_range=delay_range,
+            after_id=after_id,
+            before_id=before_id,
+            max_parallel=max_parallel,
+            limit_per_channel=limit_per_channel,
+            progress_callback=progress_callback
+        ))
+
+    # ----------------------------
+    # Journal de limpeza (retomada após queda)
+    # ----------------------------
+    def _journal_path(self) -> Optional[str]:
+        if not self.user_id:
+            return None
+        return os.path.join(APP_DATA_DIR, f"journal_{self.user_id}.jsonl")
+
+    def begin_journal(self, channels: List[Dict], options: Optional[Dict] = None):
+        """Inicia um journal novo para esta execução (o anterior, se houver, vira .prev)."""
+        path = self._journal_path()
+        if not path:
+            return
+        self.end_journal(completed=False)
+        try:
+            if os.path.exists(path):
+                os.replace(path, path + '.prev')
+            self.journal = CleanupJournal(path)
+            refs = [
+                {k: ch[k] for k in ('id', 'name', 'type', 'guild_id', 'server_id', 'server_name', 'last_message_id') if k in ch}
+                for ch in channels
+            ]
+            options = dict(options or {})
+            options['filter'] = self.message_filter_spec.to_dict()  # Retomada usa o mesmo critério
+            self.journal.start_run(self.user_id, refs, options)
+        except Exception as e:
+            print(f"⚠️ Não foi possível iniciar o journal ({e}). Continuando sem retomada.")
+            self.journal = None
+
+    def end_journal(self, completed: bool):
+        """
+        Fecha o journal. Só é arquivado (nada a retomar) se a execução terminou sem erro
+        (completed=True) e todos os canais registraram channel_done; senão fica para "Retomar".
+        """
+        journal, self.journal = self.journal, None
+        self._resume_state = None
+        if not journal:
+            return
+        try:
+            if completed and not self._stop_event.is_set() and journal.all_channels_done():
+                journal.finish_run()
+            else:
+                journal.close()
+        except Exception as e:
+            print(f"⚠️ Erro ao fechar journal: {e}")
+
+    def get_pending_journal(self) -> Optional[Dict]:
+        """Estado de uma limpeza interrompida desta conta, ou None. Inclui 'unfinished_channels'."""
+        path = self._journal_path()
+        if not path:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._pending_journal_cache = None
+            return None
+        # O dashboard chama isto a cada renderização: só relê o JSONL se o arquivo mudou
+        key = (path, st.st_mtime_ns, st.st_size)
+        if self._pending_journal_cache is not None and self._pending_journal_cache[0] == key:
+            return self._pending_journal_cache[1]
+        state = self._load_pending_journal(path)
+        self._pending_journal_cache = (key, state)
+        return state
+
+    def _load_pending_journal(self, path: str) -> Optional[Dict]:
+        try:
+            state = CleanupJournal.load_state(path)
+        except Exception as e:
+            print(f"⚠️ Journal ilegível ({e}).")
+            return None
+        if not state or state['finished'] or state['account_id'] != str(self.user_id):
+            return None
+        unfinished = [
+            ch for ch in state['channels']
+            if not state['channels_state'].get(ch['id'], {}).get('done', False)
+        ]
+        if not unfinished:
+            return None
+        state['unfinished_channels'] = unfinished
+        return state
+
+    def prepare_resume(self) -> Optional[Dict]:
+        """Carrega o journal pendente e o reabre (compactado) para continuar registrando."""
+        state = self.get_pending_journal()
+        if not state:
+            return None
+        self.end_journal(completed=False)
+        self.journal = CleanupJournal.reopen_compacted(self._journal_path(), state)
+        self._resume_state = state
+        if state['options'].get('filter') is not None:
+            self.set_message_filter(FilterSpec.from_dict(state['options']['filter']))
+        return state
+
+    async def async_resume(self, fetch_progress_callback: Optional[Callable] = None, progress_callback: Optional[Callable] = None) -> int:
+        """Continua a última limpeza interrompida exatamente de onde parou."""
+        state = self.prepare_resume()
+        if not state:
+            print("ℹ️ Nenhuma limpeza interrompida para retomar.")
+            return 0
+
+        options = state['options']
+        delay_range = tuple(options.get('delay_range') or (2.5, 4.5))
+        channels = state['unfinished_channels']
+        print(f"⏯️ Retomando limpeza: {len(channels)} canais restantes.")
+
+        total_deleted = 0
+        finished = False
+        try:
+            for index, channel in enumerate(channels):
+                if self._stop_event.is_set():
+                    break
+                print(f"\n ▶️ [{index + 1}/{len(channels)}] Retomando canal: {channel.get('name', 'DM')}")
+                total_deleted += await self.async_stream_delete_channel(
+                    channel,
+                    delay_range=delay_range,
+                    after_id=options.get('after_id'),
+                    before_id=options.get('before_id'),
+                    fetch_progress_callback=fetch_progress_callback,
+                    progress_callback=progress_callback,
+                    resume=True
+                )
+            finished = True
+        finally:
+            # Exceção no meio: o journal continua pendente
+            self.end_journal(completed=finished)
+        return total_deleted
+
+    def resume(self, fetch_progress_callback=None, progress_callback=None):
+        """Wrapper síncrono para async_resume"""
+        return self.run_async(self.async_resume(
+            fetch_progress_callback=fetch_progress_callback, progress_callback=progress_callback
+        ))
 
     async def async_get_dms(self):
         data = await self.async_api_request('GET', f'{API_BASE}/users/@me/channels')
         return data or []
 
     def get_stats(self):
-        return self.stats.copy()
+        stats = self.stats.copy()
+        stats['discovery_strategy'] = dict(self.stats['discovery_strategy'])
+        stats['skipped_channels'] = list(self.stats['skipped_channels'])
+        stats['channel_pacing'] = {ch: dict(p) for ch, p in self.stats['channel_pacing'].items()}
+        stats['metrics'] = self.metrics.snapshot()
+        return stats
 
     def reset_stats(self):
         self.stats['deleted_count'] = 0
@@ -1218,6 +2416,30 @@ class DiscordMessageDeleter:
         self.stats['last_ping'] = 0.0
         self.stats['avg_ping'] = 0.0
         self.stats['gc_forced_count'] = 0
+        self.stats['discovery_strategy'] = {}
+        self.stats['skipped_channels'] = []
+        self.stats['rate_limit_wait_time'] = 0.0
+        self.stats['delete_rate'] = 0.0
+        self.stats['delete_delay'] = 0.0
+        self.stats['channel_pacing'] = {}
+        self.pacers = {}
+        self.metrics.reset()
+
+    async def async_get_active_dms(self) -> Optional[List[Dict]]:
+        """DMs/grupos mais recentes (sem duplicar destinatário) processados pelo modo massa. None em falha."""
+        print("\n🔄 Buscando lista de DMs (pode demorar se houver muitas)...")
+        try:
+            raw_dms = await self.async_get_dms()
+        except Exception as e:
+            print(f"❌ Falha ao buscar DMs: {e}")
+            return None
+
+        unique_dms = self._format_dms(raw_dms)
+
+        # Limite prudente inicial (evita processar 1000s de DMs por vez)
+        active_dms = unique_dms[:50]
+        print(f"\n📊 DMs encontradas: {len(unique_dms)} (Processando as {len(active_dms)} mais recentes)")
+        return active_dms
 
     # ----------------------------
     # NOVO MÉTODO - Async channel processing (para modo massa)
@@ -1230,49 +2452,15 @@ class DiscordMessageDeleter:
         - Recria cliente HTTP periodicamente para evitar leaks
         - GC forçado regularmente
         """
-        print("\n🔄 Buscando lista de DMs (pode demorar se houver muitas)...")
-        try:
-            raw_dms = await self.async_get_dms()
-        except Exception as e:
-            print(f"❌ Falha ao buscar DMs: {e}")
+        active_dms = await self.async_get_active_dms()
+        if active_dms is None:
             return 0
 
-        # Formata os DMs como fazia get_dms()
-        formatted_dms = []
-        for dm in raw_dms:
-            recipients = [r for r in dm.get('recipients', []) if r.get('id') != self.user_id]
-            dm_info = {
-                'id': dm['id'],
-                'name': 'DM',
-                'username': '',
-                'avatar': None,
-                'type': 'dm' if dm.get('type') == 1 else 'group',
-                'last_message_id': dm.get('last_message_id', '0')
-            }
-            if recipients:
-                recipient = recipients[0]
-                dm_info['user_id'] = recipient.get('id')
-                dm_info['name'] = recipient.get('global_name', recipient.get('username', 'Unknown User'))
-                dm_info['username'] = recipient.get('username', 'unknown')
-                dm_info['avatar'] = recipient.get('avatar')
-            formatted_dms.append(dm_info)
-
-        formatted_dms.sort(key=lambda x: int(x['last_message_id'] or 0), reverse=True)
-        seen = set()
-        unique_dms = []
-        for dm_info in formatted_dms:
-            uid = dm_info.get('user_id', dm_info['id'])
-            if uid not in seen:
-                seen.add(uid)
-                unique_dms.append(dm_info)
-
-        # Limite prudente inicial (evita processar 1000s de DMs por vez)
-        active_dms = unique_dms[:50]
-        print(f"\n📊 DMs encontradas: {len(unique_dms)} (Processando as {len(active_dms)} mais recentes)")
-
         processed_channels_count = 0
         total_dms = len(active_dms)
 
+        self.begin_journal(active_dms, {'mode': 'super_lote', 'delay_range': [1.8, 3.5]})
+
         for index, dm in enumerate(active_dms):
             if self._stop_event.is_set():
                 print("⏹️ Stop event set — interrompendo processamento de canais.")
@@ -1282,15 +2470,66 @@ class DiscordMessageDeleter:
             print(f"\n ▶️ [{index + 1}/{total_dms}] Iniciando canal: {channel_name}")
 
             total_deleted_in_channel = 0
+            # Falhas deste canal (um canal por vez no super lote: delta do contador global)
+            failed_before = self.stats['failed_count']
             has_more_messages = True
-            before = None  # Inicialize 'before' para paginar entre super lotes
+
+            high_water = None
+            # active_dms acabou de vir da API (async_get_active_dms): last_message_id atual, sem request extra
+            if self.message_index and self.message_filter_spec.is_default:
+                if self.message_index.can_skip(self.user_id, dm['id'], dm.get('last_message_id')):
+                    print(f"   ⏭️ Sem mudanças desde a última limpeza completa. Pulando (0 requests).")
+                    self.stats['skipped_channels'].append(dm['id'])
+                    if self.journal:
+                        self.journal.channel_done(dm['id'])
+                    processed_channels_count += 1
+                    continue
+                high_water = self.message_index.high_water(self.user_id, dm['id'])
+            self.stats['discovery_strategy'][dm['id']] = 'pagination'
+            if self.journal:
+                self.journal.channel_started(dm['id'], high_water, None,
+                                             int(dm['last_message_id']) if dm.get('last_message_id') else None)
+            # Limite inferior da varredura: high-water do índice ou janela do filtro (ex.: > 1 ano)
+            scan_after, _ = self.message_filter_spec.narrow_window(high_water, None)
+
+            # Look-ahead: o próximo super lote é buscado enquanto o atual é deletado
+            # (fila limitada a SUPER_LOTE_PREFETCH_DEPTH lotes prontos em memória)
+            lotes: asyncio.Queue = asyncio.Queue(maxsize=max(1, SUPER_LOTE_PREFETCH_DEPTH))
+
+            async def _fetch_lotes(dm=dm, high_water=scan_after, lotes=lotes):
+                before = None  # Cursor para paginar entre super lotes
+                try:
+                    while not self._stop_event.is_set():
+                        print(f"   Buscando super lote de até {SUPER_LOTE_SIZE} mensagens (antes de {before if before else 'início'})...")
+                        batch_msgs, new_before, reached_end = await self._super_lote_get_all_messages(dm, initial_before=before, after_id=high_water)
+                        before = new_before
+                        if self.journal:
+                            # Super lote pendente + cursor: uma queda aqui não perde o que já foi varrido
+                            if reached_end:
+                                cursor_oldest = high_water + 1 if high_water is not None else 0
+                            else:
+                                cursor_oldest = int(new_before) if new_before else None
+                            self.journal.page(dm['id'], batch_msgs.iter_ids(), cursor_oldest)
+                        await lotes.put((batch_msgs, reached_end))
+                        if reached_end:
+                            break
+                except Exception as e:
+                    await lotes.put(e)
+                    return
+                await lotes.put(None)
+
+            lote_producer = asyncio.ensure_future(_fetch_lotes())
 
             # Proteção por canal: qualquer exceção deve marcar o canal como concluído e seguir em frente
             try:
                 while has_more_messages and not self._stop_event.is_set():
-                    print(f"   Buscando super lote de até {SUPER_LOTE_SIZE} mensagens (antes de {before if before else 'início'})...")
-                    batch_msgs, new_before, reached_end = await self._super_lote_get_all_messages(dm, initial_before=before)
-                    before = new_before
+                    item = await lotes.get()
+                    self.metrics.set_queue_depth("super_lote", lotes.qsize())
+                    if item is None:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    batch_msgs, reached_end = item
 
                     count = len(batch_msgs)
                     print(f"   Encontradas {count} mensagens para deletar neste super lote.")
@@ -1319,25 +2558,45 @@ class DiscordMessageDeleter:
                         total_deleted_in_channel += deleted
                         print(f"\n   Chunk finalizado. Total no canal até agora: {total_deleted_in_channel}")
                         # pequeno descanso entre chunks
-                        await asyncio.sleep(2.0)  # Aumentado
+                        await self._traced_sleep(2.0, 'page_delay')  # Aumentado
 
                         # GC após cada chunk
                         gc.collect()
 
                     # Proteção curta entre super lotes
-                    await asyncio.sleep(3.0)  # Aumentado
+                    await self._traced_sleep(3.0, 'page_delay')  # Aumentado
 
                     if reached_end:
                         has_more_messages = False
 
                 processed_channels_count += 1
                 print(f"🏁 Canal {channel_name} finalizado. Total deletado nesse canal: {total_deleted_in_channel}")
+                cap_hit = self.max_total_deletes is not None and self.stats['deleted_count'] >= self.max_total_deletes
+                failed_in_channel = self.stats['failed_count'] - failed_before
+                if not has_more_messages and not self._stop_event.is_set() and not cap_hit:
+                    if self.journal:
+                        self.journal.channel_done(dm['id'])
+                    if dm.get('last_message_id') and failed_in_channel == 0:
+                        self._index_mark_channel_clean(dm['id'], int(dm['last_message_id']), high_water)
+                    elif self.message_index and dm.get('last_message_id') and self.message_filter_spec.is_default:
+                        # Deleções falharam: só a faixa varrida; o canal segue elegível para a próxima execução
+                        print(f"   ⚠️ {failed_in_channel} deleções falharam. O canal será varrido de novo na próxima vez.")
+                        low = high_water + 1 if high_water is not None else 0
+                        self.message_index.record_scan_range(self.user_id, dm['id'], low, int(dm['last_message_id']))
 
             except Exception as e:
                 print(f"⚠️ Erro ao processar canal {channel_name}: {e}")
                 traceback.print_exc()
                 # continue com próximos canais
                 continue
+            finally:
+                self.metrics.drop_queue("super_lote")
+                if not lote_producer.done():
+                    lote_producer.cancel()
+                try:
+                    await lote_producer
+                except (asyncio.CancelledError, Exception):
+                    pass
 
             # Pequena pausa entre canais
             await asyncio.sleep(2.0)  # Aumentado
@@ -1352,6 +2611,8 @@ class DiscordMessageDeleter:
                 await asyncio.sleep(3.0)
                 gc.collect()
 
+        self.end_journal(completed=not self._stop_event.is_set())
+
         # GC final
         gc.collect()
         return processed_channels_count
@@ -1375,14 +2636,8 @@ class DiscordMessageDeleter:
                 pass
 
         # --- CORREÇÃO: REMOÇÃO DO DIRETÓRIO TEMPORÁRIO DO CHROME ---
-        # Usa o caminho salvo em self.temp_user_data_dir (criado em setup_selenium)
-        if hasattr(self, 'temp_user_data_dir') and self.temp_user_data_dir and os.path.exists(self.temp_user_data_dir):
-            try:
-                # O shutil.rmtree remove o diretório e todo o seu conteúdo
-                shutil.rmtree(self.temp_user_data_dir, ignore_errors=True)
-                print(f"🧹 Pasta temporária removida: {self.temp_user_data_dir}")
-            except Exception as e:
-                print(f"⚠️ Erro ao remover temp dir: {e}")
+        # Usa o caminho salvo em self.temp_user_data_dir / self.profile_dir (criados em setup_selenium)
+        self._release_user_data_dir()
         # -------------------------------------------------------------
 
         # fecha o async client de forma segura
@@ -1418,6 +2673,17 @@ class DiscordMessageDeleter:
             except Exception as e:
                 print(f"⚠️ Erro durante shutdown gracioso do loop: {e}")
 
+        self.end_journal(completed=False)
+        self.stop_metrics_server()
+        self.disable_tracing()
+
+        if self.message_index:
+            try:
+                self.message_index.close()
+            except Exception as e:
+                print(f"⚠️ Erro ao fechar índice local: {e}")
+            self.message_index = None
+
         # GC final forçado
         gc.collect()
         print("✅ Cleanup concluído")
@@ -1453,28 +2719,73 @@ def main():
         print("🚀 Discord Message Deleter - VERSÃO FINAL ESTÁVEL")
         print("=" * 60)
 
-        email = input("📧 Email: ")
-        password = input("🔒 Senha: ")
-
-        result = deleter.login(email, password)
+        env_token = load_env_token()
+        if env_token:
+            # Token em DISCORD_TOKEN / .env: sem navegador e sem esperas
+            result = deleter.login_with_token(env_token)
+        else:
+            if os.environ.get(SESSION_CACHE_ENV_VAR, "").lower() in ("1", "true", "yes"):
+                deleter.enable_session_cache(os.environ.get(SESSION_PASSPHRASE_ENV_VAR))
+            email = input("📧 Email: ")
+            # A senha só é pedida se não houver sessão salva válida (ou se ela expirar: 401)
+            result = deleter.login(email, "", password_prompt=lambda: input("🔒 Senha: "))
 
         if result:
             print("✅ Login realizado com sucesso!")
-            # Aguarda um pouco após login bem-sucedido
-            time.sleep(random.uniform(5, 10))
+            if not env_token:
+                # Aguarda um pouco após login bem-sucedido
+                time.sleep(random.uniform(5, 10))
 
             print("👤 Informações do usuário:")
             print(f" ID: {deleter.user_id}")
             print(f" Nome: {deleter.user_info.get('global_name', deleter.user_info.get('username', 'N/A'))}")
             print(f" Email: {deleter.user_info.get('email', 'N/A')}")
 
+            args = sys.argv[1:]
+            if '--reset-index' in args:
+                deleter.reset_message_index()
+            for arg in args:
+                if arg.startswith('--forget-channel='):
+                    deleter.forget_channel_index(arg.split('=', 1)[1].strip())
+
+            resume_mode = '--resume' in args
+            if not resume_mode and deleter.get_pending_journal():
+                print("ℹ️ Existe uma limpeza interrompida. Rode com --resume para continuar de onde parou.")
+
+            if '--dry-run' in args:
+                # Simulação: só conta e estima, nada é deletado
+                active_dms = deleter.run_async(deleter.async_get_active_dms(), timeout=None) or []
+                report = deleter.dry_run(
+                    active_dms,
+                    delay_range=(1.8, 3.5),
+                    progress_callback=lambda idx, tot, name: print(f"   Contando {idx}/{tot}: {name}...", end='\r')
+                )
+                print("\n🧪 Dry-run (nada foi deletado):")
+                print("=" * 60)
+                print(f"{'Canal':30} {'Mensagens':>10} {'Método':>13} {'Tempo':>9}")
+                for row in report['channels']:
+                    count = f"{row['count']:,}" if row['exact'] else f"~{row['count']:,}"
+                    print(f"{row['name'][:30]:30} {count:>10} {row['method']:>13} {format_duration(row['estimated_seconds']):>9}")
+                print("=" * 60)
+                print(f"💭 Total: {report['total_messages']:,} mensagens")
+                print(f"⏱️ Estimativa: {format_duration(report['estimated_seconds'])} (ping médio {report['avg_ping_ms']:.0f}ms)")
+                return
+
             # Processa os canais usando o loop persistente - com handler para interrupt
             print("\n🔥 Iniciando processamento de canais (DMs e Servidores)...")
             deleter.stats['start_time'] = time.time()
 
             # Executa a corrotina principal no loop em thread e aguarda resultado
             try:
-                processed_channels = deleter.run_async(deleter.async_process_channels(), timeout=None)
+                if resume_mode:
+                    pending = deleter.get_pending_journal()
+                    deleter.resume(progress_callback=lambda idx, tot, name: print(f"      Deletando {idx}/{tot} em {name}...", end='\r'))
+                    # Canais concluídos nesta retomada segundo o journal (channel_done)
+                    remaining = deleter.get_pending_journal()
+                    processed_channels = (len(pending['unfinished_channels']) if pending else 0) - (
+                        len(remaining['unfinished_channels']) if remaining else 0)
+                else:
+                    processed_channels = deleter.run_async(deleter.async_process_channels(), timeout=None)
             except KeyboardInterrupt:
                 print("\n⏹️ Operação cancelada pelo usuário (KeyboardInterrupt).")
                 processed_channels = 0
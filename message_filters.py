@@ -0,0 +1,167 @@
+# message_filters.py - Critérios de exclusão em uma única especificação, compilada num predicado
+import re
+from datetime import datetime
+from typing import Optional, Iterable, Callable, Dict
+
+from snowflakes import datetime_to_snowflake
+
+# Tipos que podem ser apagados pelo autor: mensagem normal (0) e resposta (19)
+DELETABLE_TYPES = (0, 19)
+REPLY_TYPE = 19
+
+
+class FilterSpec:
+    """
+    Quais mensagens apagar. Intervalos de tempo viram limites de snowflake na criação,
+    então o predicado compara só inteiros.
+    - author_id:         só mensagens deste autor (o deleter preenche com a conta logada)
+    - types:             tipos aceitos (None = qualquer)
+    - include_pinned:    False preserva mensagens fixadas
+    - after_id/before_id, after_time/before_time: janela exclusiva (after < id < before)
+    - has_attachments:   True = só com anexos, False = só sem anexos, None = tanto faz
+    - content_regex:     só mensagens cujo texto casa com a regex (sem diferenciar maiúsculas)
+    - is_reply:          True = só respostas, False = só não-respostas, None = tanto faz
+    - reply_to_user_id:  só respostas a mensagens deste usuário
+    """
+
+    def __init__(self,
+                 author_id: Optional[str] = None,
+                 types: Optional[Iterable[int]] = DELETABLE_TYPES,
+                 include_pinned: bool = False,
+                 after_id: Optional[int] = None,
+                 before_id: Optional[int] = None,
+                 after_time: Optional[datetime] = None,
+                 before_time: Optional[datetime] = None,
+                 has_attachments: Optional[bool] = None,
+                 content_regex: Optional[str] = None,
+                 is_reply: Optional[bool] = None,
+                 reply_to_user_id: Optional[str] = None):
+        self.author_id = str(author_id) if author_id is not None else None
+        self.types = tuple(sorted(set(types))) if types is not None else None
+        self.include_pinned = include_pinned
+        if after_time is not None:
+            time_after = datetime_to_snowflake(after_time) - 1
+            after_id = time_after if after_id is None else max(int(after_id), time_after)
+        if before_time is not None:
+            time_before = datetime_to_snowflake(before_time)
+            before_id = time_before if before_id is None else min(int(before_id), time_before)
+        self.after_id = int(after_id) if after_id is not None else None
+        self.before_id = int(before_id) if before_id is not None else None
+        self.has_attachments = has_attachments
+        self.content_regex = content_regex or None
+        if self.content_regex:
+            re.compile(self.content_regex)  # Regex inválida falha aqui, não no meio da limpeza
+        self.is_reply = is_reply
+        self.reply_to_user_id = str(reply_to_user_id) if reply_to_user_id else None
+
+    @property
+    def is_default(self) -> bool:
+        """Critério padrão (todas as mensagens apagáveis, fixadas preservadas): o índice local vale."""
+        return (
+            self.types == DELETABLE_TYPES and not self.include_pinned
+            and self.after_id is None and self.before_id is None
+            and self.has_attachments is None and self.content_regex is None
+            and self.is_reply is None and self.reply_to_user_id is None
+        )
+
+    @property
+    def needs_full_message(self) -> bool:
+        """Critérios que olham campos fora da decodificação projetada (texto, autor da mensagem respondida)."""
+        return self.content_regex is not None or self.reply_to_user_id is not None
+
+    def with_author(self, author_id: Optional[str]) -> 'FilterSpec':
+        spec = FilterSpec.from_dict(self.to_dict())
+        spec.author_id = str(author_id) if author_id is not None else None
+        return spec
+
+    def narrow_window(self, after_id: Optional[int], before_id: Optional[int]):
+        """Interseção da janela pedida com a janela do filtro (para a descoberta não buscar fora dela)."""
+        if self.after_id is not None:
+            after_id = self.after_id if after_id is None else max(after_id, self.after_id)
+        if self.before_id is not None:
+            before_id = self.before_id if before_id is None else min(before_id, self.before_id)
+        return after_id, before_id
+
+    def to_dict(self) -> Dict:
+        return {
+            'author_id': self.author_id,
+            'types': list(self.types) if self.types is not None else None,
+            'include_pinned': self.include_pinned,
+            'after_id': self.after_id,
+            'before_id': self.before_id,
+            'has_attachments': self.has_attachments,
+            'content_regex': self.content_regex,
+            'is_reply': self.is_reply,
+            'reply_to_user_id': self.reply_to_user_id,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> 'FilterSpec':
+        return cls(**dict(data or {}))
+
+    def compile(self) -> Callable[[Dict], bool]:
+        return compile_filter(self)
+
+    def __repr__(self):
+        active = {k: v for k, v in self.to_dict().items() if v not in (None, False)}
+        return f"FilterSpec({active})"
+
+
+def _author_id(m: Dict) -> Optional[str]:
+    return (m.get('author') or {}).get('id')
+
+
+def _replied_author_id(m: Dict) -> Optional[str]:
+    return _author_id(m.get('referenced_message') or {})
+
+
+def _both(first: Callable[[Dict], bool], rest: Callable[[Dict], bool]) -> Callable[[Dict], bool]:
+    # Encadeia com "and" (curto-circuito na ordem da lista) sem o custo de all() + gerador
+    return lambda m: first(m) and rest(m)
+
+
+def compile_filter(spec: FilterSpec) -> Callable[[Dict], bool]:
+    """
+    Monta uma lista de predicados pequenos só com os critérios ativos (na ordem mais barata
+    primeiro) e devolve um predicado que exige todos. Os valores ficam presos nas closures.
+    O predicado recebe a mensagem no formato da API (dict completo ou projetado).
+    """
+    checks = []
+
+    if spec.author_id is not None:
+        author = spec.author_id
+        checks.append(lambda m: _author_id(m) == author)
+    if spec.types is not None:
+        types = frozenset(spec.types)
+        checks.append(lambda m: m.get('type', 0) in types)
+    if not spec.include_pinned:
+        checks.append(lambda m: not m.get('pinned', False))
+    if spec.is_reply is True:
+        checks.append(lambda m: m.get('type', 0) == REPLY_TYPE)
+    elif spec.is_reply is False:
+        checks.append(lambda m: m.get('type', 0) != REPLY_TYPE)
+    if spec.after_id is not None and spec.before_id is not None:
+        after, before = spec.after_id, spec.before_id
+        checks.append(lambda m: after < int(m['id']) < before)
+    elif spec.after_id is not None:
+        after = spec.after_id
+        checks.append(lambda m: int(m['id']) > after)
+    elif spec.before_id is not None:
+        before = spec.before_id
+        checks.append(lambda m: int(m['id']) < before)
+    if spec.has_attachments is not None:
+        wanted = spec.has_attachments
+        checks.append(lambda m: bool(m.get('attachments')) == wanted)
+    if spec.reply_to_user_id is not None:
+        reply_to = spec.reply_to_user_id
+        checks.append(lambda m: _replied_author_id(m) == reply_to)
+    if spec.content_regex is not None:
+        rx = re.compile(spec.content_regex, re.IGNORECASE)
+        checks.append(lambda m: rx.search(m.get('content') or '') is not None)
+
+    if not checks:
+        return lambda m: True
+    predicate = checks[-1]
+    for check in reversed(checks[:-1]):
+        predicate = _both(check, predicate)
+    return predicate
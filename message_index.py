@@ -0,0 +1,190 @@
+# message_index.py - Índice local (SQLite) do que já foi varrido/deletado, por conta e canal
+import os
+import time
+import sqlite3
+import threading
+from typing import Optional, Dict, Iterable, List
+
+# Deleções ficam em buffer e vão para o disco em lotes
+DELETED_FLUSH_SIZE = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS channel_state (
+    account_id      TEXT NOT NULL,
+    channel_id      TEXT NOT NULL,
+    last_message_id INTEGER,            -- last_message_id do canal no momento da varredura
+    high_water_id   INTEGER,            -- tudo com id <= high_water_id já foi varrido e limpo
+    complete        INTEGER NOT NULL DEFAULT 0,
+    updated_at      REAL NOT NULL,
+    PRIMARY KEY (account_id, channel_id)
+);
+CREATE TABLE IF NOT EXISTS scanned_ranges (
+    account_id TEXT NOT NULL,
+    channel_id TEXT NOT NULL,
+    low_id     INTEGER NOT NULL,
+    high_id    INTEGER NOT NULL,
+    scanned_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scanned_ranges_channel ON scanned_ranges (account_id, channel_id);
+CREATE TABLE IF NOT EXISTS deleted_messages (
+    account_id TEXT NOT NULL,
+    message_id INTEGER NOT NULL,
+    channel_id TEXT NOT NULL,
+    deleted_at REAL NOT NULL,
+    PRIMARY KEY (account_id, message_id)
+) WITHOUT ROWID;
+"""
+
+
+class MessageIndex:
+    """
+    Índice persistente por (conta, canal):
+    - faixas de IDs já varridas
+    - IDs deletados
+    - last_message_id do canal na varredura e o high-water mark da última limpeza completa
+    Seguro para uso a partir do loop async e da thread do Streamlit (uma conexão + lock).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._pending_deleted: List[tuple] = []
+
+    # ----------------------------
+    # Estado do canal
+    # ----------------------------
+    def get_channel_state(self, account_id: str, channel_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_message_id, high_water_id, complete, updated_at FROM channel_state "
+                "WHERE account_id = ? AND channel_id = ?",
+                (str(account_id), str(channel_id))
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            'last_message_id': row[0],
+            'high_water_id': row[1],
+            'complete': bool(row[2]),
+            'updated_at': row[3],
+        }
+
+    def can_skip(self, account_id: str, channel_id: str, last_message_id) -> bool:
+        """
+        True se o canal foi limpo por completo e não recebeu mensagens desde então
+        (last_message_id igual ao da varredura e coberto pelo high-water mark).
+        """
+        if not last_message_id:
+            return False
+        state = self.get_channel_state(account_id, channel_id)
+        if not state or not state['complete'] or state['high_water_id'] is None:
+            return False
+        current = int(last_message_id)
+        return state['last_message_id'] == current and state['high_water_id'] >= current
+
+    def high_water(self, account_id: str, channel_id: str) -> Optional[int]:
+        """High-water mark da última limpeza completa (None se o canal nunca foi limpo por inteiro)."""
+        state = self.get_channel_state(account_id, channel_id)
+        if not state or not state['complete']:
+            return None
+        return state['high_water_id']
+
+    def mark_complete(self, account_id: str, channel_id: str, last_message_id, high_water_id) -> None:
+        """Registra uma limpeza completa do canal até high_water_id."""
+        self.flush()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO channel_state (account_id, channel_id, last_message_id, high_water_id, complete, updated_at) "
+                "VALUES (?, ?, ?, ?, 1, ?) "
+                "ON CONFLICT (account_id, channel_id) DO UPDATE SET "
+                "last_message_id = excluded.last_message_id, high_water_id = excluded.high_water_id, "
+                "complete = 1, updated_at = excluded.updated_at",
+                (
+                    str(account_id), str(channel_id),
+                    int(last_message_id) if last_message_id else None,
+                    int(high_water_id) if high_water_id is not None else None,
+                    time.time(),
+                )
+            )
+            self._conn.commit()
+
+    # ----------------------------
+    # Faixas varridas e deleções
+    # ----------------------------
+    def record_scan_range(self, account_id: str, channel_id: str, low_id, high_id) -> None:
+        """Registra que os IDs em [low_id, high_id] do canal foram varridos."""
+        if low_id is None or high_id is None or int(low_id) > int(high_id):
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO scanned_ranges (account_id, channel_id, low_id, high_id, scanned_at) VALUES (?, ?, ?, ?, ?)",
+                (str(account_id), str(channel_id), int(low_id), int(high_id), time.time())
+            )
+            self._conn.commit()
+
+    def record_deleted(self, account_id: str, channel_id: str, message_ids: Iterable) -> None:
+        """Acumula IDs deletados; grava em lote a cada DELETED_FLUSH_SIZE."""
+        now = time.time()
+        with self._lock:
+            self._pending_deleted.extend((str(account_id), int(mid), str(channel_id), now) for mid in message_ids)
+            should_flush = len(self._pending_deleted) >= DELETED_FLUSH_SIZE
+        if should_flush:
+            self.flush()
+
+    def deleted_count(self, account_id: str, channel_id: Optional[str] = None) -> int:
+        self.flush()
+        with self._lock:
+            if channel_id is None:
+                row = self._conn.execute(
+                    "SELECT COUNT(*) FROM deleted_messages WHERE account_id = ?", (str(account_id),)
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT COUNT(*) FROM deleted_messages WHERE account_id = ? AND channel_id = ?",
+                    (str(account_id), str(channel_id))
+                ).fetchone()
+        return row[0]
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._pending_deleted:
+                return
+            pending, self._pending_deleted = self._pending_deleted, []
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO deleted_messages (account_id, message_id, channel_id, deleted_at) VALUES (?, ?, ?, ?)",
+                pending
+            )
+            self._conn.commit()
+
+    def forget_channel(self, account_id: str, channel_id: str) -> None:
+        """Remove o estado do canal (força uma varredura completa na próxima vez)."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM channel_state WHERE account_id = ? AND channel_id = ?", (str(account_id), str(channel_id))
+            )
+            self._conn.execute(
+                "DELETE FROM scanned_ranges WHERE account_id = ? AND channel_id = ?", (str(account_id), str(channel_id))
+            )
+            self._conn.commit()
+
+    def forget_account(self, account_id: str) -> int:
+        """Remove o estado de todos os canais da conta; devolve quantos canais estavam marcados."""
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM channel_state WHERE account_id = ?", (str(account_id),))
+            self._conn.execute("DELETE FROM scanned_ranges WHERE account_id = ?", (str(account_id),))
+            self._conn.commit()
+        return cur.rowcount
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._conn.close()
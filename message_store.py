@@ -0,0 +1,111 @@
+# message_store.py - Armazenamento compacto das mensagens candidatas à exclusão
+from array import array
+from typing import Dict, Iterable, Iterator, Optional
+
+# Flags (bits) guardadas por mensagem
+FLAG_PINNED = 1
+FLAG_ATTACHMENTS = 2
+FLAG_REPLY = 4
+FLAG_EMBEDS = 8
+
+
+def message_flags(msg: Dict) -> int:
+    """Extrai as flags compactas de uma mensagem da API."""
+    flags = 0
+    if msg.get('pinned'):
+        flags |= FLAG_PINNED
+    if msg.get('attachments'):
+        flags |= FLAG_ATTACHMENTS
+    if msg.get('message_reference') or msg.get('type') == 19:
+        flags |= FLAG_REPLY
+    if msg.get('embeds'):
+        flags |= FLAG_EMBEDS
+    return flags
+
+
+class StoredMessage:
+    """Visão de uma mensagem do MessageStore (criada sob demanda, não fica em memória)."""
+    __slots__ = ('id', 'type', 'flags')
+
+    def __init__(self, message_id: int, type_: int, flags: int):
+        self.id = message_id
+        self.type = type_
+        self.flags = flags
+
+    @property
+    def pinned(self) -> bool:
+        return bool(self.flags & FLAG_PINNED)
+
+    def __getitem__(self, key):
+        # Compatibilidade com o código que ainda trata mensagens como dict (msg['id'])
+        if key == 'id':
+            return str(self.id)
+        if key == 'pinned':
+            return self.pinned
+        if key == 'type':
+            return self.type
+        raise KeyError(key)
+
+    def __repr__(self):
+        return f"StoredMessage(id={self.id}, type={self.type}, flags={self.flags})"
+
+
+class MessageStore:
+    """
+    Lista compacta de mensagens: snowflakes em array('Q') (8 bytes) + tipo e flags em array('B')
+    (1 byte cada) - ~10 bytes por mensagem em vez de um dict completo da API (KBs com embeds,
+    author, reactions...). Itera como StoredMessage e aceita fatias (store[a:b]).
+    """
+    __slots__ = ('_ids', '_types', '_flags')
+
+    def __init__(self, message_ids: Optional[Iterable] = None):
+        self._ids = array('Q')
+        self._types = array('B')
+        self._flags = array('B')
+        if message_ids is not None:
+            for mid in message_ids:
+                self.append(mid)
+
+    def append(self, message_id, type_: int = 0, flags: int = 0):
+        self._ids.append(int(message_id))
+        self._types.append(type_ & 0xFF)
+        self._flags.append(flags & 0xFF)
+
+    def append_message(self, msg: Dict):
+        """Guarda só o que a exclusão/filtros usam de uma mensagem da API."""
+        self.append(msg['id'], msg.get('type') or 0, message_flags(msg))
+
+    def extend_messages(self, msgs: Iterable[Dict]):
+        for msg in msgs:
+            self.append_message(msg)
+
+    def iter_ids(self) -> Iterator[str]:
+        """IDs como string (formato usado nas URLs da API)."""
+        for mid in self._ids:
+            yield str(mid)
+
+    def nbytes(self) -> int:
+        """Memória ocupada pelas colunas (sem o overhead fixo dos objetos)."""
+        return sum(col.itemsize * len(col) for col in (self._ids, self._types, self._flags))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __bool__(self) -> bool:
+        return len(self._ids) > 0
+
+    def __iter__(self) -> Iterator[StoredMessage]:
+        for mid, type_, flags in zip(self._ids, self._types, self._flags):
+            yield StoredMessage(mid, type_, flags)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            part = MessageStore()
+            part._ids = self._ids[index]
+            part._types = self._types[index]
+            part._flags = self._flags[index]
+            return part
+        return StoredMessage(self._ids[index], self._types[index], self._flags[index])
+
+    def __repr__(self):
+        return f"MessageStore({len(self)} mensagens, {self.nbytes()} bytes)"
@@ -0,0 +1,228 @@
+# metrics.py - Registro de métricas (latência por rota, status, 429, filas, deleções/s) e export OpenMetrics
+import time
+import threading
+from bisect import bisect_left
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+# Limites superiores (segundos) dos buckets do histograma de latência
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Janela usada para a taxa "recente" de deleções/s
+DELETE_RATE_WINDOW = 60.0
+METRIC_PREFIX = 'dmd'
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+class LatencyHistogram:
+    """Histograma de buckets fixos (cumulativo só na exportação) com soma e contagem."""
+    __slots__ = ('counts', 'total', 'count', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # último = +Inf
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimativa do quantil por interpolação linear dentro do bucket (como histogram_quantile)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= rank:
+                lower = LATENCY_BUCKETS[i - 1] if i > 0 else 0.0
+                upper = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / c, self.max)
+            seen += c
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'avg_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': self.quantile(0.5) * 1000,
+            'p90_ms': self.quantile(0.9) * 1000,
+            'p99_ms': self.quantile(0.99) * 1000,
+            'max_ms': self.max * 1000,
+        }
+
+
+class MetricsRegistry:
+    """
+    Métricas da execução, atualizadas pelo event loop e lidas pela UI / endpoint /metrics
+    (outra thread), por isso protegidas por lock.
+    - latência por rota (template de split_route) e contagem por (rota, status)
+    - tempo aguardando rate limit
+    - profundidade das filas (stream por canal, super lotes)
+    - deleções ok/falhas e deleções/s (total e na janela recente)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started: Optional[float] = None  # primeira deleção (tempo ocioso antes não dilui a taxa)
+            self.latency: Dict[str, LatencyHistogram] = {}
+            self.requests: Dict[Tuple[str, str], int] = {}
+            self.rate_limit_wait = 0.0
+            self.queue_depths: Dict[str, int] = {}
+            self.deletes = {'ok': 0, 'failed': 0}
+            self._recent_deletes = deque()
+
+    def observe_request(self, route: str, status, seconds: Optional[float] = None):
+        """Registra um request terminado; status pode ser o código HTTP ou 'timeout' / 'error'."""
+        with self._lock:
+            key = (route, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if seconds is not None:
+                hist = self.latency.get(route)
+                if hist is None:
+                    hist = self.latency[route] = LatencyHistogram()
+                hist.observe(seconds)
+
+    def add_rate_limit_wait(self, seconds: float):
+        if seconds > 0:
+            with self._lock:
+                self.rate_limit_wait += seconds
+
+    def set_queue_depth(self, queue: str, depth: int):
+        with self._lock:
+            self.queue_depths[queue] = depth
+
+    def drop_queue(self, queue: str):
+        with self._lock:
+            self.queue_depths.pop(queue, None)
+
+    def record_delete(self, ok: bool):
+        now = time.monotonic()
+        with self._lock:
+            if self.started is None:
+                self.started = now
+            self.deletes['ok' if ok else 'failed'] += 1
+            if ok:
+                self._recent_deletes.append(now)
+            self._trim(now)
+
+    def _trim(self, now: float):
+        recent = self._recent_deletes
+        while recent and now - recent[0] > DELETE_RATE_WINDOW:
+            recent.popleft()
+
+    def _delete_rates(self) -> Tuple[float, float]:
+        if self.started is None:
+            return 0.0, 0.0
+        now = time.monotonic()
+        self._trim(now)
+        elapsed = max(now - self.started, 1e-9)
+        window = min(elapsed, DELETE_RATE_WINDOW)
+        return self.deletes['ok'] / elapsed, len(self._recent_deletes) / window
+
+    def snapshot(self) -> Dict:
+        """Cópia simples (dicts/números) para get_stats() e a UI."""
+        with self._lock:
+            overall, recent = self._delete_rates()
+            status: Dict[str, Dict[str, int]] = {}
+            for (route, code), n in self.requests.items():
+                status.setdefault(route, {})[code] = n
+            return {
+                'latency': {route: hist.to_dict() for route, hist in self.latency.items()},
+                'status': status,
+                'rate_limit_wait_seconds': self.rate_limit_wait,
+                'queue_depths': dict(self.queue_depths),
+                'deletes_ok': self.deletes['ok'],
+                'deletes_failed': self.deletes['failed'],
+                'deletes_per_second': overall,
+                'deletes_per_second_recent': recent,
+            }
+
+    def render_openmetrics(self) -> str:
+        """Texto no formato OpenMetrics (aceito pelo Prometheus)."""
+        p = METRIC_PREFIX
+        lines = []
+        with self._lock:
+            overall, recent = self._delete_rates()
+
+            lines.append(f'# TYPE {p}_request_duration_seconds histogram')
+            lines.append(f'# UNIT {p}_request_duration_seconds seconds')
+            for route, hist in sorted(self.latency.items()):
+                label = f'route="{_escape(route)}"'
+                cumulative = 0
+                for bound, c in zip(LATENCY_BUCKETS, hist.counts):
+                    cumulative += c
+                    lines.append(f'{p}_request_duration_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f'{p}_request_duration_seconds_bucket{{{label},le="+Inf"}} {hist.count}')
+                lines.append(f'{p}_request_duration_seconds_sum{{{label}}} {hist.total:.6f}')
+                lines.append(f'{p}_request_duration_seconds_count{{{label}}} {hist.count}')
+
+            lines.append(f'# TYPE {p}_requests counter')
+            for (route, code), n in sorted(self.requests.items()):
+                lines.append(f'{p}_requests_total{{route="{_escape(route)}",status="{_escape(code)}"}} {n}')
+
+            lines.append(f'# TYPE {p}_rate_limit_wait_seconds counter')
+            lines.append(f'# UNIT {p}_rate_limit_wait_seconds seconds')
+            lines.append(f'{p}_rate_limit_wait_seconds_total {self.rate_limit_wait:.6f}')
+
+            lines.append(f'# TYPE {p}_queue_depth gauge')
+            for queue, depth in sorted(self.queue_depths.items()):
+                lines.append(f'{p}_queue_depth{{queue="{_escape(queue)}"}} {depth}')
+
+            lines.append(f'# TYPE {p}_deletes counter')
+            for result, n in sorted(self.deletes.items()):
+                lines.append(f'{p}_deletes_total{{result="{result}"}} {n}')
+
+            lines.append(f'# TYPE {p}_deletes_per_second gauge')
+            lines.append(f'{p}_deletes_per_second{{window="run"}} {overall:.4f}')
+            lines.append(f'{p}_deletes_per_second{{window="{int(DELETE_RATE_WINDOW)}s"}} {recent:.4f}')
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, fmt, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.registry.render_openmetrics().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', OPENMETRICS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """Endpoint local GET /metrics servido numa thread daemon."""
+    daemon_threads = True
+
+    def __init__(self, registry: MetricsRegistry, host: str = '127.0.0.1', port: int = 9464):
+        super().__init__((host, port), _MetricsHandler)
+        self.registry = registry
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/metrics'
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
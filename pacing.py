@@ -0,0 +1,74 @@
+# pacing.py - Controle adaptativo (AIMD) do intervalo entre deleções
+import random
+from typing import Tuple
+
+# Aumento aditivo: fração da faixa de taxas (min..max) somada a cada deleção bem-sucedida
+AIMD_INCREASE_FRACTION = 0.05
+# Redução multiplicativa da taxa a cada 429
+AIMD_DECREASE_FACTOR = 0.5
+# Variação aleatória em torno do intervalo calculado (evita um ritmo mecânico)
+AIMD_JITTER = 0.1
+
+
+class AIMDPacer:
+    """
+    Ajusta a taxa de deleções (msgs/s) por additive-increase / multiplicative-decrease:
+    - cada deleção ok soma um passo fixo à taxa (intervalo encolhe aos poucos)
+    - cada 429 corta a taxa pela metade (intervalo cresce rápido)
+    Os delays escolhidos pelo usuário viram os limites: min_delay = teto da taxa, max_delay = piso.
+    Começa no ritmo mais lento (max_delay) e converge para a maior taxa sustentável.
+    """
+
+    def __init__(self, min_delay: float, max_delay: float,
+                 increase_fraction: float = AIMD_INCREASE_FRACTION,
+                 decrease_factor: float = AIMD_DECREASE_FACTOR,
+                 jitter: float = AIMD_JITTER):
+        if min_delay > max_delay:
+            min_delay, max_delay = max_delay, min_delay
+        self.min_delay = max(float(min_delay), 0.01)
+        self.max_delay = max(float(max_delay), self.min_delay)
+        self.max_rate = 1.0 / self.min_delay
+        self.min_rate = 1.0 / self.max_delay
+        self.step = (self.max_rate - self.min_rate) * increase_fraction
+        self.decrease_factor = decrease_factor
+        self.jitter = jitter
+        self.rate = self.min_rate
+        self.successes = 0
+        self.throttles = 0
+
+    @property
+    def bounds(self) -> Tuple[float, float]:
+        return self.min_delay, self.max_delay
+
+    @property
+    def delay(self) -> float:
+        """Intervalo atual (sem jitter) entre deleções."""
+        return 1.0 / self.rate
+
+    def on_success(self):
+        self.successes += 1
+        self.rate = min(self.rate + self.step, self.max_rate)
+
+    def on_throttle(self):
+        self.throttles += 1
+        self.rate = max(self.rate * self.decrease_factor, self.min_rate)
+
+    def estimate_seconds(self, count: int, request_latency: float = 0.0) -> float:
+        """
+        Tempo previsto para count deleções a partir da taxa atual, supondo nenhum 429:
+        rampa aditiva até a taxa máxima e depois ritmo constante, mais a latência de cada DELETE.
+        """
+        rate = self.rate
+        total = 0.0
+        done = 0
+        while done < count and rate < self.max_rate:
+            total += 1.0 / rate
+            rate = min(rate + self.step, self.max_rate)
+            done += 1
+        total += (count - done) / self.max_rate
+        return total + count * request_latency
+
+    def next_delay(self) -> float:
+        """Intervalo até a próxima deleção, com jitter e sempre dentro de [min_delay, max_delay]."""
+        delay = self.delay * random.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+        return min(max(delay, self.min_delay), self.max_delay)
@@ -0,0 +1,130 @@
+# page_decoder.py - Decodificação "projetada" das páginas de mensagens (só os campos usados)
+import json
+from functools import lru_cache
+from typing import Callable, List, Dict, Optional, Tuple
+
+# Backend opcional: msgspec decodifica direto para structs e pula os campos não declarados
+# (reactions, author completo...) sem montar os objetos; orjson faz o parse completo,
+# mas bem mais rápido que o json da stdlib. Sem nenhum dos dois, usa json + projeção.
+# O backend só é importado na primeira página decodificada (import do motor fica leve).
+BACKENDS = ('msgspec', 'orjson', 'json')
+
+
+def _project(msg: Dict) -> Dict:
+    """
+    Campos usados pela exclusão/filtros e pelas flags do MessageStore. attachments, embeds e
+    message_reference viram booleanos (presença): o conteúdo não é usado e é a parte pesada da página.
+    """
+    author = msg.get('author') or {}
+    return {
+        'id': msg['id'],
+        'author': {'id': author.get('id')},
+        'type': msg.get('type', 0),
+        'pinned': msg.get('pinned', False),
+        'timestamp': msg.get('timestamp'),
+        'attachments': bool(msg.get('attachments')),
+        'embeds': bool(msg.get('embeds')),
+        'message_reference': bool(msg.get('message_reference')),
+    }
+
+
+def _raw_present(raw) -> bool:
+    """msgspec.Raw não vazio (nem [], nem null)."""
+    data = bytes(raw).strip()
+    return data not in (b'', b'[]', b'null', b'{}')
+
+
+def _build_msgspec() -> Optional[Callable[[bytes], List[Dict]]]:
+    try:
+        import msgspec
+    except ImportError:
+        return None
+
+    class _Author(msgspec.Struct):
+        id: Optional[str] = None
+
+    class _Message(msgspec.Struct):
+        id: str
+        author: Optional[_Author] = None
+        type: int = 0
+        pinned: bool = False
+        timestamp: Optional[str] = None
+        # Raw: guarda só a fatia de bytes, sem decodificar embeds/anexos
+        attachments: msgspec.Raw = msgspec.Raw()
+        embeds: msgspec.Raw = msgspec.Raw()
+        message_reference: msgspec.Raw = msgspec.Raw()
+
+    decoder = msgspec.json.Decoder(List[_Message])
+
+    def _decode_msgspec(content: bytes) -> List[Dict]:
+        return [
+            {
+                'id': m.id,
+                'author': {'id': m.author.id if m.author is not None else None},
+                'type': m.type,
+                'pinned': m.pinned,
+                'timestamp': m.timestamp,
+                'attachments': _raw_present(m.attachments),
+                'embeds': _raw_present(m.embeds),
+                'message_reference': _raw_present(m.message_reference),
+            }
+            for m in decoder.decode(content)
+        ]
+
+    return _decode_msgspec
+
+
+def _build_orjson() -> Optional[Callable[[bytes], List[Dict]]]:
+    try:
+        import orjson
+    except ImportError:
+        return None
+
+    def _decode_orjson(content: bytes) -> List[Dict]:
+        return [_project(m) for m in orjson.loads(content)]
+
+    return _decode_orjson
+
+
+def _decode_stdlib(content: bytes) -> List[Dict]:
+    return [_project(m) for m in json.loads(content)]
+
+
+def build_decoder(backend: str) -> Optional[Callable[[bytes], List[Dict]]]:
+    """Decodificador projetado de um backend específico (None se não estiver instalado)."""
+    if backend == 'msgspec':
+        return _build_msgspec()
+    if backend == 'orjson':
+        return _build_orjson()
+    return _decode_stdlib
+
+
+@lru_cache(maxsize=None)
+def _active_decoder() -> Tuple[str, Callable[[bytes], List[Dict]]]:
+    for backend in BACKENDS:
+        decode = build_decoder(backend)
+        if decode is not None:
+            return backend, decode
+    return 'json', _decode_stdlib
+
+
+def page_decoder_backend() -> str:
+    """Backend em uso ('msgspec', 'orjson' ou 'json')."""
+    return _active_decoder()[0]
+
+
+def decode_message_page(content: bytes) -> List[Dict]:
+    """
+    Decodifica uma página de GET /channels/{id}/messages mantendo só
+    id, author.id, type, pinned e timestamp (mesmo formato aninhado da API), mais
+    attachments/embeds/message_reference como booleanos.
+    Respostas que não são lista (ex.: erro) são devolvidas como vieram.
+    """
+    try:
+        return _active_decoder()[1](content)
+    except Exception:
+        # Formato inesperado para o backend tipado: parse completo como antes
+        data = json.loads(content)
+        if not isinstance(data, list):
+            return data
+        return [_project(m) for m in data if isinstance(m, dict) and 'id' in m]
@@ -0,0 +1,131 @@
+# rate_limits.py - Controle de rate limit por bucket, guiado pelos headers X-RateLimit-* do Discord
+import re
+import time
+import asyncio
+from typing import Optional, Dict, Tuple
+from urllib.parse import urlsplit
+
+# Parâmetros "major": o Discord separa os buckets por canal/servidor/webhook
+MAJOR_PARAMETERS = ('channels', 'guilds', 'webhooks')
+# Limite global do Discord para usuários (requests por segundo)
+GLOBAL_REQUESTS_PER_SECOND = 50.0
+
+_API_PREFIX = re.compile(r'^/api/v\d+')
+
+
+def split_route(method: str, url: str) -> Tuple[str, str]:
+    """
+    Separa a URL em (rota, parâmetro major).
+    Ex.: DELETE .../channels/123/messages/456 -> ("DELETE /channels/:major/messages/:id", "123")
+    """
+    path = _API_PREFIX.sub('', urlsplit(url).path)
+    parts = [p for p in path.split('/') if p]
+    major = ''
+    template = []
+    for i, part in enumerate(parts):
+        if i == 1 and parts[0] in MAJOR_PARAMETERS:
+            major = part
+            template.append(':major')
+        elif part.isdigit():
+            template.append(':id')
+        else:
+            template.append(part)
+    return f"{method.upper()} /{'/'.join(template)}", major
+
+
+class _BucketState:
+    __slots__ = ('limit', 'remaining', 'reset_at')
+
+    def __init__(self, limit: int, remaining: int, reset_at: float):
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_at = reset_at
+
+
+class RateLimiter:
+    """
+    Libera cada request assim que o bucket dela permite, em vez de um delay fixo:
+    - aprende o bucket de cada rota pelo header X-RateLimit-Bucket
+    - acompanha Remaining / Reset-After por (bucket, parâmetro major)
+    - 429 global (ou Scope: global) pausa todas as rotas até o reset
+    - espaçamento mínimo global de 1/GLOBAL_REQUESTS_PER_SECOND
+    Usado apenas dentro do event loop (não é thread-safe).
+    """
+
+    def __init__(self, global_requests_per_second: float = GLOBAL_REQUESTS_PER_SECOND):
+        self._route_buckets: Dict[str, str] = {}  # rota -> hash do bucket
+        self._buckets: Dict[str, _BucketState] = {}  # "hash:major" -> estado
+        self._global_reset_at = 0.0
+        self._min_interval = 1.0 / global_requests_per_second if global_requests_per_second else 0.0
+        self._next_slot = 0.0
+
+    def _state_key(self, route: str, major: str) -> str:
+        bucket = self._route_buckets.get(route, route)
+        return f"{bucket}:{major}"
+
+    async def acquire(self, method: str, url: str) -> float:
+        """Aguarda até a rota poder ser chamada e reserva uma vaga no bucket. Retorna o tempo esperado."""
+        route, major = split_route(method, url)
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            state = self._buckets.get(self._state_key(route, major))
+            if self._global_reset_at > now:
+                wait = self._global_reset_at - now
+            elif state is not None and state.remaining <= 0 and state.reset_at > now:
+                wait = state.reset_at - now
+            else:
+                break
+            await asyncio.sleep(wait)
+            waited += wait
+
+        if state is not None:
+            state.remaining -= 1
+
+        if self._min_interval:
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._min_interval
+            if slot > now:
+                await asyncio.sleep(slot - now)
+                waited += slot - now
+
+        return waited
+
+    def update(self, method: str, url: str, headers, status_code: int,
+               retry_after: Optional[float] = None, is_global: bool = False) -> None:
+        """Atualiza o estado a partir da resposta (headers X-RateLimit-* e, em 429, retry_after)."""
+        route, major = split_route(method, url)
+        now = time.monotonic()
+
+        bucket = headers.get('x-ratelimit-bucket')
+        if bucket:
+            self._route_buckets[route] = bucket
+        key = self._state_key(route, major)
+
+        scope = (headers.get('x-ratelimit-scope') or '').lower()
+        if status_code == 429 and (is_global or scope == 'global' or headers.get('x-ratelimit-global', '').lower() == 'true'):
+            self._global_reset_at = max(self._global_reset_at, now + (retry_after or 1.0))
+            return
+
+        remaining = headers.get('x-ratelimit-remaining')
+        reset_after = headers.get('x-ratelimit-reset-after')
+        limit = headers.get('x-ratelimit-limit')
+        try:
+            if remaining is not None and reset_after is not None:
+                self._buckets[key] = _BucketState(
+                    int(limit) if limit is not None else 0,
+                    int(remaining),
+                    now + float(reset_after)
+                )
+        except ValueError:
+            pass
+
+        if status_code == 429:
+            # 429 de rota (user/shared): bucket vazio até o retry_after
+            state = self._buckets.get(key)
+            reset_at = now + (retry_after if retry_after is not None else 1.0)
+            if state is None:
+                self._buckets[key] = _BucketState(0, 0, reset_at)
+            else:
+                state.remaining = 0
+                state.reset_at = max(state.reset_at, reset_at)
@@ -0,0 +1,191 @@
+# session_cache.py - Cache opcional e criptografado da sessão (token) para não repetir o login pelo navegador
+import os
+import json
+import time
+import base64
+import hashlib
+from functools import lru_cache
+from typing import Optional, Dict, List, Tuple
+
+# Backends opcionais: keyring usa o cofre do sistema (Windows Credential Manager, Keychain, Secret Service);
+# cryptography cifra o arquivo local com uma chave derivada da frase-senha. Sem nenhum dos dois, nada é salvo:
+# o token nunca vai para o disco em texto puro.
+# Os dois são importados só quando a sessão salva é usada (a feature é opt-in; o import do motor fica leve).
+
+
+@lru_cache(maxsize=None)
+def _keyring():
+    """(módulo keyring, KeyringError) ou (None, None) se não instalado."""
+    try:
+        import keyring
+        from keyring.errors import KeyringError
+    except ImportError:
+        return None, None
+    return keyring, KeyringError
+
+
+@lru_cache(maxsize=None)
+def _crypto():
+    """(Fernet, InvalidToken, Scrypt) ou None se 'cryptography' não estiver instalado."""
+    try:
+        from cryptography.fernet import Fernet, InvalidToken
+        from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+    except ImportError:
+        return None
+    return Fernet, InvalidToken, Scrypt
+
+
+def _backend_errors() -> Tuple[type, ...]:
+    """Erros esperados dos backends (arquivo corrompido, frase-senha errada, cofre indisponível)."""
+    errors = [ValueError, KeyError, OSError]
+    keyring_error = _keyring()[1]
+    if keyring_error is not None:
+        errors.append(keyring_error)
+    if _crypto() is not None:
+        errors.append(_crypto()[1])
+    return tuple(errors)
+
+KEYRING_SERVICE = "discord-message-deleter"
+SESSION_CACHE_MAX_AGE_DAYS = 30  # sessões mais antigas são descartadas (o token é revalidado de qualquer forma)
+SESSION_FILE_VERSION = 1
+# Custo do scrypt (~50-100 ms por derivação): encarece tentar frases-senha por força bruta
+SCRYPT_N, SCRYPT_R, SCRYPT_P = 2 ** 15, 8, 1
+
+
+def account_key(account: str) -> str:
+    """Identificador estável da conta sem expor o email em nomes de arquivo / entradas do keyring."""
+    return hashlib.sha256(account.strip().lower().encode('utf-8')).hexdigest()[:24]
+
+
+def keyring_available() -> bool:
+    keyring = _keyring()[0]
+    if keyring is None:
+        return False
+    try:
+        backend = keyring.get_keyring()
+    except Exception:
+        return False
+    # O backend "fail" (Linux sem Secret Service, por exemplo) lança erro em qualquer operação
+    return not type(backend).__module__.startswith('keyring.backends.fail')
+
+
+class SessionCache:
+    """
+    Guarda {token, user_id, saved_at} por conta (email).
+    - frase-senha informada: arquivo cifrado (Fernet, chave via scrypt + salt por arquivo)
+    - sem frase-senha: keyring do sistema
+    - keyring indisponível: cai para o arquivo, que exige frase-senha
+    """
+
+    def __init__(self, directory: str, passphrase: Optional[str] = None, use_keyring: bool = True):
+        self.directory = directory
+        self.passphrase = passphrase or None
+        self.use_keyring = use_keyring
+
+    @property
+    def backends(self) -> List[str]:
+        """Backends utilizáveis, em ordem de preferência."""
+        order = []
+        if self.passphrase and _crypto() is not None:
+            order.append('file')
+        if self.use_keyring and keyring_available():
+            order.append('keyring')
+        return order
+
+    @property
+    def available(self) -> bool:
+        return bool(self.backends)
+
+    def unavailable_reason(self) -> str:
+        if self.passphrase and _crypto() is None:
+            return "instale 'cryptography' para usar a frase-senha"
+        if not keyring_available():
+            return "sem keyring do sistema: informe uma frase-senha (requer 'cryptography')"
+        return ""
+
+    # ----------------------------
+    # API
+    # ----------------------------
+    def load(self, account: str) -> Optional[Dict]:
+        key = account_key(account)
+        for backend in self.backends:
+            try:
+                payload = self._load_file(key) if backend == 'file' else self._load_keyring(key)
+            except _backend_errors() as e:
+                print(f"⚠️ Sessão salva ilegível ({backend}): {type(e).__name__}")
+                continue
+            if not payload or not payload.get('token'):
+                continue
+            if time.time() - payload.get('saved_at', 0) > SESSION_CACHE_MAX_AGE_DAYS * 86400:
+                self.clear(account)
+                return None
+            return payload
+        return None
+
+    def save(self, account: str, token: str, user_id: Optional[str] = None) -> Optional[str]:
+        """Salva no primeiro backend que funcionar. Retorna o backend usado (ou None)."""
+        key = account_key(account)
+        payload = {'token': token, 'user_id': user_id, 'saved_at': time.time()}
+        for backend in self.backends:
+            try:
+                if backend == 'file':
+                    self._save_file(key, payload)
+                else:
+                    _keyring()[0].set_password(KEYRING_SERVICE, key, json.dumps(payload))
+                return backend
+            except _backend_errors() as e:
+                print(f"⚠️ Não foi possível salvar a sessão ({backend}): {e}")
+        return None
+
+    def clear(self, account: str):
+        key = account_key(account)
+        path = self._file_path(key)
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"⚠️ Erro ao remover sessão salva: {e}")
+        if keyring_available():
+            try:
+                _keyring()[0].delete_password(KEYRING_SERVICE, key)
+            except Exception:
+                pass  # Não havia entrada
+
+    # ----------------------------
+    # Backends
+    # ----------------------------
+    def _file_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"session_{key}.enc")
+
+    def _fernet(self, salt: bytes):
+        Fernet, _, Scrypt = _crypto()
+        kdf = Scrypt(salt=salt, length=32, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P)
+        return Fernet(base64.urlsafe_b64encode(kdf.derive(self.passphrase.encode('utf-8'))))
+
+    def _load_file(self, key: str) -> Optional[Dict]:
+        path = self._file_path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as fh:
+            envelope = json.load(fh)
+        if envelope.get('v') != SESSION_FILE_VERSION:
+            return None
+        salt = base64.b64decode(envelope['salt'])
+        return json.loads(self._fernet(salt).decrypt(envelope['data'].encode('ascii')))
+
+    def _save_file(self, key: str, payload: Dict):
+        os.makedirs(self.directory, exist_ok=True)
+        salt = os.urandom(16)
+        data = self._fernet(salt).encrypt(json.dumps(payload).encode('utf-8')).decode('ascii')
+        envelope = {'v': SESSION_FILE_VERSION, 'salt': base64.b64encode(salt).decode('ascii'), 'data': data}
+        path = self._file_path(key)
+        tmp = path + '.tmp'
+        # Só o dono lê/escreve (no Windows o modo é ignorado; vale a ACL do perfil do usuário)
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            json.dump(envelope, fh)
+        os.replace(tmp, path)
+
+    def _load_keyring(self, key: str) -> Optional[Dict]:
+        raw = _keyring()[0].get_password(KEYRING_SERVICE, key)
+        return json.loads(raw) if raw else None
@@ -0,0 +1,12 @@
+# snowflakes.py - Conversão entre datas e snowflakes do Discord (IDs com o instante de criação embutido)
+from datetime import datetime
+
+DISCORD_EPOCH_MS = 1420070400000
+
+
+def datetime_to_snowflake(dt: datetime) -> int:
+    """Menor snowflake possível no instante dt. Datas sem fuso são tratadas como horário local."""
+    if dt.tzinfo is None:
+        dt = dt.astimezone()
+    ms = int(dt.timestamp() * 1000)
+    return max(ms - DISCORD_EPOCH_MS, 0) << 22
@@ -0,0 +1,76 @@
+# conftest.py - Caminhos do repositório e o servidor mock da API para os testes de ponta a ponta
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from mock_discord import MockConfig, MockDiscordServer, USER_ID  # noqa: E402
+
+
+def own_deletable(state, channel_id):
+    """IDs que o deleter deve apagar no canal do mock: do usuário, tipo 0/19, não fixadas, ainda existentes."""
+    channel = state.channels[channel_id]
+    return [
+        mid for mid in channel.ids
+        if mid not in channel.deleted
+        and channel.meta[mid][0] == USER_ID and channel.meta[mid][1] in (0, 19) and not channel.meta[mid][2]
+    ]
+
+
+def add_foreign_newest(state, channel_id):
+    """
+    Mensagem mais nova de outro usuário: o last_message_id do canal não muda com as deleções
+    (o mock recalcula o last_message_id ao deletar; o Discord não).
+    """
+    channel = state.channels[channel_id]
+    mid = channel.ids[-1] + 1
+    channel.ids.append(mid)
+    channel.meta[mid] = ('999999999999999999', 0, False)
+    return mid
+
+
+@pytest.fixture
+def mock_server():
+    """Fábrica de servidores mock (um por chamada), desligados no fim do teste."""
+    servers = []
+
+    def start(**config):
+        config.setdefault('guilds', 0)
+        config.setdefault('latency_ms', 0)
+        server = MockDiscordServer(MockConfig(**config))
+        server.start_background()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def make_deleter(monkeypatch, tmp_path):
+    """DiscordMessageDeleter logado no mock, com dados (journal, índice) em tmp_path."""
+    import message_deleter
+
+    monkeypatch.setattr(message_deleter, 'APP_DATA_DIR', str(tmp_path))
+    deleters = []
+
+    def make(server, **kwargs):
+        monkeypatch.setattr(message_deleter, 'API_BASE', server.api_base)
+        kwargs.setdefault('discovery_mode', 'pagination')
+        kwargs.setdefault('message_index_path', str(tmp_path / 'index.sqlite3'))
+        deleter = message_deleter.DiscordMessageDeleter(**kwargs)
+        deleter.token = 'x'
+        deleter.user_id = USER_ID
+        deleter.setup_api_session()
+        deleters.append(deleter)
+        return deleter
+
+    yield make
+    for deleter in deleters:
+        deleter.cleanup()
@@ -0,0 +1,148 @@
+import os
+
+from conftest import own_deletable
+
+from cleanup_journal import CleanupJournal
+
+CHANNELS = [{'id': 'a', 'name': 'A'}, {'id': 'b', 'name': 'B'}]
+
+
+def open_journal(tmp_path, **kwargs):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = CleanupJournal(path, **kwargs)
+    journal.start_run('1', CHANNELS, {'delay_range': [1, 2]})
+    return journal, path
+
+
+def test_load_state_missing_file(tmp_path):
+    assert CleanupJournal.load_state(str(tmp_path / 'nope.jsonl')) is None
+
+
+def test_pending_is_queued_minus_processed(tmp_path):
+    journal, path = open_journal(tmp_path)
+    journal.channel_started('a', None, None, 900)
+    journal.page('a', ['9', '8', '7'], 7)
+    journal.processed('a', '9')
+    journal.processed('a', '8', ok=False)  # falha definitiva também sai da fila
+    journal.page('a', ['7', '6'], 6)  # ID repetido entre páginas não duplica
+    journal.close()
+
+    state = CleanupJournal.load_state(path)
+    assert state['account_id'] == '1'
+    assert state['options'] == {'delay_range': [1, 2]}
+    assert not state['finished']
+    cs = state['channels_state']['a']
+    assert cs['pending'] == ['7', '6']
+    assert cs['oldest'] == 6
+    assert cs['scan_last'] == 900
+    assert cs['started'] and not cs['done']
+    assert 'b' not in state['channels_state']
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    journal, path = open_journal(tmp_path)
+    journal.channel_started('a')
+    journal.page('a', ['5'], 5)
+    journal.close()
+    with open(path, 'a', encoding='utf-8') as fh:
+        fh.write('{"e":"x","ch":"a","id":"5"')  # queda no meio da escrita
+
+    assert CleanupJournal.load_state(path)['channels_state']['a']['pending'] == ['5']
+
+
+def test_channel_done_compacts_the_file(tmp_path):
+    journal, path = open_journal(tmp_path)
+    journal.channel_started('a')
+    ids = [str(i) for i in range(1000, 0, -1)]
+    journal.page('a', ids, 1)
+    for mid in ids:
+        journal.processed('a', mid)
+    journal.sync()
+    size_before = os.path.getsize(path)
+
+    journal.channel_done('a')
+    assert os.path.getsize(path) < size_before / 10
+    journal.close()
+
+    state = CleanupJournal.load_state(path)
+    assert state['channels_state']['a']['done']
+    assert state['channels_state']['a']['pending'] == []
+
+
+def test_periodic_compaction_keeps_only_pending(tmp_path):
+    journal, path = open_journal(tmp_path, compact_every=10)
+    journal.channel_started('a')
+    for page in range(20):
+        ids = [str(page * 10 + i) for i in range(10)]
+        journal.page('a', ids, int(ids[-1]))
+        for mid in ids[:-1]:
+            journal.processed('a', mid)
+    journal.close()
+
+    with open(path, encoding='utf-8') as fh:
+        lines = fh.readlines()
+    assert len(lines) < 20
+    state = CleanupJournal.load_state(path)
+    assert state['channels_state']['a']['pending'] == [str(page * 10 + 9) for page in range(20)]
+
+
+def test_reopen_compacted_preserves_state(tmp_path):
+    journal, path = open_journal(tmp_path)
+    journal.channel_started('a', 5, None, 900)
+    journal.page('a', ['30', '20', '10'], 10)
+    journal.processed('a', '30')
+    journal.channel_done('b')
+    journal.close()
+    state = CleanupJournal.load_state(path)
+
+    reopened = CleanupJournal.reopen_compacted(path, state)
+    assert not reopened.all_channels_done()
+    reopened.close()
+    assert CleanupJournal.load_state(path)['channels_state'] == state['channels_state']
+
+
+def test_finish_run_archives_only_after_every_channel(tmp_path):
+    journal, path = open_journal(tmp_path)
+    journal.channel_done('a')
+    assert not journal.all_channels_done()
+    journal.channel_done('b')
+    assert journal.all_channels_done()
+    journal.finish_run()
+    assert not os.path.exists(path)
+    assert CleanupJournal.load_state(path + '.done')['finished']
+
+
+def test_interrupted_run_resumes_where_it_stopped(mock_server, make_deleter):
+    server = mock_server(dms=2, messages=40)
+    deleter = make_deleter(server, message_index_path=None)
+    dms = deleter.get_dms()
+    deleter.begin_journal(dms, {'delay_range': [0.0, 0.001]})
+
+    def stop_after_five(current, total, name):
+        if current >= 5:
+            deleter._stop_event.set()
+
+    deleter.stream_delete_channel(dms[0], delay_range=(0.0, 0.001), progress_callback=stop_after_five)
+    deleter.end_journal(completed=True)  # parada pelo usuário: não arquiva
+    pending = deleter.get_pending_journal()
+    assert [ch['id'] for ch in pending['unfinished_channels']] == [dm['id'] for dm in dms]
+    assert own_deletable(server.state, dms[0]['id'])
+
+    resumed = make_deleter(server, message_index_path=None)
+    resumed.resume()
+    for dm in dms:
+        assert own_deletable(server.state, dm['id']) == []
+    assert resumed.get_pending_journal() is None
+    assert os.path.exists(resumed._journal_path() + '.done')
+
+
+def test_failed_channel_keeps_the_journal_pending(mock_server, make_deleter):
+    server = mock_server(dms=2, messages=20)
+    deleter = make_deleter(server, message_index_path=None)
+    dms = deleter.get_dms()
+    deleter.begin_journal(dms, {'delay_range': [0.0, 0.001]})
+    deleter.stream_delete_channel(dms[0], delay_range=(0.0, 0.001))  # o segundo canal nunca roda
+    deleter.end_journal(completed=True)
+
+    pending = deleter.get_pending_journal()
+    assert [ch['id'] for ch in pending['unfinished_channels']] == [dms[1]['id']]
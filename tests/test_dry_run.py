@@ -0,0 +1,32 @@
+from conftest import add_foreign_newest, own_deletable
+
+
+def test_dry_run_counts_without_deleting(mock_server, make_deleter):
+    server = mock_server(dms=2, messages=60)
+    deleter = make_deleter(server)
+    dms = deleter.get_dms()
+    expected = {dm['id']: len(own_deletable(server.state, dm['id'])) for dm in dms}
+
+    report = deleter.dry_run(dms, delay_range=(1.0, 2.0))
+
+    assert {row['id']: row['count'] for row in report['channels']} == expected
+    assert all(row['exact'] for row in report['channels'])
+    assert report['total_messages'] == sum(expected.values())
+    assert report['estimated_seconds'] >= sum(expected.values()) * 1.0
+    assert {dm['id']: len(own_deletable(server.state, dm['id'])) for dm in dms} == expected
+    assert deleter.get_stats()['deleted_count'] == 0
+
+
+def test_dry_run_uses_the_index_for_clean_channels(mock_server, make_deleter):
+    server = mock_server(dms=1, messages=30)
+    channel_id = server.state.dm_ids[0]
+    add_foreign_newest(server.state, channel_id)
+
+    cleaner = make_deleter(server)
+    dms = cleaner.get_dms()
+    cleaner.stream_delete_channels(dms, delay_range=(0.0, 0.001))
+
+    report = make_deleter(server).dry_run(dms, delay_range=(1.0, 2.0))
+    row = report['channels'][0]
+    assert (row['count'], row['method']) == (0, 'index')
+    assert report['estimated_seconds'] == 0
@@ -0,0 +1,101 @@
+import re
+from datetime import datetime, timezone
+
+import pytest
+
+from message_filters import FilterSpec, compile_filter, DELETABLE_TYPES
+from snowflakes import datetime_to_snowflake
+
+ME = '1'
+
+
+def msg(mid=100, author=ME, **fields):
+    m = {'id': str(mid), 'author': {'id': author}, 'type': 0, 'pinned': False}
+    m.update(fields)
+    return m
+
+
+def test_default_spec_deletes_own_unpinned_normal_and_replies():
+    is_deletable = FilterSpec(author_id=ME).compile()
+    assert is_deletable(msg())
+    assert is_deletable(msg(type=19))
+    assert not is_deletable(msg(author='2'))
+    assert not is_deletable(msg(pinned=True))
+    assert not is_deletable(msg(type=7))  # entrada de membro: não é apagável pelo autor
+    assert not is_deletable({'id': '5', 'author': None, 'type': 0})
+
+
+def test_empty_spec_accepts_everything():
+    accept = compile_filter(FilterSpec(types=None, include_pinned=True))
+    assert accept(msg(author='2', type=7, pinned=True))
+
+
+def test_window_is_exclusive():
+    spec = FilterSpec(after_id=10, before_id=20)
+    check = spec.compile()
+    assert [mid for mid in range(8, 23) if check(msg(mid))] == list(range(11, 20))
+    assert FilterSpec(after_id=10).compile()(msg(11))
+    assert not FilterSpec(before_id=10).compile()(msg(10))
+
+
+def test_times_become_snowflake_bounds():
+    after = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    before = datetime(2024, 2, 1, tzinfo=timezone.utc)
+    spec = FilterSpec(after_time=after, before_time=before, after_id=5)
+    assert spec.after_id == datetime_to_snowflake(after) - 1  # o mais restritivo vence
+    assert spec.before_id == datetime_to_snowflake(before)
+    assert spec.narrow_window(None, None) == (spec.after_id, spec.before_id)
+    assert spec.narrow_window(spec.after_id + 7, None) == (spec.after_id + 7, spec.before_id)
+
+
+@pytest.mark.parametrize('wanted, attachments, expected', [
+    (True, [{'id': '1'}], True), (True, [], False), (True, True, True),
+    (False, [], True), (False, [{'id': '1'}], False), (False, False, True),
+])
+def test_attachments(wanted, attachments, expected):
+    # Aceita tanto a lista da API quanto o booleano da decodificação projetada
+    assert FilterSpec(has_attachments=wanted).compile()(msg(attachments=attachments)) is expected
+
+
+def test_replies():
+    only_replies = FilterSpec(is_reply=True).compile()
+    no_replies = FilterSpec(is_reply=False).compile()
+    assert only_replies(msg(type=19)) and not only_replies(msg())
+    assert no_replies(msg()) and not no_replies(msg(type=19))
+
+    to_user = FilterSpec(reply_to_user_id='7').compile()
+    assert to_user(msg(type=19, referenced_message={'author': {'id': '7'}}))
+    assert not to_user(msg(type=19, referenced_message={'author': {'id': '8'}}))
+    assert not to_user(msg(type=19, referenced_message=None))
+
+
+def test_content_regex_is_case_insensitive():
+    check = FilterSpec(content_regex=r'senha|token').compile()
+    assert check(msg(content='Meu TOKEN é ...'))
+    assert not check(msg(content='bom dia'))
+    assert not check(msg(content=None))
+    with pytest.raises(re.error):
+        FilterSpec(content_regex='(')
+
+
+def test_flags_describing_the_spec():
+    assert FilterSpec().is_default
+    assert not FilterSpec(include_pinned=True).is_default
+    assert not FilterSpec(has_attachments=True).is_default
+    assert not FilterSpec(has_attachments=True).needs_full_message
+    assert FilterSpec(content_regex='x').needs_full_message
+    assert FilterSpec(reply_to_user_id='7').needs_full_message
+
+
+def test_dict_round_trip_and_with_author():
+    spec = FilterSpec(types=(19, 0, 19), include_pinned=True, after_id=3, has_attachments=False,
+                      content_regex='x', is_reply=True, reply_to_user_id=7)
+    data = spec.to_dict()
+    assert data['types'] == list(DELETABLE_TYPES)
+    assert FilterSpec.from_dict(data).to_dict() == data
+    assert FilterSpec.from_dict(None).to_dict() == FilterSpec().to_dict()
+
+    mine = spec.with_author(ME)
+    assert mine.author_id == ME and spec.author_id is None
+    assert {k: v for k, v in mine.to_dict().items() if k != 'author_id'} == {
+        k: v for k, v in data.items() if k != 'author_id'}
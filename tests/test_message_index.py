@@ -0,0 +1,95 @@
+from conftest import add_foreign_newest, own_deletable
+
+from message_index import MessageIndex, DELETED_FLUSH_SIZE
+
+ACCOUNT = '1'
+CHANNEL = '10'
+
+
+def make_index(tmp_path):
+    return MessageIndex(str(tmp_path / 'index.sqlite3'))
+
+
+def test_can_skip_only_after_complete_scan_with_same_last_message(tmp_path):
+    index = make_index(tmp_path)
+    assert not index.can_skip(ACCOUNT, CHANNEL, 500)
+
+    index.mark_complete(ACCOUNT, CHANNEL, 500, 500)
+    assert index.can_skip(ACCOUNT, CHANNEL, 500)
+    assert index.can_skip(ACCOUNT, CHANNEL, '500')
+    assert not index.can_skip(ACCOUNT, CHANNEL, 501)  # mensagem nova desde a limpeza
+    assert not index.can_skip(ACCOUNT, CHANNEL, None)
+    assert not index.can_skip('2', CHANNEL, 500)  # outra conta
+
+
+def test_can_skip_requires_high_water_to_cover_last_message(tmp_path):
+    index = make_index(tmp_path)
+    # Busca com atraso de indexação: high-water abaixo do último ID
+    index.mark_complete(ACCOUNT, CHANNEL, 500, 400)
+    assert not index.can_skip(ACCOUNT, CHANNEL, 500)
+    assert index.high_water(ACCOUNT, CHANNEL) == 400
+
+
+def test_high_water_is_none_until_complete(tmp_path):
+    index = make_index(tmp_path)
+    index.record_scan_range(ACCOUNT, CHANNEL, 0, 300)
+    assert index.high_water(ACCOUNT, CHANNEL) is None
+    assert index.get_channel_state(ACCOUNT, CHANNEL) is None
+
+
+def test_state_survives_reopen(tmp_path):
+    index = make_index(tmp_path)
+    index.mark_complete(ACCOUNT, CHANNEL, 500, 500)
+    index.record_deleted(ACCOUNT, CHANNEL, [1, 2, 3])
+    index.close()
+
+    reopened = make_index(tmp_path)
+    assert reopened.can_skip(ACCOUNT, CHANNEL, 500)
+    assert reopened.deleted_count(ACCOUNT) == 3
+    reopened.close()
+
+
+def test_record_deleted_buffers_and_ignores_duplicates(tmp_path):
+    index = make_index(tmp_path)
+    index.record_deleted(ACCOUNT, CHANNEL, range(DELETED_FLUSH_SIZE - 1))
+    assert len(index._pending_deleted) == DELETED_FLUSH_SIZE - 1
+    index.record_deleted(ACCOUNT, CHANNEL, [0, DELETED_FLUSH_SIZE])  # completa o lote: grava
+    assert index._pending_deleted == []
+    assert index.deleted_count(ACCOUNT, CHANNEL) == DELETED_FLUSH_SIZE
+    assert index.deleted_count(ACCOUNT, '11') == 0
+
+
+def test_forget_channel_and_forget_account(tmp_path):
+    index = make_index(tmp_path)
+    for channel in ('10', '11'):
+        index.mark_complete(ACCOUNT, channel, 500, 500)
+    index.mark_complete('2', '10', 500, 500)
+
+    index.forget_channel(ACCOUNT, '10')
+    assert index.get_channel_state(ACCOUNT, '10') is None
+    assert index.can_skip(ACCOUNT, '11', 500)
+
+    assert index.forget_account(ACCOUNT) == 1
+    assert index.get_channel_state(ACCOUNT, '11') is None
+    assert index.can_skip('2', '10', 500)  # outra conta intacta
+
+
+def test_clean_channel_is_skipped_until_it_is_forgotten(mock_server, make_deleter):
+    server = mock_server(dms=1, messages=30)
+    channel_id = server.state.dm_ids[0]
+    add_foreign_newest(server.state, channel_id)
+
+    first = make_deleter(server)
+    dms = first.get_dms()
+    first.stream_delete_channels(dms, delay_range=(0.0, 0.001))
+    assert own_deletable(server.state, channel_id) == []
+    assert first.message_index.get_channel_state(first.user_id, channel_id)['complete']
+
+    second = make_deleter(server)
+    second.stream_delete_channels(dms, delay_range=(0.0, 0.001))
+    assert second.get_stats()['skipped_channels'] == [channel_id]
+
+    assert second.forget_channel_index(channel_id)
+    third = make_deleter(server)
+    third.stream_delete_channels(dms, delay_range=(0.0, 0.001))
+    assert third.get_stats()['skipped_channels'] == []
@@ -0,0 +1,61 @@
+import json
+
+from message_store import (MessageStore, message_flags, FLAG_PINNED, FLAG_ATTACHMENTS, FLAG_REPLY,
+                           FLAG_EMBEDS)
+from page_decoder import decode_message_page, _project
+
+
+def api_message(mid, **fields):
+    msg = {'id': str(mid), 'type': 0, 'pinned': False, 'author': {'id': '1'}, 'attachments': [], 'embeds': []}
+    msg.update(fields)
+    return msg
+
+
+def test_message_flags():
+    assert message_flags(api_message(1)) == 0
+    assert message_flags(api_message(1, pinned=True)) == FLAG_PINNED
+    assert message_flags(api_message(1, attachments=[{'id': '2'}])) == FLAG_ATTACHMENTS
+    assert message_flags(api_message(1, type=19)) == FLAG_REPLY
+    assert message_flags(api_message(1, message_reference={'message_id': '3'})) == FLAG_REPLY
+    assert message_flags(api_message(1, embeds=[{'type': 'rich'}])) == FLAG_EMBEDS
+
+
+def test_projected_pages_keep_the_flags():
+    full = [
+        api_message(5, attachments=[{'id': '9'}], embeds=[{'type': 'rich'}]),
+        api_message(4, type=19, message_reference={'message_id': '1'}, pinned=True),
+        api_message(3),
+    ]
+    page = json.dumps(full).encode()
+    assert [message_flags(m) for m in decode_message_page(page)] == [message_flags(m) for m in full]
+    assert [message_flags(_project(m)) for m in full] == [message_flags(m) for m in full]
+
+
+def test_store_keeps_ids_types_and_flags():
+    store = MessageStore()
+    store.extend_messages([api_message(2 ** 63 + 5, type=19, pinned=True), api_message(7)])
+    assert len(store) == 2 and store
+    assert list(store.iter_ids()) == [str(2 ** 63 + 5), '7']
+
+    first = store[0]
+    assert first.id == 2 ** 63 + 5
+    assert first['id'] == str(2 ** 63 + 5)
+    assert first['type'] == 19
+    assert first['pinned'] and first.pinned
+    assert not store[1].pinned
+
+
+def test_slices_are_stores():
+    store = MessageStore(range(1, 11))
+    part = store[:3]
+    assert isinstance(part, MessageStore)
+    assert list(part.iter_ids()) == ['1', '2', '3']
+    assert len(store) == 10
+
+
+def test_empty_store_is_falsy_and_small():
+    store = MessageStore()
+    assert not store
+    assert store.nbytes() == 0
+    store.append(1)
+    assert store.nbytes() == 10  # 8 bytes de ID + 1 de tipo + 1 de flags
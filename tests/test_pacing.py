@@ -0,0 +1,53 @@
+import pytest
+
+from pacing import AIMDPacer
+
+
+def test_starts_at_the_slowest_pace():
+    pacer = AIMDPacer(1.0, 3.0)
+    assert pacer.delay == pytest.approx(3.0)
+    assert pacer.bounds == (1.0, 3.0)
+
+
+def test_swapped_bounds_are_normalized():
+    assert AIMDPacer(3.0, 1.0).bounds == (1.0, 3.0)
+
+
+def test_successes_ramp_up_to_the_max_rate():
+    pacer = AIMDPacer(1.0, 3.0)
+    previous = pacer.delay
+    pacer.on_success()
+    assert pacer.delay < previous
+    for _ in range(100):
+        pacer.on_success()
+    assert pacer.delay == pytest.approx(1.0)
+    assert pacer.successes == 101
+
+
+def test_throttle_halves_the_rate_but_not_below_the_floor():
+    pacer = AIMDPacer(1.0, 3.0)
+    for _ in range(100):
+        pacer.on_success()
+    pacer.on_throttle()
+    assert pacer.rate == pytest.approx(0.5)
+    for _ in range(10):
+        pacer.on_throttle()
+    assert pacer.delay == pytest.approx(3.0)
+    assert pacer.throttles == 11
+
+
+def test_next_delay_stays_within_bounds():
+    pacer = AIMDPacer(1.0, 3.0, jitter=0.5)
+    for _ in range(200):
+        assert 1.0 <= pacer.next_delay() <= 3.0
+        pacer.on_success()
+
+
+def test_estimate_includes_ramp_and_latency():
+    pacer = AIMDPacer(1.0, 1.0)  # sem rampa: taxa fixa de 1/s
+    assert pacer.estimate_seconds(10) == pytest.approx(10.0)
+    assert pacer.estimate_seconds(10, request_latency=0.2) == pytest.approx(12.0)
+
+    ramping = AIMDPacer(1.0, 3.0)
+    assert 100.0 < ramping.estimate_seconds(100) < 3.0 * 100
+    assert ramping.rate == ramping.min_rate  # estimar não altera o estado
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from rate_limits import RateLimiter, split_route
+
+API = 'https://discord.com/api/v9'
+
+
+def headers(remaining, reset_after, bucket='b1', limit=5, **extra):
+    h = {'x-ratelimit-bucket': bucket, 'x-ratelimit-limit': str(limit),
+         'x-ratelimit-remaining': str(remaining), 'x-ratelimit-reset-after': str(reset_after)}
+    h.update(extra)
+    return h
+
+
+def waited(limiter, method, url):
+    return asyncio.run(limiter.acquire(method, url))
+
+
+@pytest.mark.parametrize('method, url, expected', [
+    ('delete', f'{API}/channels/123/messages/456', ('DELETE /channels/:major/messages/:id', '123')),
+    ('GET', f'{API}/guilds/9/messages/search?author_id=1', ('GET /guilds/:major/messages/search', '9')),
+    ('GET', f'{API}/users/@me/channels', ('GET /users/@me/channels', '')),
+    ('GET', 'http://127.0.0.1:8765/api/v10/channels/7/messages', ('GET /channels/:major/messages', '7')),
+])
+def test_split_route(method, url, expected):
+    assert split_route(method, url) == expected
+
+
+def test_unknown_route_does_not_wait():
+    limiter = RateLimiter(global_requests_per_second=0)
+    assert waited(limiter, 'GET', f'{API}/channels/1/messages') == 0.0
+
+
+def test_exhausted_bucket_waits_for_reset():
+    limiter = RateLimiter(global_requests_per_second=0)
+    url = f'{API}/channels/1/messages/2'
+    limiter.update('DELETE', url, headers(remaining=0, reset_after=0.05), 204)
+    assert 0.03 <= waited(limiter, 'DELETE', url) < 0.5
+
+
+def test_remaining_is_reserved_on_acquire():
+    limiter = RateLimiter(global_requests_per_second=0)
+    url = f'{API}/channels/1/messages/2'
+    limiter.update('DELETE', url, headers(remaining=1, reset_after=0.05), 204)
+    assert waited(limiter, 'DELETE', url) == 0.0
+    assert waited(limiter, 'DELETE', url) > 0.0  # a vaga restante já foi usada
+
+
+def test_buckets_are_separated_by_major_parameter():
+    limiter = RateLimiter(global_requests_per_second=0)
+    limiter.update('DELETE', f'{API}/channels/1/messages/2', headers(remaining=0, reset_after=5), 204)
+    assert waited(limiter, 'DELETE', f'{API}/channels/3/messages/4') == 0.0
+
+
+def test_routes_sharing_a_bucket_share_its_state():
+    limiter = RateLimiter(global_requests_per_second=0)
+    limiter.update('GET', f'{API}/channels/1/pins', headers(remaining=3, reset_after=0.05, bucket='shared'), 200)
+    limiter.update('GET', f'{API}/channels/1/messages', headers(remaining=0, reset_after=0.05, bucket='shared'), 200)
+    assert waited(limiter, 'GET', f'{API}/channels/1/pins') > 0.0
+
+
+def test_route_429_without_headers_blocks_until_retry_after():
+    limiter = RateLimiter(global_requests_per_second=0)
+    url = f'{API}/channels/1/messages/2'
+    limiter.update('DELETE', url, {}, 429, retry_after=0.05)
+    assert waited(limiter, 'DELETE', url) >= 0.03
+    assert waited(limiter, 'GET', f'{API}/users/@me') == 0.0
+
+
+def test_global_429_pauses_every_route():
+    limiter = RateLimiter(global_requests_per_second=0)
+    limiter.update('DELETE', f'{API}/channels/1/messages/2', {'x-ratelimit-scope': 'global'}, 429, retry_after=0.05)
+    assert waited(limiter, 'GET', f'{API}/users/@me') >= 0.03
+
+
+def test_global_spacing():
+    limiter = RateLimiter(global_requests_per_second=20)
+
+    async def burst():
+        return [await limiter.acquire('GET', f'{API}/users/@me') for _ in range(3)]
+
+    waits = asyncio.run(burst())
+    assert waits[0] == 0.0
+    assert sum(waits) >= 0.08  # 3 requests a 20/s: ao menos 2 intervalos de 50 ms
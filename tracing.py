@@ -0,0 +1,266 @@
+# tracing.py - Rastreamento opcional (spans em JSONL) de requests, retries e esperas, com analisador offline
+#
+# Gravação: deleter.enable_tracing("trace.jsonl") ou DMD_TRACE_FILE=trace.jsonl
+# Análise:  python tracing.py trace.jsonl [trace.jsonl.1 ...]
+import os
+import gc
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+TRACE_MAX_BYTES = 50 * 1024 * 1024  # rotaciona o arquivo ao passar disso
+TRACE_BACKUP_COUNT = 3  # trace.jsonl.1 ... trace.jsonl.N
+TRACE_QUEUE_MAXSIZE = 100000  # registros pendentes; acima disso são descartados (nunca bloqueia o loop)
+TRACE_BATCH_SIZE = 512
+
+# Categorias do relatório: para onde foi o tempo
+CATEGORIES = {
+    'request': 'rede (requests HTTP)',
+    'pacing': 'pacing entre deleções',
+    'rate_limit_wait': 'espera de bucket / 429',
+    'cooldown': 'cooldown após 429s seguidos',
+    'backoff': 'backoff após timeout/erro',
+    'search_wait': 'índice de busca não pronto',
+    'page_delay': 'pausas fixas entre páginas/lotes',
+    'gc': 'coleta de lixo (GC)',
+}
+
+
+class NullTracer:
+    """Tracer desativado: mesma interface, nenhum custo além da chamada."""
+    enabled = False
+    dropped = 0
+
+    def emit(self, kind: str, start: float, duration: float = 0.0, **fields):
+        pass
+
+    @contextmanager
+    def span(self, kind: str, **fields):
+        yield {}
+
+    def close(self):
+        pass
+
+
+NULL_TRACER = NullTracer()
+
+
+class Tracer:
+    """
+    Grava um registro JSON por span (kind, t = início em time.monotonic(), dur em segundos + campos).
+    emit() só enfileira: uma thread daemon serializa e escreve em lotes, rotacionando o arquivo.
+    Com trace_gc=True as pausas do GC também viram spans (kind='gc').
+    """
+    enabled = True
+
+    def __init__(self, path: str, max_bytes: int = TRACE_MAX_BYTES, backup_count: int = TRACE_BACKUP_COUNT,
+                 trace_gc: bool = True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=TRACE_QUEUE_MAXSIZE)
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        self._fh = open(path, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._writer, name='trace-writer', daemon=True)
+        self._thread.start()
+        # Âncora para converter os tempos monotônicos em horário real na análise
+        self._put({'kind': 'trace_start', 't': time.monotonic(), 'dur': 0.0, 'wall': time.time(), 'pid': os.getpid()})
+
+        self._gc_start = None
+        self._gc_callback = None
+        if trace_gc:
+            self._gc_callback = self._on_gc
+            gc.callbacks.append(self._gc_callback)
+
+    def _put(self, record: Dict):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, kind: str, start: float, duration: float = 0.0, **fields):
+        record = {'kind': kind, 't': start, 'dur': duration}
+        record.update(fields)
+        self._put(record)
+
+    @contextmanager
+    def span(self, kind: str, **fields):
+        """Mede o bloco; quem chama pode completar o registro (status, bytes...) pelo dict retornado."""
+        start = time.monotonic()
+        try:
+            yield fields
+        except BaseException as e:
+            fields.setdefault('error', type(e).__name__)
+            raise
+        finally:
+            self.emit(kind, start, time.monotonic() - start, **fields)
+
+    def _on_gc(self, phase: str, info: Dict):
+        if phase == 'start':
+            self._gc_start = time.monotonic()
+        elif self._gc_start is not None:
+            start, self._gc_start = self._gc_start, None
+            self.emit('gc', start, time.monotonic() - start,
+                      generation=info.get('generation'), collected=info.get('collected'))
+
+    # ----------------------------
+    # Thread de escrita
+    # ----------------------------
+    def _writer(self):
+        while True:
+            record = self._queue.get()
+            batch = [record]
+            while len(batch) < TRACE_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            lines = [json.dumps(r, separators=(',', ':')) for r in batch if r is not None]
+            if lines:
+                self._fh.write('\n'.join(lines) + '\n')
+                self._fh.flush()
+                if self._fh.tell() >= self.max_bytes:
+                    self._rotate()
+            if stop:
+                return
+
+    def _rotate(self):
+        self._fh.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._fh = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        if self._gc_callback is not None:
+            try:
+                gc.callbacks.remove(self._gc_callback)
+            except ValueError:
+                pass
+            self._gc_callback = None
+        if self.dropped:
+            self._put({'kind': 'trace_dropped', 't': time.monotonic(), 'dur': 0.0, 'count': self.dropped})
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+        self._fh.close()
+
+
+# ----------------------------
+# Análise offline
+# ----------------------------
+def load_records(paths: Iterable[str]) -> List[Dict]:
+    records = []
+    for path in paths:
+        with open(path, encoding='utf-8') as fh:
+            for line in fh:
+                line = line.strip()
+                if line:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        pass  # linha truncada (queda no meio da escrita)
+    records.sort(key=lambda r: r.get('t', 0.0))
+    return records
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def analyze_trace(records: List[Dict]) -> Dict:
+    """Resume para onde foi o tempo: total por categoria, por rota e os requests mais lentos."""
+    spans = [r for r in records if r.get('kind') not in ('trace_start', 'trace_dropped')]
+    if not spans:
+        return {'wall': 0.0, 'categories': {}, 'routes': {}, 'slowest': [], 'throttles': 0, 'dropped': 0}
+    wall = max(r['t'] + r.get('dur', 0.0) for r in spans) - min(r['t'] for r in spans)
+
+    categories: Dict[str, Dict] = {}
+    routes: Dict[str, Dict] = {}
+    for r in spans:
+        kind = r['kind']
+        cat = categories.setdefault(kind, {'seconds': 0.0, 'count': 0})
+        cat['seconds'] += r.get('dur', 0.0)
+        cat['count'] += 1
+        if kind == 'request':
+            route = routes.setdefault(r.get('route', '?'), {'count': 0, 'seconds': 0.0, 'bytes': 0, 'status': {}, '_durs': []})
+            route['count'] += 1
+            route['seconds'] += r.get('dur', 0.0)
+            route['bytes'] += r.get('bytes') or 0
+            status = str(r.get('status', r.get('error', '?')))
+            route['status'][status] = route['status'].get(status, 0) + 1
+            route['_durs'].append(r.get('dur', 0.0))
+
+    for route in routes.values():
+        durs = route.pop('_durs')
+        route['p50_ms'] = _percentile(durs, 0.5) * 1000
+        route['p95_ms'] = _percentile(durs, 0.95) * 1000
+
+    slowest = sorted((r for r in spans if r['kind'] == 'request'), key=lambda r: r.get('dur', 0.0), reverse=True)[:5]
+    return {
+        'wall': wall,
+        'categories': categories,
+        'routes': routes,
+        'slowest': slowest,
+        'throttles': sum(1 for r in spans if r['kind'] == 'throttle'),
+        'dropped': sum(r.get('count', 0) for r in records if r.get('kind') == 'trace_dropped'),
+    }
+
+
+def format_report(report: Dict) -> str:
+    wall = report['wall']
+    lines = [f"⏱️ Tempo de parede: {wall:.1f}s | 429 recebidos: {report['throttles']}"]
+    if report['dropped']:
+        lines.append(f"⚠️ {report['dropped']} registros descartados (fila do writer cheia)")
+    lines.append("")
+    lines.append(f"{'categoria':38} {'segundos':>10} {'% parede':>9} {'spans':>7}")
+    cats = report['categories']
+    for kind in sorted(cats, key=lambda k: cats[k]['seconds'], reverse=True):
+        if kind == 'throttle':
+            continue
+        c = cats[kind]
+        share = c['seconds'] / wall * 100 if wall else 0.0
+        lines.append(f"{CATEGORIES.get(kind, kind):38} {c['seconds']:10.2f} {share:8.1f}% {c['count']:7d}")
+    lines.append("(com canais em paralelo as categorias se sobrepõem e podem somar mais que 100%)")
+
+    if report['routes']:
+        lines.append("")
+        lines.append(f"{'rota':44} {'reqs':>6} {'seg':>8} {'p50 ms':>8} {'p95 ms':>8} {'KB':>8}  status")
+        for name, r in sorted(report['routes'].items(), key=lambda kv: kv[1]['seconds'], reverse=True):
+            status = ", ".join(f"{k}:{v}" for k, v in sorted(r['status'].items()))
+            lines.append(f"{name[:44]:44} {r['count']:6d} {r['seconds']:8.2f} {r['p50_ms']:8.0f} {r['p95_ms']:8.0f} "
+                         f"{r['bytes'] / 1024:8.0f}  {status}")
+
+    if report['slowest']:
+        lines.append("")
+        lines.append("🐢 Requests mais lentos:")
+        for r in report['slowest']:
+            lines.append(f"   {r['dur'] * 1000:8.0f} ms  {r.get('route', '?')}  "
+                         f"status={r.get('status', r.get('error', '?'))} tentativa={r.get('attempt', 1)}")
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Analisa um trace JSONL do deleter: para onde foi o tempo")
+    parser.add_argument('paths', nargs='+', help="arquivo(s) de trace (inclua os rotacionados: trace.jsonl.1 ...)")
+    args = parser.parse_args(argv)
+    print(format_report(analyze_trace(load_records(args.paths))))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])